@@ -1,7 +1,11 @@
 import os
 import json
+import dataclasses
+import warnings
 
+import numpy as np
 import pandas as pd
+import requests
 
 from specklepy.api.client import SpeckleClient
 from specklepy.api.credentials import get_account_from_token
@@ -9,23 +13,57 @@ from specklepy.api.credentials import get_account_from_token
 from specklepy.api import operations
 from specklepy.objects.base import Base
 from specklepy.api.wrapper import StreamWrapper
+from specklepy.transports.abstract_transport import AbstractTransport
 from specklepy.transports.server import ServerTransport
+from specklepy.transports.sqlite import SQLiteTransport
 from specklepy.serialization.base_object_serializer import BaseObjectSerializer
 
 from speckle_automate import AutomationContext
 
-from dotenv import load_dotenv
-from typing import Any, Dict, List, Tuple
+from columnar_export import has_pyarrow, write_blocks_to_dataset, write_dataframe, write_dataframes_to_dataset
+from excel_export import SUMMARY_SHEET_NAME, unique_sheet_names, write_blocks_to_excel, write_dataframes_to_excel
+from export_plan import SUMMARY_FORMAT, ExportPlan
+from grouping import SystemBlockAccumulator, group_by_system_classification, iter_system_blocks
+from incremental import IncrementalState
+from model_index import ModelIndex, index_model
+from object_cache import ObjectCache
+from object_fetcher import ObjectFetcher
+from pipeline import DEFAULT_CHUNK_SIZE, get_serialized_object_data, get_version_roots, iter_chunks, iter_version_objects
+from profiling import ByteCountingTransport, StageProfiler
+from projection import CLASSIFICATION_NUMBER_PARAMETER, ParameterProjection
+from sharding import group_in_processes
+from type_join import TypeParameterJoin
+from uniclass import UniclassIndex
+from version_history import ModelVersion, VersionHistory
+
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 
 
 class AccessSystemSpecificDataSpecklePy:
 
-    def __init__(self, model_url, project_id, server, token) -> None:
+    def __init__(self, model_url, project_id, server, token, object_cache: Optional[ObjectCache] = None, profiler: Optional[StageProfiler] = None,
+                 model_id: Optional[str] = None, version_object_id: Optional[str] = None,
+                 client: Optional[SpeckleClient] = None, session: Optional[requests.Session] = None,
+                 local_transport_factory: Optional[Callable[[], AbstractTransport]] = None) -> None:
         self.model_url = model_url
         self.project_id = project_id
         self.server = server
         self.token = token
+        # Optional persistent cache in front of the server for all object downloads.
+        self.object_cache = object_cache
+        # Stage timings of process_speckle_data; disabled unless a profiler is given.
+        self.profiler = profiler or StageProfiler(enabled=False)
+        # Process the latest version of this model instead of the latest version in the project.
+        self.model_id = model_id
+        # Process this version instead of looking up the latest one.
+        self.version_object_id = version_object_id
+        # An authenticated client and HTTP session shared with other models, e.g. in a batch.
+        self.client = client
+        self.session = session
+        # Creates the transport received objects are stored in when there is no object cache, e.g. a
+        # private MemoryTransport per model in a batch. Defaults to the user's local SQLite transport.
+        self.local_transport_factory = local_transport_factory
 
 
     def get_speckle_client(self) -> SpeckleClient:
@@ -37,13 +75,47 @@ class AccessSystemSpecificDataSpecklePy:
             token (str): The personal access token for authentication.
 
         Returns:
-            SpeckleClient: An authenticated Speckle client.
+            SpeckleClient: An authenticated Speckle client. The shared client when one was given.
         """
+        if self.client is not None:
+            return self.client
         client = SpeckleClient(host=self.server)
         client.authenticate_with_token(self.token)
         return client
     
 
+    def get_model_versions(self, client: SpeckleClient, limit: int = 1) -> List[ModelVersion]:
+        """
+        Get the latest versions of the Speckle model on which the automation is being triggered, newest first.
+
+        Args:
+            client (SpeckleClient): An authenticated client.
+            limit (int): The number of versions to get at most.
+
+        Returns:
+            List[ModelVersion]: The versions of the model, or of the project when there is no
+                `model_id`. Only the pinned version when there is a `version_object_id`, with its
+                object id standing in for its version id.
+
+        Raises:
+            ValueError: When there is no version.
+        """
+        if self.version_object_id is not None:
+            return [ModelVersion(self.version_object_id, self.version_object_id)]
+        if self.model_id is not None:
+            model = client.model.get_with_versions(self.model_id, self.project_id, versions_limit=limit)
+            versions = [ModelVersion(version.id, version.referencedObject, str(version.createdAt), version.message)
+                        for version in model.versions.items]
+            if not versions:
+                raise ValueError(f"Model {self.model_id} in project {self.project_id} has no versions.")
+            return versions
+
+        commits = client.commit.list(stream_id=self.project_id, limit=limit)
+        if not commits:
+            raise ValueError(f"Project {self.project_id} has no versions.")
+        return [ModelVersion(commit.id, commit.referencedObject, str(commit.createdAt), commit.message) for commit in commits]
+
+
     def get_version_object_id(self, client: SpeckleClient) -> str:
         """
         Get the latest version id of the Speckle model on which the automation is being triggered.
@@ -53,12 +125,10 @@ class AccessSystemSpecificDataSpecklePy:
             project_id (str): _description_
 
         Returns:
-            str: The most recent commit id
+            str: The most recent commit id, or the pinned `version_object_id` when there is one.
         """
-        commits = client.commit.list(stream_id=self.project_id)
-        latest_commit = commits[0].referencedObject # latest_commit is the same as version_object_id
-        
-        return latest_commit
+        # latest_commit is the same as version_object_id
+        return self.get_model_versions(client, limit=1)[0].referenced_object
     
 
     def create_transport_and_serializer(self, client: SpeckleClient) -> Tuple[ServerTransport, BaseObjectSerializer]:
@@ -73,15 +143,68 @@ class AccessSystemSpecificDataSpecklePy:
             Tuple[ServerTransport, BaseObjectSerializer]: _description_
         """
         transport = ServerTransport(client=client, stream_id=self.project_id)
+        if self.session is not None:
+            # The shared session already holds the same token and accept headers.
+            transport.session = self.session
         serializer = BaseObjectSerializer()
 
         return transport, serializer
     
 
-    def get_base_object(self, latest_commit, transport):
-        received_base = operations.receive(obj_id=latest_commit, remote_transport=transport)
+    def create_local_transport(self):
+        """The transport received objects are stored in: the object cache, a new transport of the factory, or the local SQLite transport."""
+        if self.object_cache is not None:
+            return self.object_cache
+        return self.local_transport_factory() if self.local_transport_factory is not None else SQLiteTransport()
+
+
+    def get_base_object(self, latest_commit, transport, local_transport=None):
+        """
+        Receives the version object and all its children.
+
+        With an object cache, only the objects that are not cached yet are downloaded.
+
+        Args:
+            latest_commit (str): The object id of the version.
+            transport (ServerTransport): The transport to download missing objects with.
+            local_transport (Optional[AbstractTransport]): The transport received objects are
+                stored in. Defaults to `create_local_transport`.
+
+        Returns:
+            Base: The received version object.
+        """
+        if self.object_cache is not None and not self.object_cache.has_complete_object(latest_commit):
+            # Receive from the cache only trusts a cached parent if all its children are cached too.
+            self.object_cache.discard(latest_commit)
+
+        received_base = operations.receive(obj_id=latest_commit, remote_transport=transport, local_transport=local_transport or self.create_local_transport())
 
         return received_base
+
+
+    def receive_version_objects(self, latest_commit, transport, local_transport: AbstractTransport) -> dict:
+        """
+        Copies the version object and all its children into the local transport, without deserializing them.
+
+        Like `get_base_object`, objects the local transport already has are not downloaded
+        again, but no Base tree is built: the objects are read one at a time afterwards.
+
+        Args:
+            latest_commit (str): The object id of the version.
+            transport (ServerTransport): The transport to download missing objects with.
+            local_transport (AbstractTransport): The transport the objects are stored in and read from.
+
+        Returns:
+            dict: The parsed version object.
+        """
+        if self.object_cache is not None and not self.object_cache.has_complete_object(latest_commit):
+            self.object_cache.discard(latest_commit)
+
+        serialized_root = local_transport.get_object(latest_commit)
+        if serialized_root is None:
+            serialized_root = transport.copy_object_and_children(latest_commit, local_transport)
+
+        return json.loads(serialized_root)
     
 
     def get_properties(self, element: Base) -> dict:
@@ -93,6 +216,19 @@ class AccessSystemSpecificDataSpecklePy:
         return properties
     
 
+    def index_model(self, base_object: Base) -> ModelIndex:
+        """
+        Walks the received version once and indexes the objects that hold data.
+
+        Args:
+            base_object (Base): The received Speckle Base object of the version.
+
+        Returns:
+            ModelIndex: The ids, objects, speckle types, collections and parents of the objects.
+        """
+        return index_model(base_object)
+
+
     def get_list_of_object_ids(self, base_object) -> List:
         """
         Iterates through the data in the model to get a list of the object ids.
@@ -103,150 +239,257 @@ class AccessSystemSpecificDataSpecklePy:
         Returns:
             List: A list of all the object ids.
         """
+        return self.index_model(base_object).object_ids
+    
 
-        properties = self.get_properties(base_object)
 
-        object_ids = set()
-        object_speckle_types = set()
-        keys_with_data = ['@Materials', '@Views', '@Project Information', '@Sheets', 'elements']
+    def get_objects_by_id(self, base_object: Base) -> Dict[str, Base]:
+        """
+        Walks the already received version tree once and collects the objects that hold data.
 
-        for key in properties.keys():
-            for key in keys_with_data:
-                for element in properties[key]:
-                    object_ids.add(element.id)
-                    object_speckle_types.add(element.speckle_type)
+        The objects are the same ones `get_list_of_object_ids` lists, kept so they do not
+        have to be received again.
 
-        object_ids = list(object_ids)
+        Args:
+            base_object (Base): The received Speckle Base object of the version.
 
-        types_properties = self.get_properties(base_object['@Types'])
+        Returns:
+            Dict[str, Base]: The objects in the model keyed by their object id.
+        """
+        return self.index_model(base_object).objects
+    
 
-        types_with_data = []
-        types_object_ids = set()
+    def create_object_fetcher(self, max_workers: int = 4, batch_size: int = 500, max_retries: int = 3) -> ObjectFetcher:
+        """
+        Create a fetcher that downloads objects concurrently, in batches, from the project.
 
-        for type in types_properties.keys():
-            if type.startswith('@'):
-                types_with_data.append(type)
+        Args:
+            max_workers (int): The number of requests in flight at the same time.
+            batch_size (int): The number of objects requested in one request.
+            max_retries (int): The number of retries for a failed request.
 
-        for key in types_properties.keys():
-            if key in types_with_data:
-                for element in types_properties[key]:
-                    types_object_ids.add(element.id)
+        Returns:
+            ObjectFetcher: The fetcher for this project.
+        """
+        return ObjectFetcher(server=self.server, project_id=self.project_id, token=self.token,
+                             batch_size=batch_size, max_workers=max_workers, max_retries=max_retries,
+                             cache=self.object_cache, session=self.session)
+    
 
-        types_object_ids = list(types_object_ids)
+    def get_object_data(self, element: Base, projection: Optional[ParameterProjection] = None) -> Dict:
+        """
+        Converts an object to the plain dictionary read by the grouping stage.
 
+        Only `id`, `speckle_type` and the `name`, `value` and `units` of each entry in `parameters`
+        are read. Geometry, display values and any other members are skipped, so there is no
+        serialize and parse round trip and no json string is built for the object.
 
-        all_object_ids = object_ids + types_object_ids
+        Args:
+            element (Base): The object to convert.
+            projection (Optional[ParameterProjection]): The parameters to keep. Others are not read.
 
-        return all_object_ids
+        Returns:
+            Dict: The object data, shaped like the serialized object for the fields that are kept.
+        """
+        data = {"id": element.id, "speckle_type": element.speckle_type}
+
+        parameters = getattr(element, 'parameters', None)
+        if isinstance(parameters, Base):
+            # Sorted, like the serializer, so the columns come out in the same order.
+            named_params = [
+                (param_name, param) for param_name, param in sorted(vars(parameters).items())
+                if isinstance(param, Base) and not param_name.startswith('_') and hasattr(param, 'name')
+            ]
+            columns = None
+            if projection is not None:
+                ss_code = next((getattr(param, 'value', None) for _, param in named_params if param.name == CLASSIFICATION_NUMBER_PARAMETER), None)
+                columns = projection.get_columns(ss_code)
+
+            parameters_data = {}
+            for param_name, param in named_params:
+                if columns is None or projection.keeps(param_name, param.name, columns):
+                    parameters_data[param_name] = {"name": param.name, "value": getattr(param, 'value', None), "units": param.units}
+            data["parameters"] = parameters_data
+
+        return data
     
 
+    def create_obj_id_data_dictionary(self, object_ids: List, transport: ServerTransport, serializer: Optional[BaseObjectSerializer] = None, received_objects: Optional[Dict[str, Base]] = None, fetcher: Optional[ObjectFetcher] = None, projection: Optional[ParameterProjection] = None) -> Dict:
+        """
+        Creates a dictionary of the data of each object.
 
-    def create_obj_id_data_dictionary(self, object_ids: List, transport: ServerTransport, serializer: BaseObjectSerializer) -> Dict:
-        """_summary_
+        Objects found in `received_objects` are converted straight from memory. Ids that are
+        missing from it are downloaded in batches by `fetcher` when one is given, otherwise
+        they are received one at a time through the transport.
 
         Args:
-            object_ids (List): _description_
-            serializer (BaseObjectSerializer): _description_
+            object_ids (List): The ids of the objects to get the data for.
+            transport (ServerTransport): The transport used for ids that were not already received.
+            serializer (Optional[BaseObjectSerializer]): Not used any more, objects are converted
+                with `get_object_data`. Kept so existing callers keep working.
+            received_objects (Optional[Dict[str, Base]]): Objects already in memory, keyed by id.
+            fetcher (Optional[ObjectFetcher]): Concurrent fetcher for the ids that are not in memory.
+            projection (Optional[ParameterProjection]): The parameters to keep for each object.
 
         Returns:
-            Dict: _description_
+            Dict: The object data keyed by object id.
         """
         id_data_dictionary = {}
+        received_objects = received_objects or {}
+
+        if fetcher is not None:
+            missing_ids = [id for id in object_ids if id not in received_objects]
+            fetched_data = fetcher.fetch(missing_ids) if missing_ids else {}
+        else:
+            fetched_data = {}
 
         for id in object_ids:
-            data = operations.receive(id, transport)
-            json_data = serializer.write_json(data)
-            # print(json)
-            dictionary = json.loads(json_data[1])
-            id_data_dictionary[id] = dictionary
+            if id in fetched_data:
+                data = fetched_data[id]
+                if projection is not None and isinstance(data.get('parameters'), dict):
+                    data['parameters'] = projection.project(data['parameters'])
+                id_data_dictionary[id] = data
+                continue
+            data = received_objects.get(id)
+            if data is None:
+                data = operations.receive(id, transport, local_transport=self.object_cache)
+            id_data_dictionary[id] = self.get_object_data(data, projection)
 
         return id_data_dictionary
     
 
-    def create_speckle_data_dataframe(self, id_data_dictionary, version_object_id):
-        """_summary_
+    def create_type_parameter_join(self, model_index: ModelIndex, columns: List[str], projection: Optional[ParameterProjection] = None) -> TypeParameterJoin:
+        """
+        Create a lookup of the requested parameters of the type objects in the model.
+
+        Types are found by their element id or application id, and their data is read from
+        the received version, so nothing is fetched for them.
 
         Args:
-            id_data_dictionary (_type_): _description_
-            version_object_id (_type_): _description_
-            stream_url (_type_): _description_
+            model_index (ModelIndex): The index of the received version.
+            columns (List[str]): The names of the type parameters to join onto instances.
+            projection (Optional[ParameterProjection]): The parameters kept for the instances.
+                Extract them with `type_join.projection` instead, which also keeps their type id.
 
         Returns:
-            _type_: _description_
+            TypeParameterJoin: The type parameters keyed by type id.
+        """
+        type_join = TypeParameterJoin(columns, projection=projection)
+        for id in model_index.type_ids:
+            element = model_index.objects[id]
+            type_join.add_type([getattr(element, 'elementId', None), element.applicationId], self.get_object_data(element))
+        return type_join
+    
+
+    def create_serialized_type_parameter_join(self, root: dict, local_transport: AbstractTransport, columns: List[str],
+                                              projection: Optional[ParameterProjection] = None) -> TypeParameterJoin:
+        """Like `create_type_parameter_join`, reading the type objects one at a time from the local transport."""
+        type_join = TypeParameterJoin(columns, projection=projection)
+        for _, object_json in iter_version_objects(root, local_transport, include_instances=False):
+            type_join.add_type([object_json.get('elementId'), object_json.get('applicationId')],
+                               get_serialized_object_data(object_json, local_transport))
+        return type_join
+
+
+    def iter_object_data(self, root: dict, local_transport: AbstractTransport, projection: Optional[ParameterProjection] = None,
+                         type_join: Optional[TypeParameterJoin] = None) -> Iterator[dict]:
+        """
+        Walks the version and yields the data of each object, reading and releasing one object at a time.
+
+        Args:
+            root (dict): The parsed version object, see `receive_version_objects`.
+            local_transport (AbstractTransport): The transport holding the objects of the version.
+            projection (Optional[ParameterProjection]): The parameters to keep for each object.
+            type_join (Optional[TypeParameterJoin]): When given, type objects are skipped and each
+                instance gets the parameters of its type.
+
+        Yields:
+            dict: The data of each object, like `get_object_data`.
         """
-        data_list = []
+        for _, object_json in iter_version_objects(root, local_transport, include_types=type_join is None):
+            object_data = get_serialized_object_data(object_json, local_transport, projection)
+            if type_join is not None:
+                type_join.join_object(object_data)
+            yield object_data
 
-        for key, value in id_data_dictionary.items():
-            data = {"speckle_data" : {"Model URL": self.model_url, "Version Object ID": version_object_id, "Object ID": key, "data": value}}
-            data_list.append(data)
 
-        data_df = pd.DataFrame(data_list)
-        data_df = data_df.speckle_data.apply(pd.Series)
+    def group_object_data(self, object_data: Iterable[dict], version_object_id: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> SystemBlockAccumulator:
+        """
+        Groups the object data by Uniclass system, `chunk_size` objects at a time.
 
-        # data_df['Object ID'], data_df['speckle_type'] = zip(*data_df['data'].apply(self.extract_id_type))
+        Each chunk is reduced to per-system blocks before the next one is read, so only one
+        chunk of object data is held at a time.
 
-        data_df = data_df[['Model URL', 'Version Object ID', 'Object ID', 'data']]
+        Args:
+            object_data (Iterable[dict]): The data of each object, e.g. from `iter_object_data`.
+            version_object_id (str): The object id of the version the data comes from.
+            chunk_size (int): The number of objects grouped at a time.
+
+        Returns:
+            SystemBlockAccumulator: The grouped blocks, see `SystemBlockAccumulator.iter_blocks`.
+        """
+        accumulator = SystemBlockAccumulator()
+        for chunk in iter_chunks(object_data, chunk_size):
+            df = self.create_speckle_data_dataframe({data['id']: data for data in chunk}, version_object_id)
+            accumulator.add(df[['Model URL', 'Version Object ID', 'Object ID']], df['data'])
+        return accumulator
+    
+
+    def create_speckle_data_dataframe(self, id_data_dictionary, version_object_id):
+        """
+        Creates a DataFrame with one row per object, built column by column in one pass.
+
+        Args:
+            id_data_dictionary (Dict): The object data keyed by object id.
+            version_object_id (str): The object id of the version the data comes from.
+
+        Returns:
+            pd.DataFrame: The 'Model URL', 'Version Object ID', 'Object ID' and 'data' of each object.
+        """
+        data_df = pd.DataFrame({
+            "Model URL": self.model_url,
+            "Version Object ID": version_object_id,
+            "Object ID": list(id_data_dictionary.keys()),
+            "data": list(id_data_dictionary.values()),
+        })
 
         return data_df
     
 
     def groupby_system_classification(self, df) -> Dict:
-        """_summary_
+        """
+        Groups the objects into one DataFrame per Uniclass system (`Classification.Uniclass.Ss.Description`).
 
         Args:
-            df (_type_): _description_
+            df (pd.DataFrame): The DataFrame made by `create_speckle_data_dataframe`.
 
         Returns:
-            Dict: _description_
-        """
-        systems_data = {}
-
-        for _, row in df.iterrows():
-            stream_url = row['Model URL']
-            commit_object_id = row['Version Object ID']
-            object_id = row['Object ID']
-            # speckle_type = row['speckle_type']
-            data = row['data']
-
-            if 'parameters' in data.keys():
-                parameters = data['parameters']
-                classification_desc = None
-                other_params = {
-                    'Model URL': stream_url,
-                    'Version Object ID': commit_object_id,
-                    'Object ID': object_id,
-                    # 'speckle_type': speckle_type
-                }
-
-                for param_name, param_info in parameters.items():
-                    if isinstance(param_info, dict):
-                        if param_info['name'] == 'Classification.Uniclass.Ss.Description':
-                            classification_desc = param_info['value']
-                        else:
-                            param_label = param_info['name']
-                            if param_info['units'] != None:
-                                param_label += f" ({param_info['units']})"
-                            other_params[param_label] = param_info['value']
-
-                if classification_desc:
-                    if classification_desc not in systems_data:
-                        systems_data[classification_desc] = []
-
-                    other_params['Classification.Uniclass.Ss.Description'] = classification_desc
-                    systems_data[classification_desc].append(other_params)
-
-        # Convert the grouped data dictionary to separate DataFrames
-        systems_dfs = {}
-        for classification_desc, desc_data in systems_data.items():
-            systems_dfs[classification_desc] = pd.DataFrame(desc_data)
-
-        return systems_dfs
+            Dict: The DataFrame of each system, keyed by its description.
+        """
+        return group_by_system_classification(df[['Model URL', 'Version Object ID', 'Object ID']], df['data'])
     
 
     def truncate_sheet_name(self, sheet_name):
         return sheet_name[:31]
     
 
+    def get_sheet_names(self, system_names, reserved_names=()) -> Dict[str, str]:
+        """
+        Get a valid, unique sheet name for each system.
+
+        Unlike `truncate_sheet_name` on its own, two systems whose first 31 characters are the
+        same get different sheets instead of being written to the same one.
+
+        Args:
+            system_names (Iterable[str]): The system descriptions, in sheet order.
+            reserved_names (Iterable[str]): Sheet names taken by other sheets, e.g. the summary.
+
+        Returns:
+            Dict[str, str]: The sheet name of each system.
+        """
+        return unique_sheet_names(system_names, reserved_names)
+    
+
     def export_to_excel(self, dataframes_dict, excel_filename):
         # # Ensure the folder exists
         # if not os.path.exists(folder_path):
@@ -255,10 +498,7 @@ class AccessSystemSpecificDataSpecklePy:
         # # Combine the folder path and filename
         # full_path = os.path.join(folder_path, excel_filename)
 
-        with pd.ExcelWriter(excel_filename, engine='xlsxwriter') as writer:
-            for sheet_name, df in dataframes_dict.items():
-                truncated_sheet_name = self.truncate_sheet_name(sheet_name)
-                df.to_excel(writer, sheet_name=truncated_sheet_name, index=False)
+        write_dataframes_to_excel(dataframes_dict, excel_filename, sheet_names=self.get_sheet_names(dataframes_dict))
 
     def export_to_excel_with_folder_path(self, dataframes_dict, excel_filename, folder_path):
         # Ensure the folder exists
@@ -268,35 +508,411 @@ class AccessSystemSpecificDataSpecklePy:
         # Combine the folder path and filename
         full_path = os.path.join(folder_path, excel_filename)
 
-        with pd.ExcelWriter(full_path, engine='xlsxwriter') as writer:
-            for sheet_name, df in dataframes_dict.items():
-                truncated_sheet_name = self.truncate_sheet_name(sheet_name)
-                df.to_excel(writer, sheet_name=truncated_sheet_name, index=False)
+        write_dataframes_to_excel(dataframes_dict, full_path, sheet_names=self.get_sheet_names(dataframes_dict))
+
+    def export_grouped_data_to_excel(self, df, excel_filename, folder_path=None) -> Dict[str, str]:
+        """
+        Groups the objects by Uniclass system and streams each system's rows straight into the workbook.
+
+        No per-system DataFrame is built and the workbook is written with constant memory, so
+        only one system's rows are held at a time instead of the whole workbook.
+
+        Args:
+            df (pd.DataFrame): The DataFrame made by `create_speckle_data_dataframe`.
+            excel_filename (str): The name of the Excel file.
+            folder_path (Optional[str]): The folder to write the file to, created if needed.
+
+        Returns:
+            Dict[str, str]: The sheet name of each system.
+        """
+        full_path = excel_filename
+        if folder_path is not None:
+            os.makedirs(folder_path, exist_ok=True)
+            full_path = os.path.join(folder_path, excel_filename)
+
+        return write_blocks_to_excel(iter_system_blocks(df[['Model URL', 'Version Object ID', 'Object ID']], df['data']), full_path)
 
     
-    def process_speckle_data(self, folder_path):
-    # def process_speckle_data(self):
-        client = self.get_speckle_client()
-        version_object_id = self.get_version_object_id(client)
-        transport, serializer = self.create_transport_and_serializer(client)
+    def export_grouped_data_to_dataset(self, df, path, file_format='parquet') -> Dict[str, str]:
+        """
+        Groups the objects by Uniclass system and writes each system's rows straight into a columnar dataset.
 
-        base_object = self.get_base_object(version_object_id, transport) 
-        
-        object_ids = self.get_list_of_object_ids(base_object)
+        Like `export_grouped_data_to_excel`, no per-system DataFrame is built. The dataset is a
+        folder with one partition per system, see `columnar_export.write_tables_to_dataset`.
 
-        data_dictionary = self.create_obj_id_data_dictionary(object_ids, transport, serializer)
-        
-        
-        data_df = self.create_speckle_data_dataframe(id_data_dictionary=data_dictionary, version_object_id=version_object_id)
+        Args:
+            df (pd.DataFrame): The DataFrame made by `create_speckle_data_dataframe`.
+            path (str): The dataset folder, e.g. 'Systems_data.parquet'.
+            file_format (str): 'parquet', or 'arrow' for Arrow IPC files.
 
-        systems_df = self.groupby_system_classification(data_df)
+        Returns:
+            Dict[str, str]: The file written for each system.
+        """
+        return write_blocks_to_dataset(iter_system_blocks(df[['Model URL', 'Version Object ID', 'Object ID']], df['data']), path, file_format)
 
-        self.export_to_excel_with_folder_path(dataframes_dict=systems_df, excel_filename='Systems_data.xlsx', folder_path=folder_path)
+    
+    def check_summary_file(self, export_plan: ExportPlan) -> ExportPlan:
+        """The export plan, without the summary Parquet file when pyarrow is not installed. The Summary sheet is still written."""
+        if export_plan.summary and export_plan.summary_file and not has_pyarrow():
+            warnings.warn("pyarrow is not installed, so the Uniclass summary is only written as the Summary sheet of the workbook.")
+            return dataclasses.replace(export_plan, summary_file=False)
+        return export_plan
 
-        return systems_df
 
+    def export_systems(self, systems_df, export_plan: ExportPlan, automate_context: Optional[AutomationContext] = None) -> List[str]:
+        """
+        Exports the system DataFrames as described by the export plan.
+
+        Each format is encoded once and then copied to the other destinations or attached to
+        the automation run, instead of being written again for every destination. With
+        `export_plan.summary`, the Uniclass roll-up is built once from the DataFrames.
+
+        Args:
+            systems_df (Dict): The DataFrame of each Uniclass system.
+            export_plan (ExportPlan): The destinations and formats to export to: 'xlsx', or
+                'parquet' and 'arrow' for a dataset partitioned by system (needs pyarrow).
+            automate_context (Optional[AutomationContext]): The context to attach files to.
 
+        Returns:
+            List[str]: The paths of all written files.
+        """
+        export_plan = self.check_summary_file(export_plan)
+        summary = UniclassIndex.from_dataframes(systems_df).summarize() if export_plan.summary else None
+        reserved_names = [SUMMARY_SHEET_NAME] if summary is not None else []
+        writers = {
+            'xlsx': lambda path: write_dataframes_to_excel(systems_df, path, sheet_names=self.get_sheet_names(systems_df, reserved_names), summary=summary),
+            'parquet': lambda path: write_dataframes_to_dataset(systems_df, path, file_format='parquet'),
+            'arrow': lambda path: write_dataframes_to_dataset(systems_df, path, file_format='arrow'),
+            SUMMARY_FORMAT: lambda path: write_dataframe(summary, path, file_format='parquet'),
+        }
+        return export_plan.execute(writers, automate_context=automate_context)
+
+    
+    def export_system_blocks(self, blocks: Iterable[Tuple[str, List[str], np.ndarray]], export_plan: ExportPlan, automate_context: Optional[AutomationContext] = None) -> List[str]:
+        """
+        Exports the object block of each system as described by the export plan, without building DataFrames.
+
+        With one format the blocks are written as they come, so each can be released once it is
+        written. With more formats, or with `export_plan.summary` since the summary sheet comes
+        first, they are kept until every format is written.
+
+        Args:
+            blocks (Iterable[Tuple[str, List[str], np.ndarray]]): The description, columns and rows of each system.
+            export_plan (ExportPlan): The destinations and formats to export to, see `export_systems`.
+            automate_context (Optional[AutomationContext]): The context to attach files to.
+
+        Returns:
+            List[str]: The paths of all written files.
+        """
+        export_plan = self.check_summary_file(export_plan)
+        if len(export_plan.output_formats) > 1 or export_plan.summary:
+            blocks = list(blocks)
+        summary = UniclassIndex.from_blocks(blocks).summarize() if export_plan.summary else None
+        writers = {
+            'xlsx': lambda path: write_blocks_to_excel(blocks, path, summary=summary),
+            'parquet': lambda path: write_blocks_to_dataset(blocks, path, file_format='parquet'),
+            'arrow': lambda path: write_blocks_to_dataset(blocks, path, file_format='arrow'),
+            SUMMARY_FORMAT: lambda path: write_dataframe(summary, path, file_format='parquet'),
+        }
+        return export_plan.execute(writers, automate_context=automate_context)
 
+    
+    def get_application_ids(self, objects_by_id: Dict[str, Base]) -> Dict[str, Optional[str]]:
+        """Get the applicationId of each object, used to recognise edited elements between versions."""
+        return {id: getattr(element, 'applicationId', None) for id, element in objects_by_id.items()}
 
+    
+    def get_type_object_ids(self, objects_by_id: Dict[str, Base], object_ids: List[str], type_join: TypeParameterJoin) -> Dict[str, Optional[str]]:
+        """Get the object id of the type of each instance, used to recognise instances whose type was edited between versions."""
+        type_object_ids = {}
+        for id in object_ids:
+            type_param = getattr(getattr(objects_by_id.get(id), 'parameters', None), type_join.type_id_parameter, None)
+            type_id = getattr(type_param, 'value', None)
+            type_object_ids[id] = type_join.type_object_ids.get(str(type_id)) if type_id is not None else None
+        return type_object_ids
 
     
+    def group_speckle_data(self, type_parameters: Optional[List[str]] = None, projection: Optional[ParameterProjection] = None,
+                           chunk_size: int = DEFAULT_CHUNK_SIZE, extraction_workers: int = 0) -> SystemBlockAccumulator:
+        """
+        Runs the lazy pipeline for the latest version of the model, up to the grouping.
+
+        The objects are received into the local transport without being deserialized. They are
+        then read, extracted and grouped one chunk at a time, so neither the Base tree, a
+        dictionary of all object data nor a DataFrame of all objects is built.
+
+        Args:
+            type_parameters (Optional[List[str]]): Names of type parameters to join onto instance rows.
+            projection (Optional[ParameterProjection]): The parameters to keep, globally or per Ss code.
+            chunk_size (int): The number of objects grouped at a time.
+            extraction_workers (int): The number of worker processes that extract and group the
+                objects, in shards of the version, see `sharding.group_in_processes`. 0 extracts
+                and groups them in this process. The result is the same either way.
+
+        Returns:
+            SystemBlockAccumulator: The grouped blocks of each Uniclass system.
+        """
+        profiler = self.profiler
+
+        with profiler.stage('authenticate'):
+            client = self.get_speckle_client()
+        with profiler.stage('version lookup'):
+            version_object_id = self.get_version_object_id(client)
+            transport, _ = self.create_transport_and_serializer(client)
+
+        with profiler.stage('receive') as stage:
+            local_transport = self.create_local_transport()
+            if profiler.enabled:
+                local_transport = ByteCountingTransport(local_transport)
+            root = self.receive_version_objects(version_object_id, transport, local_transport)
+            if profiler.enabled:
+                stage.count('objects_received', local_transport.objects_received)
+                stage.count('bytes_received', local_transport.bytes_received)
+
+        type_join = None
+        if type_parameters is not None:
+            with profiler.stage('join type parameters') as stage:
+                type_join = self.create_serialized_type_parameter_join(root, local_transport, type_parameters, projection)
+                stage.count('types', len(type_join))
+            # The instances keep their type id until they are joined.
+            projection = type_join.projection
+
+        with profiler.stage('extract and group') as stage:
+            if extraction_workers > 0:
+                roots = get_version_roots(root, local_transport, include_types=type_join is None)
+                accumulator = group_in_processes(roots, local_transport, self.model_url, version_object_id, workers=extraction_workers,
+                                                 projection=projection, type_join=type_join, chunk_size=chunk_size)
+                stage.count('workers', extraction_workers)
+            else:
+                object_data = self.iter_object_data(root, local_transport, projection=projection, type_join=type_join)
+                accumulator = self.group_object_data(object_data, version_object_id, chunk_size=chunk_size)
+            stage.count('objects', accumulator.rows)
+            stage.count('systems', len(accumulator))
+
+        return accumulator
+
+
+    def export_speckle_data(self, export_plan: ExportPlan, automate_context: Optional[AutomationContext] = None, type_parameters: Optional[List[str]] = None,
+                            projection: Optional[ParameterProjection] = None, chunk_size: int = DEFAULT_CHUNK_SIZE, extraction_workers: int = 0) -> List[str]:
+        """
+        Runs the lazy pipeline for the latest version of the model and exports the systems.
+
+        Unlike `process_speckle_data`, no DataFrame is built per system: the grouped blocks go
+        straight into the writers, see `group_speckle_data` and `export_system_blocks`.
+
+        Returns:
+            List[str]: The paths of all written files.
+        """
+        accumulator = self.group_speckle_data(type_parameters=type_parameters, projection=projection, chunk_size=chunk_size,
+                                              extraction_workers=extraction_workers)
+        with self.profiler.stage('export') as stage:
+            written_paths = self.export_system_blocks(accumulator.iter_blocks(), export_plan, automate_context=automate_context)
+            stage.count('files', len(written_paths))
+        return written_paths
+
+
+    def group_version_history(self, version_count: int, type_parameters: Optional[List[str]] = None, projection: Optional[ParameterProjection] = None,
+                              chunk_size: int = DEFAULT_CHUNK_SIZE) -> VersionHistory:
+        """
+        Runs the lazy pipeline for the latest versions of the model, up to the grouping.
+
+        All versions are received into the same local transport, so an object shared by several
+        versions is downloaded once. Each distinct object is then extracted and grouped once,
+        and each version keeps the rows of its own objects, see `VersionHistory`.
+
+        Args:
+            version_count (int): The number of latest versions to process.
+            type_parameters (Optional[List[str]]): Names of type parameters to join onto instance
+                rows, from the types of the same version.
+            projection (Optional[ParameterProjection]): The parameters to keep, globally or per Ss code.
+            chunk_size (int): The number of objects grouped at a time.
+
+        Returns:
+            VersionHistory: The grouped rows of each Uniclass system in each version, newest version first.
+        """
+        profiler = self.profiler
+
+        with profiler.stage('authenticate'):
+            client = self.get_speckle_client()
+        with profiler.stage('version lookup') as stage:
+            versions = self.get_model_versions(client, limit=version_count)
+            transport, _ = self.create_transport_and_serializer(client)
+            stage.count('versions', len(versions))
+
+        local_transport = self.create_local_transport()
+        if profiler.enabled:
+            local_transport = ByteCountingTransport(local_transport)
+        history = VersionHistory(local_transport, self.model_url, projection=projection, chunk_size=chunk_size)
+
+        for version in versions:
+            with profiler.stage('receive') as stage:
+                root = self.receive_version_objects(version.referenced_object, transport, local_transport)
+                stage.count('version', version.id)
+                if profiler.enabled:
+                    stage.count('objects_received', local_transport.objects_received)
+                    stage.count('bytes_received', local_transport.bytes_received)
+
+            type_join = None
+            if type_parameters is not None:
+                with profiler.stage('join type parameters') as stage:
+                    type_join = self.create_serialized_type_parameter_join(root, local_transport, type_parameters, projection)
+                    stage.count('types', len(type_join))
+
+            with profiler.stage('extract and group') as stage:
+                extracted = history.object_count
+                stage.count('version', version.id)
+                stage.count('objects', history.add_version(version, root, type_join=type_join))
+                stage.count('objects_extracted', history.object_count - extracted)
+
+        return history
+
+
+    def export_version_history(self, export_plan: ExportPlan, version_count: int, automate_context: Optional[AutomationContext] = None,
+                               type_parameters: Optional[List[str]] = None, projection: Optional[ParameterProjection] = None,
+                               chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[str]:
+        """
+        Runs the lazy pipeline for the latest versions of the model and exports one long table per system.
+
+        The rows of all versions go into the same sheet or file of their system, told apart by
+        their 'Version ID', see `group_version_history`. The Uniclass summary rolls up a
+        single version, so it is not written with the history.
+
+        Returns:
+            List[str]: The paths of all written files.
+        """
+        history = self.group_version_history(version_count, type_parameters=type_parameters, projection=projection, chunk_size=chunk_size)
+        export_plan = dataclasses.replace(export_plan, summary=False)
+        with self.profiler.stage('export') as stage:
+            written_paths = self.export_system_blocks(history.iter_blocks(), export_plan, automate_context=automate_context)
+            stage.count('files', len(written_paths))
+        return written_paths
+
+
+    def process_speckle_data(self, folder_path=None, single_pass=True, fetch_workers=4, export_plan: Optional[ExportPlan] = None, automate_context: Optional[AutomationContext] = None, incremental_state_path: Optional[str] = None, type_parameters: Optional[List[str]] = None, projection: Optional[ParameterProjection] = None,
+                             streaming: bool = True, chunk_size: int = DEFAULT_CHUNK_SIZE, extraction_workers: int = 0):
+    # def process_speckle_data(self):
+        """
+        Runs the full extraction for the latest version of the model.
+
+        Each stage is timed by `self.profiler` when it is enabled.
+
+        Args:
+            folder_path: The folder the Excel output is written to. Shorthand for an export plan
+                with this folder as its only destination.
+            single_pass (bool): Read element data from the received version tree instead of
+                receiving every object again. Ids that are not found in the tree still fall back
+                to a per-object fetch.
+            fetch_workers (int): The number of concurrent batched requests used for the objects that
+                have to be fetched. 0 receives them one at a time through the transport instead.
+                Only used with `streaming=False` or `incremental_state_path`: the lazy pipeline
+                receives the whole version into the local transport and fetches nothing per object.
+            export_plan (Optional[ExportPlan]): Where and in which formats to export. Nothing is
+                exported when neither this nor `folder_path` is given.
+            automate_context (Optional[AutomationContext]): The context files are attached to when
+                the export plan asks for it.
+            incremental_state_path (Optional[str]): A folder where the object ids and system results
+                of the processed version are kept. When given, only objects added since the last
+                processed version are extracted and grouped, and only the systems that gained or
+                lost objects are rebuilt. Results kept with another projection or other type
+                parameters are rebuilt from scratch.
+            type_parameters (Optional[List[str]]): Names of type parameters to join onto instance
+                rows. When given, type objects get no rows of their own and each instance gets
+                these parameters of its type, found through its type id.
+            projection (Optional[ParameterProjection]): The parameters to keep, globally or per Ss
+                code. Other parameters are skipped while the object data is extracted.
+            streaming (bool): Run the lazy pipeline of `group_speckle_data` and build the DataFrames
+                from its blocks. Not used with `incremental_state_path` or without `single_pass`,
+                which need the whole received version.
+            chunk_size (int): The number of objects grouped at a time by the lazy pipeline.
+            extraction_workers (int): The number of worker processes of the lazy pipeline, see
+                `group_speckle_data`. 0 runs it in this process.
+
+        Returns:
+            Dict: The DataFrames of each Uniclass system.
+        """
+        if export_plan is None and folder_path is not None:
+            export_plan = ExportPlan(destinations=[folder_path])
+        profiler = self.profiler
+
+        if streaming and single_pass and incremental_state_path is None:
+            accumulator = self.group_speckle_data(type_parameters=type_parameters, projection=projection, chunk_size=chunk_size,
+                                                  extraction_workers=extraction_workers)
+            systems_df = accumulator.to_dataframes()
+            if export_plan is not None:
+                with profiler.stage('export') as stage:
+                    written_paths = self.export_systems(systems_df, export_plan, automate_context=automate_context)
+                    stage.count('files', len(written_paths))
+            return systems_df
+
+        # The settings that shape the systems, so results saved with other settings are not reused.
+        incremental_settings = {'type_parameters': type_parameters, 'projection': projection.to_dict() if projection is not None else None}
+
+        with profiler.stage('authenticate'):
+            client = self.get_speckle_client()
+        with profiler.stage('version lookup'):
+            version_object_id = self.get_version_object_id(client)
+            transport, serializer = self.create_transport_and_serializer(client)
+
+        with profiler.stage('receive') as stage:
+            local_transport = None
+            if profiler.enabled:
+                local_transport = ByteCountingTransport(self.create_local_transport())
+            base_object = self.get_base_object(version_object_id, transport, local_transport=local_transport)
+            if local_transport is not None:
+                stage.count('objects_received', local_transport.objects_received)
+                stage.count('bytes_received', local_transport.bytes_received)
+
+        with profiler.stage('index model') as stage:
+            model_index = self.index_model(base_object)
+            object_ids = model_index.instance_ids if type_parameters is not None else model_index.object_ids
+            received_objects = model_index.objects if single_pass else None
+            stage.count('objects', len(model_index))
+
+        type_join = None
+        if type_parameters is not None:
+            type_join = self.create_type_parameter_join(model_index, type_parameters, projection)
+            # The instances keep their type id until they are joined.
+            projection = type_join.projection
+
+        incremental_state = None
+        if incremental_state_path is not None:
+            with profiler.stage('incremental diff') as stage:
+                incremental_state = IncrementalState.load(incremental_state_path, self.model_url, settings=incremental_settings)
+                application_ids = self.get_application_ids(model_index.objects)
+                type_object_ids = self.get_type_object_ids(model_index.objects, object_ids, type_join) if type_join is not None else None
+                changes = incremental_state.diff(object_ids, application_ids, type_object_ids)
+                object_ids = changes.added
+                stage.count('objects_added', len(changes.added))
+                stage.count('objects_removed', len(changes.removed))
+                stage.count('objects_changed', len(changes.changed))
+
+        with profiler.stage('extract') as stage:
+            fetcher = self.create_object_fetcher(max_workers=fetch_workers) if fetch_workers else None
+            data_dictionary = self.create_obj_id_data_dictionary(object_ids, transport, serializer, received_objects=received_objects, fetcher=fetcher, projection=projection)
+            stage.count('objects', len(data_dictionary))
+            if fetcher is not None:
+                stage.count('bytes_fetched', fetcher.bytes_received)
+
+        if type_join is not None:
+            with profiler.stage('join type parameters') as stage:
+                stage.count('types', len(type_join))
+                stage.count('instances_joined', type_join.join(data_dictionary))
+
+        with profiler.stage('build dataframe') as stage:
+            data_df = self.create_speckle_data_dataframe(id_data_dictionary=data_dictionary, version_object_id=version_object_id)
+            stage.count('rows', len(data_df))
+
+        with profiler.stage('group by system') as stage:
+            systems_df = self.groupby_system_classification(data_df)
+
+            if incremental_state is not None:
+                systems_df = incremental_state.apply(changes, systems_df, version_object_id, application_ids, type_object_ids)
+                incremental_state.save()
+            stage.count('systems', len(systems_df))
+
+        if export_plan is not None:
+            with profiler.stage('export') as stage:
+                written_paths = self.export_systems(systems_df, export_plan, automate_context=automate_context)
+                stage.count('files', len(written_paths))
+
+        return systems_df
@@ -1,4 +1,3 @@
-import requests
 import warnings
 import logging
 import json
@@ -7,9 +6,9 @@ import os
 import pandas as pd
 import numpy as np
 
-from os.path import abspath
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from tqdm import tqdm
+from typing import Iterator, List, Optional
 # from dotenv import load_dotenv
 # from specklepy.api.client import SpeckleClient
 # from specklepy.api.credentials import get_account_from_token
@@ -17,14 +16,22 @@ from speckle_automate import (
     AutomationContext
 )
 
+from graphql_client import QUERIES, GraphQLClient
+from grouping import SystemBlockAccumulator, group_by_system_classification
+
+# Objects per page of version children; each page is grouped before the next one is kept.
+DEFAULT_PAGE_SIZE = 1000
+
 
 class AccessSystemSpecificData:
     
-    def __init__(self, stream_url, stream_id, server, token) -> None:
+    def __init__(self, stream_url, stream_id, server, token, graphql_client: Optional[GraphQLClient] = None, cache_size: int = 0) -> None:
         self.stream_url = stream_url
         self.stream_id = stream_id
         self.server = server
         self.token = token
+        # One pooled keep-alive session for all queries, optionally caching responses.
+        self.graphql_client = graphql_client or GraphQLClient(server, token, cache_size=cache_size)
 
         print(f"Access script stream url: {stream_url}")
         print(f"Access script stream id: {stream_id}")
@@ -32,39 +39,17 @@ class AccessSystemSpecificData:
         print(f"Access script token: {token}")
 
     def read_query(self, query_file):
-        current_dir = Path(query_file).parent.absolute()
-        query_path = abspath(current_dir.as_posix() + '/graphql/' + query_file)
-        return open(query_path, 'r').read()
+        """Get the text of a query in the graphql folder, loaded once at import."""
+        return QUERIES[query_file].text
     
     def get_graphql_query_response(self, query, variables=None, query_name=None):
-        response = requests.post(self.server, json={
-            "query": query,
-            "operationName": query_name,
-            "variables": variables or {}
-        }, headers={
-            "Authorization": f"Bearer {self.token}",
-            "content-type": "application/json",
-            "accept": "application/json"
-        })
-
-        return response
+        return self.graphql_client.post(query, variables, query_name)
     
     def get_graphql_query_response_as_json(self, response):
-        json_response = response.json()
-        if "errors" in json_response:
-            print(f"GraphQL response returned errors: {json_response['errors']}")
-        if "data" not in json_response:
-            if "errors" in json_response:
-                print(f"GraphQL response returned errors: {json_response['errors']}")
-            raise Exception("GraphQL response has no data!")
-        return response.json()["data"]
+        return self.graphql_client.get_data(response.json())
     
     def get_query_response(self, query_file, variables=None, query_name= None):
-        stream_query = self.read_query(query_file)
-        response = self.get_graphql_query_response(stream_query, variables, query_name)
-        json_response = self.get_graphql_query_response_as_json(response)
-
-        return json_response
+        return self.graphql_client.execute(QUERIES[query_file], variables, query_name)
     
     def get_list_of_commit_object_ids(self, stream_response): 
         commit_object_ids = []
@@ -78,6 +63,49 @@ class AccessSystemSpecificData:
     def get_commit_data_dictionary(self, commit_response):
         commit_data = commit_response['stream']['object']['children']['objects']
         return commit_data
+
+    def get_commit_children_page(self, object_id, page_size, cursor=None):
+        """Get one page of the children of a version object and the cursor of the next page."""
+        variables = {"streamId": f"{self.stream_id}", "objectId": object_id, "limit": page_size, "cursor": cursor}
+        # Not cached: a cache would keep every page in memory.
+        response = self.get_graphql_query_response(QUERIES['GetCommitChildrenQuery.graphql'], variables)
+        children = self.get_graphql_query_response_as_json(response)['stream']['object']['children']
+        return children['objects'], children['cursor']
+
+    def iter_commit_children_pages(self, object_id, page_size=DEFAULT_PAGE_SIZE, prefetch=True) -> Iterator[List[dict]]:
+        """
+        Pages through the children of a version object with cursors.
+
+        With `prefetch`, the next page is requested as soon as the cursor of the current page
+        is known, so it downloads while the current page is processed. At most two pages are
+        held at a time.
+
+        Args:
+            object_id (str): The referenced object of the version.
+            page_size (int): The number of objects per page.
+            prefetch (bool): Request the next page in the background.
+
+        Yields:
+            List[dict]: The objects of each page, like `get_commit_data_dictionary`.
+        """
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1.")
+        if not prefetch:
+            cursor = None
+            while True:
+                objects, cursor = self.get_commit_children_page(object_id, page_size, cursor)
+                if objects:
+                    yield objects
+                if not objects or cursor is None:
+                    return
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            next_page = executor.submit(self.get_commit_children_page, object_id, page_size)
+            while next_page is not None:
+                objects, cursor = next_page.result()
+                next_page = executor.submit(self.get_commit_children_page, object_id, page_size, cursor) if objects and cursor is not None else None
+                if objects:
+                    yield objects
     
     def extract_id_type(self, row):
         object_id_value = row['data']['id']
@@ -85,65 +113,25 @@ class AccessSystemSpecificData:
         return object_id_value, speckle_type_value
     
     def create_speckle_data_dataframe(self, commit_data_dictionary, commit_object_ids):
-        data_list = []
-
+        object_ids, speckle_types = [], []
         for dictionary in commit_data_dictionary:
-            data = {"speckle_data" : {"Model URL": self.stream_url, "Version Object ID": commit_object_ids[0], "data": dictionary}}
-            data_list.append(data)
-
-        data_df = pd.DataFrame(data_list)
-        data_df = data_df.speckle_data.apply(pd.Series)
-
-        data_df['Object ID'], data_df['speckle_type'] = zip(*data_df['data'].apply(self.extract_id_type))
-
-        data_df = data_df[['Model URL', 'Version Object ID', 'Object ID', 'speckle_type', 'data']]
+            object_id_value, speckle_type_value = self.extract_id_type(dictionary)
+            object_ids.append(object_id_value)
+            speckle_types.append(speckle_type_value)
+
+        data_df = pd.DataFrame({
+            'Model URL': self.stream_url,
+            'Version Object ID': commit_object_ids[0],
+            'Object ID': object_ids,
+            'speckle_type': speckle_types,
+            'data': list(commit_data_dictionary),
+        })
 
         return data_df
     
     def groupby_system_classification(self, df):
-        systems_data = {}
-
-        for _, row in df.iterrows():
-            stream_url = row['Model URL']
-            commit_object_id = row['Version Object ID']
-            object_id = row['Object ID']
-            speckle_type = row['speckle_type']
-            data = row['data']['data'] 
-
-            if 'parameters' in data.keys():
-                parameters = data['parameters']
-                classification_desc = None
-                other_params = {
-                    'Model URL': stream_url,
-                    'Version Object ID': commit_object_id,
-                    'Object ID': object_id,
-                    'speckle_type': speckle_type
-                }
-
-                for param_name, param_info in parameters.items():
-                    if isinstance(param_info, dict):
-                        if param_info['name'] == 'Classification.Uniclass.Ss.Description':
-                            classification_desc = param_info['value']
-                            print(f"Classification desc: {classification_desc}")
-                        else:
-                            param_label = param_info['name']
-                            if param_info['units'] != None:
-                                param_label += f" ({param_info['units']})"
-                            other_params[param_label] = param_info['value']
-
-                if classification_desc:
-                    if classification_desc not in systems_data:
-                        systems_data[classification_desc] = []
-
-                    other_params['Classification.Uniclass.Ss.Description'] = classification_desc
-                    systems_data[classification_desc].append(other_params)
-
-        # Convert the grouped data dictionary to separate DataFrames
-        systems_dfs = {}
-        for classification_desc, desc_data in systems_data.items():
-            systems_dfs[classification_desc] = pd.DataFrame(desc_data)
-
-        return systems_dfs
+        id_frame = df[['Model URL', 'Version Object ID', 'Object ID', 'speckle_type']]
+        return group_by_system_classification(id_frame, (row_data['data'] for row_data in df['data']))
     
     def truncate_sheet_name(self, sheet_name):
         return sheet_name[:31]
@@ -154,7 +142,24 @@ class AccessSystemSpecificData:
                 truncated_sheet_name = self.truncate_sheet_name(sheet_name)
                 df.to_excel(writer, sheet_name=truncated_sheet_name, index=False)
 
-    def process_speckle_data(self):
+    def group_commit_children(self, commit_object_ids, page_size=DEFAULT_PAGE_SIZE, prefetch=True):
+        """
+        Streams the children of the first version page by page into the grouping.
+
+        Only the grouped blocks are kept, so the raw object data in memory is bounded by two
+        pages whatever the size of the model.
+
+        Returns:
+            Dict[str, pd.DataFrame]: The DataFrame of each system, like `groupby_system_classification`.
+        """
+        accumulator = SystemBlockAccumulator()
+        for page in tqdm(self.iter_commit_children_pages(commit_object_ids[0], page_size, prefetch), desc="Children pages"):
+            data_df = self.create_speckle_data_dataframe(commit_data_dictionary=page, commit_object_ids=commit_object_ids)
+            id_frame = data_df[['Model URL', 'Version Object ID', 'Object ID', 'speckle_type']]
+            accumulator.add(id_frame, (row_data['data'] for row_data in page))
+        return accumulator.to_dataframes()
+
+    def process_speckle_data(self, page_size=DEFAULT_PAGE_SIZE, prefetch=True):
         stream_query_variables = {"streamId": f"{self.stream_id}"}
         stream_json_response = self.get_query_response(query_file='GetStreamQuery.graphql', variables=stream_query_variables, query_name='Stream')
         print(f"Stream response: {stream_json_response}")
@@ -162,17 +167,7 @@ class AccessSystemSpecificData:
         commit_object_ids = self.get_list_of_commit_object_ids(stream_json_response)
         print(f"Commit object ids: {commit_object_ids}")
 
-        commit_query_variables = {"streamId": f"{self.stream_id}",
-                            "objectId": commit_object_ids[0]}
-        commit_response_json = self.get_query_response(query_file='GetCommitQuery.graphql', variables=commit_query_variables, query_name='Commit')
-        # print(f"Commit response: {commit_response_json}")
-        
-        commit_data_dictionary = self.get_commit_data_dictionary(commit_response_json)
-        # print(f"Commit data dictionary: {commit_data_dictionary}")
-        
-        data_df = self.create_speckle_data_dataframe(commit_data_dictionary=commit_data_dictionary, commit_object_ids=commit_object_ids)
-        print(f"Data df: {data_df}")
-        systems_df = self.groupby_system_classification(data_df)
+        systems_df = self.group_commit_children(commit_object_ids, page_size=page_size, prefetch=prefetch)
         print(f"Systems dataframe in access script: {systems_df}")
 
         return systems_df
@@ -0,0 +1,248 @@
+"""Helper module for processing many Speckle models in one run, sharing clients and connections.
+
+Run with `python batch.py --folder out [--workers 4] [--combined] URL [URL ...]` or with
+`--models-file models.txt`, one project or model URL per line. The token is read from
+`--token` or the SPECKLE_TOKEN environment variable.
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+import pandas as pd
+import requests
+from dotenv import load_dotenv
+from specklepy.api.client import SpeckleClient
+from specklepy.transports.memory import MemoryTransport
+
+from export_plan import ExportPlan
+from SpecklePy_accessing_system_specific_data import AccessSystemSpecificDataSpecklePy
+
+MODEL_URL_PATTERN = re.compile(r"/projects/(?P<project_id>[^/]+)(?:/models/(?P<model_id>[^/@,]+)(?:@(?P<version_id>[^/,]+))?)?/?$")
+
+
+@dataclass
+class ModelReference:
+    """A project, optionally narrowed to one model and version, parsed from a Speckle URL."""
+
+    url: str
+    server: str
+    project_id: str
+    model_id: Optional[str] = None
+    version_id: Optional[str] = None
+
+    @classmethod
+    def from_url(cls, url: str) -> "ModelReference":
+        """
+        Parses a `{server}/projects/{project_id}[/models/{model_id}[@{version_id}]]` URL.
+
+        Raises:
+            ValueError: When the URL is not a project or model URL.
+        """
+        parsed = urlparse(url.strip())
+        match = MODEL_URL_PATTERN.search(parsed.path)
+        if not parsed.scheme or not parsed.netloc or match is None:
+            raise ValueError(f"Not a Speckle project or model URL: {url}")
+        return cls(url=url.strip(), server=f"{parsed.scheme}://{parsed.netloc}", **match.groupdict())
+
+    @property
+    def file_stem(self) -> str:
+        """A file name for the model's export, unique within a server."""
+        return "_".join(part for part in [self.project_id, self.model_id, "Systems_data"] if part)
+
+
+@dataclass
+class BatchResult:
+    """The outcome of one model of a batch."""
+
+    url: str
+    version_object_id: Optional[str] = None
+    systems: int = 0
+    objects: int = 0
+    written_paths: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+    seconds: float = 0.0
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
+
+
+class BatchRunner:
+    """
+    Processes many models with one authenticated client and one HTTP session per server.
+
+    The latest versions are looked up first, one model at a time, because the GraphQL
+    client is not safe to use from several threads. The models are then received,
+    extracted and grouped by `max_workers` threads sharing the session's connection pool.
+    Each model is received into a `MemoryTransport` of its own, since the SQLite transports
+    of several threads would contend for the lock of the same local database.
+    A model that fails is reported in its `BatchResult` and does not stop the others.
+    """
+
+    def __init__(self, token: str, max_workers: int = 4, process_kwargs: Optional[Dict[str, Any]] = None) -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1.")
+        self.token = token
+        self.max_workers = max_workers
+        # Extra arguments for process_speckle_data, e.g. type_parameters or projection.
+        self.process_kwargs = process_kwargs or {}
+        self.clients: Dict[str, SpeckleClient] = {}
+        self.sessions: Dict[str, requests.Session] = {}
+
+    def get_client(self, server: str) -> SpeckleClient:
+        if server not in self.clients:
+            client = SpeckleClient(host=server)
+            client.authenticate_with_token(self.token)
+            self.clients[server] = client
+        return self.clients[server]
+
+    def get_session(self, server: str) -> requests.Session:
+        if server not in self.sessions:
+            session = requests.Session()
+            # Each model thread receives its version with one request at a time.
+            adapter = requests.adapters.HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update({"Accept": "text/plain", "Authorization": f"Bearer {self.token}"})
+            self.sessions[server] = session
+        return self.sessions[server]
+
+    def create_access_system_data(self, reference: ModelReference) -> AccessSystemSpecificDataSpecklePy:
+        return AccessSystemSpecificDataSpecklePy(
+            model_url=reference.url, project_id=reference.project_id, server=reference.server, token=self.token,
+            model_id=reference.model_id, client=self.get_client(reference.server), session=self.get_session(reference.server),
+            local_transport_factory=MemoryTransport,
+        )
+
+    def resolve_version(self, access_system_data: AccessSystemSpecificDataSpecklePy, reference: ModelReference) -> str:
+        """Pins the version to process: the one in the URL, or the latest one of the model or project."""
+        client = access_system_data.get_speckle_client()
+        if reference.version_id is not None:
+            version = client.version.get(reference.version_id, reference.project_id)
+            access_system_data.version_object_id = version.referencedObject
+        else:
+            access_system_data.version_object_id = access_system_data.get_version_object_id(client)
+        return access_system_data.version_object_id
+
+    def process_model(self, access_system_data: AccessSystemSpecificDataSpecklePy, result: BatchResult,
+                      export_plan: Optional[ExportPlan]) -> Optional[Dict[str, pd.DataFrame]]:
+        start = time.perf_counter()
+        try:
+            systems_df = access_system_data.process_speckle_data(**self.process_kwargs)
+            result.systems = len(systems_df)
+            result.objects = sum(len(df) for df in systems_df.values())
+            if export_plan is not None:
+                result.written_paths = access_system_data.export_systems(systems_df, export_plan)
+            return systems_df
+        except Exception as e:
+            result.error = f"{type(e).__name__}: {e}"
+            return None
+        finally:
+            result.seconds = time.perf_counter() - start
+
+    def run(self, urls: List[str], folder_path: str, formats: Optional[List[str]] = None, combined: bool = False) -> List[BatchResult]:
+        """
+        Processes every model and exports one file per model, or one combined file.
+
+        Args:
+            urls (List[str]): Project or model URLs, see `ModelReference.from_url`.
+            folder_path (str): The folder the exports are written to.
+            formats (Optional[List[str]]): The export formats. Defaults to ['xlsx'].
+            combined (bool): Write one file with the rows of all models, with a sheet per
+                Uniclass system, instead of one file per model.
+
+        Returns:
+            List[BatchResult]: The outcome of each model, in the order of `urls`.
+        """
+        formats = formats or ['xlsx']
+        results = [BatchResult(url=url) for url in urls]
+        jobs = []
+        for result in results:
+            try:
+                reference = ModelReference.from_url(result.url)
+                access_system_data = self.create_access_system_data(reference)
+                result.version_object_id = self.resolve_version(access_system_data, reference)
+            except Exception as e:
+                result.error = f"{type(e).__name__}: {e}"
+                continue
+            export_plan = None if combined else ExportPlan(destinations=[folder_path], formats=formats, file_stem=reference.file_stem)
+            jobs.append((access_system_data, result, export_plan))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            systems_dfs = list(executor.map(lambda job: self.process_model(*job), jobs))
+
+        succeeded_systems_dfs = [systems_df for systems_df in systems_dfs if systems_df is not None]
+        if combined and succeeded_systems_dfs:
+            export_plan = ExportPlan(destinations=[folder_path], formats=formats, file_stem='Batch_Systems_data')
+            exporter = AccessSystemSpecificDataSpecklePy(model_url=None, project_id=None, server=None, token=self.token)
+            written_paths = exporter.export_systems(combine_systems(succeeded_systems_dfs), export_plan)
+            for _, result, _ in jobs:
+                if result.succeeded:
+                    result.written_paths = written_paths
+
+        return results
+
+    def close(self) -> None:
+        for session in self.sessions.values():
+            session.close()
+
+
+def combine_systems(systems_dfs: List[Dict[str, pd.DataFrame]]) -> Dict[str, pd.DataFrame]:
+    """
+    Concatenates the DataFrames of each Uniclass system across models.
+
+    Rows keep their 'Model URL' and 'Version Object ID', so the models stay apart. Systems are
+    ordered by first appearance and columns missing from a model are left empty.
+    """
+    frames_by_system: Dict[str, List[pd.DataFrame]] = {}
+    for systems_df in systems_dfs:
+        for classification_desc, df in systems_df.items():
+            frames_by_system.setdefault(classification_desc, []).append(df)
+    return {
+        classification_desc: pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        for classification_desc, frames in frames_by_system.items()
+    }
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("urls", nargs="*", help="Project or model URLs.")
+    parser.add_argument("--models-file", help="A file with one project or model URL per line.")
+    parser.add_argument("--token", default=os.getenv("SPECKLE_TOKEN"), help="Defaults to the SPECKLE_TOKEN environment variable.")
+    parser.add_argument("--folder", default=".", help="The folder the exports are written to.")
+    parser.add_argument("--formats", nargs="+", default=["xlsx"], help="Export formats: xlsx, parquet and/or arrow.")
+    parser.add_argument("--workers", type=int, default=4, help="The number of models processed at the same time.")
+    parser.add_argument("--combined", action="store_true", help="Write one file for all models instead of one per model.")
+    args = parser.parse_args()
+
+    urls = list(args.urls)
+    if args.models_file:
+        with open(args.models_file, 'r') as file:
+            urls += [line.strip() for line in file if line.strip() and not line.startswith('#')]
+    if not urls:
+        parser.error("Give at least one URL or a --models-file.")
+    if not args.token:
+        parser.error("Give a --token or set SPECKLE_TOKEN.")
+
+    runner = BatchRunner(token=args.token, max_workers=args.workers)
+    try:
+        results = runner.run(urls, args.folder, formats=args.formats, combined=args.combined)
+    finally:
+        runner.close()
+
+    for result in results:
+        status = f"{result.systems} systems, {result.objects} objects in {result.seconds:.1f}s" if result.succeeded else f"FAILED {result.error}"
+        print(f"{result.url}: {status}")
+    sys.exit(0 if all(result.succeeded for result in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
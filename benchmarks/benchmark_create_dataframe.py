@@ -0,0 +1,57 @@
+"""Benchmark building the object DataFrame column by column against the previous pd.Series-apply construction.
+
+Run with `python benchmarks/benchmark_create_dataframe.py [--sizes 10000 100000 1000000]`.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from SpecklePy_accessing_system_specific_data import AccessSystemSpecificDataSpecklePy  # noqa: E402
+
+
+def create_dataframe_with_series_apply(id_data_dictionary, model_url, version_object_id):
+    """The previous construction: one wrapper dict per row, expanded with `.apply(pd.Series)`."""
+    data_list = []
+    for key, value in id_data_dictionary.items():
+        data_list.append({"speckle_data": {"Model URL": model_url, "Version Object ID": version_object_id, "Object ID": key, "data": value}})
+
+    data_df = pd.DataFrame(data_list)
+    data_df = data_df.speckle_data.apply(pd.Series)
+    return data_df[['Model URL', 'Version Object ID', 'Object ID', 'data']]
+
+
+def time_call(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--skip-apply-above", type=int, default=100_000,
+                        help="Only time the pd.Series-apply construction up to this many rows.")
+    args = parser.parse_args()
+
+    access_system_data = AccessSystemSpecificDataSpecklePy(model_url="https://speckle.example/projects/bench", project_id="bench", server="https://speckle.example", token="")
+
+    print(f"{'rows':>10} {'columns (s)':>12} {'series apply (s)':>17} {'speedup':>8}")
+    for size in args.sizes:
+        id_data_dictionary = {f"{i:032x}": {"id": f"{i:032x}", "speckle_type": "Base", "parameters": {}} for i in range(size)}
+
+        new_time, new_df = time_call(access_system_data.create_speckle_data_dataframe, id_data_dictionary, "version")
+        if size <= args.skip_apply_above:
+            old_time, old_df = time_call(create_dataframe_with_series_apply, id_data_dictionary, access_system_data.model_url, "version")
+            pd.testing.assert_frame_equal(new_df, old_df)
+            print(f"{size:>10} {new_time:>12.4f} {old_time:>17.4f} {old_time / new_time:>7.0f}x")
+        else:
+            print(f"{size:>10} {new_time:>12.4f} {'-':>17} {'-':>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Benchmark the iterative object traversal against the previous recursive flatten_base on deeply nested models.
+
+Run with `python benchmarks/benchmark_flatten.py [--depths 10 100 900 5000] [--elements 20000]`.
+Each model holds about `--elements` objects, in chains of the given depth.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from flatten import BaseTraversal  # noqa: E402
+from synthetic_model import create_nested_model  # noqa: E402
+
+
+def flatten_base_recursive(base):
+    """The previous implementation: one nested generator per level of `elements`."""
+    if hasattr(base, "elements") and base.elements is not None:
+        for element in base["elements"]:
+            yield from flatten_base_recursive(element)
+    yield base
+
+
+def time_traversal(function, model, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            count = sum(1 for _ in function(model))
+        except RecursionError:
+            return None, "RecursionError"
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--depths", type=int, nargs="+", default=[10, 100, 900, 5000])
+    parser.add_argument("--elements", type=int, default=20_000, help="The approximate number of objects in each model.")
+    parser.add_argument("--repeat", type=int, default=3, help="Each traversal is timed this many times; the best time is kept.")
+    args = parser.parse_args()
+
+    traversal = BaseTraversal(parents_first=False)
+    print(f"{'depth':>6} {'objects':>8} {'recursive':>12} {'iterative':>12} {'speedup':>8}")
+    for depth in args.depths:
+        model = create_nested_model(depth, num_chains=max(args.elements // depth, 1), num_params=2)
+        recursive_seconds, recursive_count = time_traversal(flatten_base_recursive, model, args.repeat)
+        iterative_seconds, iterative_count = time_traversal(traversal.traverse, model, args.repeat)
+        if recursive_seconds is None:
+            recursive, speedup = recursive_count, "-"
+        else:
+            assert recursive_count == iterative_count
+            recursive, speedup = f"{recursive_seconds:.4f}s", f"{recursive_seconds / iterative_seconds:.1f}x"
+        print(f"{depth:>6} {iterative_count:>8} {recursive:>12} {iterative_seconds:>11.4f}s {speedup:>8}")
+
+
+if __name__ == "__main__":
+    main()
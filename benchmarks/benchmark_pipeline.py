@@ -0,0 +1,176 @@
+"""Benchmark every stage of process_speckle_data offline, on synthetic Revit-like models.
+
+The model is generated, sent to an in-memory stand-in of the server and processed with the
+stage profiler on, from the receive to the Excel export. Results are written to a JSON file
+that a later run can be compared against to catch regressions.
+
+Run with `python benchmarks/benchmark_pipeline.py [--elements 1000 10000] [--params 10 100]
+[--local-transport memory|sqlite] [--extraction-workers 4] [--output results.json] [--compare previous.json]`.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from specklepy.transports.memory import MemoryTransport
+from specklepy.transports.sqlite import SQLiteTransport
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from offline import OfflineAccessSystemSpecificData  # noqa: E402
+from profiling import StageProfiler  # noqa: E402
+from projection import ParameterProjection  # noqa: E402
+from synthetic_model import create_synthetic_model, send_to_local_server  # noqa: E402
+
+RESULTS_FOLDER = Path(__file__).resolve().parent / "results"
+
+
+def run_benchmark(num_elements, num_params, local_transport, seed=0, type_parameters=None, projection=None, streaming=True, extraction_workers=0):
+    """Generates, sends and processes one model and returns the measurements of each stage."""
+    start = time.perf_counter()
+    model = create_synthetic_model(num_elements, num_params, seed=seed)
+    generate_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    version_object_id, remote_transport = send_to_local_server(model)
+    send_seconds = time.perf_counter() - start
+    del model
+
+    with tempfile.TemporaryDirectory() as folder:
+        if local_transport == "sqlite":
+            def local_transport_factory():
+                return SQLiteTransport(base_path=folder, app_name="benchmark")
+        else:
+            local_transport_factory = MemoryTransport
+
+        profiler = StageProfiler(enabled=True)
+        access_system_data = OfflineAccessSystemSpecificData(version_object_id, remote_transport, local_transport_factory, profiler=profiler)
+        access_system_data.process_speckle_data(folder_path=folder, fetch_workers=0, type_parameters=type_parameters,
+                                                projection=projection, streaming=streaming, extraction_workers=extraction_workers)
+
+    report = profiler.report()
+    return {
+        "elements": num_elements,
+        "params": num_params,
+        "objects_sent": len(remote_transport.objects),
+        "generate_seconds": round(generate_seconds, 6),
+        "send_seconds": round(send_seconds, 6),
+        **report,
+    }
+
+
+def get_git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def find_regressions(results, baseline, tolerance, min_seconds):
+    """
+    Compares the stage times with a previous result file.
+
+    A stage regressed when it is slower than the baseline by more than `tolerance` (a ratio)
+    and by more than `min_seconds`, so that noise on very short stages is ignored.
+
+    Returns:
+        List[str]: One description per regressed stage.
+    """
+    baseline_runs = {(run["elements"], run["params"]): run for run in baseline["runs"]}
+    regressions = []
+    for run in results["runs"]:
+        baseline_run = baseline_runs.get((run["elements"], run["params"]))
+        if baseline_run is None:
+            continue
+        baseline_stages = {stage["name"]: stage["seconds"] for stage in baseline_run["stages"]}
+        for stage in run["stages"]:
+            previous = baseline_stages.get(stage["name"])
+            if previous is None:
+                continue
+            if stage["seconds"] > previous * (1 + tolerance) and stage["seconds"] - previous > min_seconds:
+                regressions.append(f"{run['elements']} elements x {run['params']} params, {stage['name']}: "
+                                   f"{previous:.3f}s -> {stage['seconds']:.3f}s")
+    return regressions
+
+
+def print_run(run):
+    print(f"\n{run['elements']} elements x {run['params']} params ({run['objects_sent']} objects, "
+          f"generated in {run['generate_seconds']:.2f}s, sent in {run['send_seconds']:.2f}s)")
+    for stage in run["stages"]:
+        counts = ", ".join(f"{key}={value}" for key, value in stage.items() if key not in ("name", "seconds", "peak_rss_bytes"))
+        print(f"  {stage['name']:<20} {stage['seconds']:>9.3f}s  {counts}")
+    print(f"  {'total':<20} {run['total_seconds']:>9.3f}s  peak RSS {run['peak_rss_bytes'] / 1024 ** 2:.0f} MB"
+          if run["peak_rss_bytes"] else f"  {'total':<20} {run['total_seconds']:>9.3f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--elements", type=int, nargs="+", default=[1_000, 10_000],
+                        help="Model sizes to benchmark, in elements (1000 to 1000000).")
+    parser.add_argument("--params", type=int, nargs="+", default=[10, 50],
+                        help="Parameters per element to benchmark (10 to 500).")
+    parser.add_argument("--local-transport", choices=["memory", "sqlite"], default="memory",
+                        help="Where received objects are stored during the run.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--type-parameters", nargs="+", default=None,
+                        help="Join these type parameters onto instances instead of exporting type rows, e.g. 'Type Fire Rating'.")
+    parser.add_argument("--parameter-columns", nargs="+", default=None,
+                        help="Only extract these parameters, e.g. 'Mark' 'Length'.")
+    parser.add_argument("--materialized", action="store_true",
+                        help="Receive the whole version tree before extracting, instead of the lazy pipeline.")
+    parser.add_argument("--extraction-workers", type=int, default=0,
+                        help="Extract and group in this many worker processes. 0 uses the benchmark process only.")
+    parser.add_argument("--output", type=Path, default=None,
+                        help="The result file. Defaults to a timestamped file in benchmarks/results.")
+    parser.add_argument("--compare", type=Path, default=None, help="A previous result file to check for regressions.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="The allowed slowdown of a stage, as a ratio.")
+    parser.add_argument("--min-seconds", type=float, default=0.05, help="Slowdowns smaller than this are ignored.")
+    args = parser.parse_args()
+
+    results = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "git_commit": get_git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "local_transport": args.local_transport,
+        "type_parameters": args.type_parameters,
+        "parameter_columns": args.parameter_columns,
+        "streaming": not args.materialized,
+        "extraction_workers": args.extraction_workers,
+        "cpus": os.cpu_count(),
+        "runs": [],
+    }
+    for num_elements in args.elements:
+        for num_params in args.params:
+            run = run_benchmark(num_elements, num_params, args.local_transport, seed=args.seed, type_parameters=args.type_parameters,
+                                projection=ParameterProjection.from_inputs(args.parameter_columns), streaming=not args.materialized,
+                                extraction_workers=args.extraction_workers)
+            results["runs"].append(run)
+            print_run(run)
+
+    output = args.output or RESULTS_FOLDER / f"pipeline-{datetime.datetime.now():%Y%m%d-%H%M%S}.json"
+    os.makedirs(output.parent, exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare is not None:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = find_regressions(results, baseline, args.tolerance, args.min_seconds)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Benchmark the cold start of the function: the import time of its `generate_schema` and `run` commands.
+
+Run with `python benchmarks/benchmark_startup.py [--repeat 5] [--top 8] [--check]`.
+
+Each command starts a fresh interpreter with `python -X importtime`, like a new Automate container.
+`generate_schema` runs the real command and writes the schema to a temporary file. `run` needs an
+automation run, so it is measured as importing `main` and the modules `automate_function` imports
+before it starts extracting. With `--check` the benchmark fails when `generate_schema` imports one
+of the `HEAVY_MODULES`.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+# Only the run path needs these. speckle_automate itself brings in the specklepy client and requests.
+HEAVY_MODULES = ['pandas', 'numpy', 'xlsxwriter', 'pyarrow', 'tqdm', 'dotenv', 'graphql_client', 'accessing_system_specific_data']
+RUN_IMPORTS = ['SpecklePy_accessing_system_specific_data', 'object_cache', 'profiling', 'projection']
+
+
+def get_command(name: str, schema_path: str) -> List[str]:
+    if name == 'generate_schema':
+        return [sys.executable, '-X', 'importtime', 'main.py', 'generate_schema', schema_path]
+    return [sys.executable, '-X', 'importtime', '-c', '; '.join(['import main'] + [f'import {module}' for module in RUN_IMPORTS])]
+
+
+def parse_importtime(stderr: str) -> Tuple[float, Dict[str, float], List[str]]:
+    """
+    Reads the `-X importtime` report.
+
+    Returns:
+        Tuple[float, Dict[str, float], List[str]]: The total import time in ms, the cumulative
+            time in ms of each module imported at the top level, and every imported module.
+    """
+    total_us, top_level, modules = 0, {}, []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        total_us += int(self_us)
+        modules.append(name.strip())
+        if not name.startswith('  '):
+            top_level[name.strip()] = int(cumulative_us) / 1000
+    return total_us / 1000, top_level, modules
+
+
+def measure(name: str, repeat: int) -> Tuple[List[float], Dict[str, float], List[str]]:
+    totals = []
+    with tempfile.TemporaryDirectory() as folder:
+        schema_path = str(Path(folder) / 'schema.json')
+        for _ in range(repeat):
+            completed = subprocess.run(get_command(name, schema_path), cwd=REPO_ROOT, capture_output=True, text=True)
+            if completed.returncode != 0:
+                raise RuntimeError(f"The {name} command failed:\n{completed.stderr[-2000:]}")
+            total_ms, top_level, modules = parse_importtime(completed.stderr)
+            totals.append(total_ms)
+        if name == 'generate_schema' and not Path(schema_path).is_file():
+            raise RuntimeError("generate_schema did not write the schema.")
+    return totals, top_level, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="The slowest top-level imports to list.")
+    parser.add_argument("--check", action="store_true", help="Fail when generate_schema imports a heavy module.")
+    args = parser.parse_args()
+
+    failed = False
+    for name in ['generate_schema', 'run']:
+        totals, top_level, modules = measure(name, args.repeat)
+        heavy_modules = [module for module in HEAVY_MODULES if module in modules]
+        print(f"{name}: median {statistics.median(totals):.0f} ms, min {min(totals):.0f} ms over {args.repeat} runs")
+        for module, cumulative_ms in sorted(top_level.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"  {cumulative_ms:8.1f} ms  {module}")
+        print(f"  heavy modules: {', '.join(heavy_modules) or 'none'}")
+        if args.check and name == 'generate_schema' and heavy_modules:
+            failed = True
+
+    if failed:
+        print("generate_schema imports modules only the run needs.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
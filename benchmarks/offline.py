@@ -0,0 +1,27 @@
+"""Runs the SpecklePy extraction offline, against a local stand-in of the Speckle server.
+
+Shared by the benchmarks and the tests: models are sent with `synthetic_model.send_to_local_server`
+and read back through `OfflineAccessSystemSpecificData` without a client or a network connection.
+"""
+from typing import Callable
+
+from specklepy.transports.abstract_transport import AbstractTransport
+from specklepy.transports.memory import MemoryTransport
+
+from SpecklePy_accessing_system_specific_data import AccessSystemSpecificDataSpecklePy
+
+
+class OfflineAccessSystemSpecificData(AccessSystemSpecificDataSpecklePy):
+    """Runs the pipeline against a local server transport instead of a Speckle server."""
+
+    def __init__(self, version_object_id: str, remote_transport: AbstractTransport,
+                 local_transport_factory: Callable[[], AbstractTransport] = MemoryTransport, **kwargs) -> None:
+        kwargs = {"model_url": "https://speckle.example/projects/p", "project_id": "p", "server": "https://speckle.example", "token": "", **kwargs}
+        super().__init__(version_object_id=version_object_id, local_transport_factory=local_transport_factory, **kwargs)
+        self.remote_transport = remote_transport
+
+    def get_speckle_client(self):
+        return None
+
+    def create_transport_and_serializer(self, client):
+        return self.remote_transport, None
@@ -0,0 +1,192 @@
+"""Generates synthetic Revit-like Speckle models and serves them offline, for the benchmarks.
+
+The models have the shape `get_list_of_object_ids` reads: an `elements` list, the `@Materials`,
+`@Views`, `@Project Information` and `@Sheets` collections, and a `@Types` object with one
+`@`-prefixed list per category. Every object carries a `parameters` object of Revit parameters,
+most of them including `Classification.Uniclass.Ss.Description` and `Classification.Uniclass.Ss.Number`.
+Elements refer to a type object of their category through their `ELEM_TYPE_PARAM` parameter.
+"""
+import json
+import random
+from typing import Dict, List, Optional, Tuple
+
+from specklepy.api import operations
+from specklepy.objects.base import Base
+from specklepy.objects.other import Collection, RevitParameter
+from specklepy.transports.abstract_transport import AbstractTransport
+from specklepy.transports.memory import MemoryTransport
+
+from type_join import TYPE_ID_PARAMETER
+
+SYSTEMS = [
+    ("Ss_20_05_15", "Concrete foundation systems"),
+    ("Ss_25_10_30", "Framed wall systems"),
+    ("Ss_25_30_20", "Door systems"),
+    ("Ss_30_10_30", "Pitched roof framing systems"),
+    ("Ss_55_70_38", "Hot and cold water supply systems"),
+    ("Ss_60_40_37", "Heating and cooling systems"),
+    ("Ss_65_40_33", "Ductwork systems"),
+    ("Ss_70_80_33", "Lighting systems"),
+]
+
+CATEGORIES = [
+    ("Walls", "Objects.BuiltElements.Wall:Objects.BuiltElements.Revit.RevitWall"),
+    ("Doors", "Objects.BuiltElements.Revit.FamilyInstance"),
+    ("Floors", "Objects.BuiltElements.Floor:Objects.BuiltElements.Revit.RevitFloor"),
+    ("Pipes", "Objects.BuiltElements.Pipe:Objects.BuiltElements.Revit.RevitPipe"),
+    ("Ducts", "Objects.BuiltElements.Duct:Objects.BuiltElements.Revit.RevitDuct"),
+]
+
+# Name, units and kind of the generic parameters, cycled through to reach the parameter count.
+PARAMETER_TEMPLATES = [
+    ("Length", "m", "length"),
+    ("Mark", None, "text"),
+    ("Area", "m²", "area"),
+    ("Comments", None, "text"),
+    ("Count", None, "integer"),
+    ("Fire Rating", None, "text"),
+]
+
+
+def create_parameter(name: str, value, units: Optional[str] = None, internal_name: Optional[str] = None) -> RevitParameter:
+    parameter = RevitParameter(name=name, value=value, applicationInternalName=internal_name or name.upper().replace(" ", "_"))
+    parameter.units = units
+    return parameter
+
+
+def create_parameters(number: int, num_params: int, rng: random.Random, classified: bool, prefix: str = "") -> Base:
+    """A `parameters` object with `num_params` Revit parameters, classification parameters included."""
+    parameters = Base()
+    if classified:
+        system_number, system_description = rng.choice(SYSTEMS)
+        parameters["CLASSIFICATION_UNICLASS_SS_DESCRIPTION"] = create_parameter("Classification.Uniclass.Ss.Description", system_description)
+        parameters["CLASSIFICATION_UNICLASS_SS_NUMBER"] = create_parameter("Classification.Uniclass.Ss.Number", system_number)
+
+    for i in range(max(num_params - len(parameters.get_dynamic_member_names()), 0)):
+        name, units, kind = PARAMETER_TEMPLATES[i % len(PARAMETER_TEMPLATES)]
+        name = f"{name} {i // len(PARAMETER_TEMPLATES)}" if i >= len(PARAMETER_TEMPLATES) else name
+        name = f"{prefix}{name}"
+        if kind in ("length", "area"):
+            value = round(rng.uniform(0.1, 50.0), 3)
+        elif kind == "integer":
+            value = rng.randint(0, 20)
+        else:
+            value = f"{name}-{number % 97}"
+        parameters[f"{prefix.upper().replace(' ', '_')}PARAM_{i}"] = create_parameter(name, value, units)
+    return parameters
+
+
+def create_element(number: int, num_params: int, rng: random.Random, unclassified_ratio: float = 0.1,
+                   category: Optional[Tuple[str, str]] = None, type_ids: Optional[Dict[str, List[str]]] = None,
+                   is_type: bool = False) -> Base:
+    """One Revit-like object with a category, an element id and parameters, referring to a type of its category if given."""
+    category_name, speckle_type = category or rng.choice(CATEGORIES)
+    element = Base()
+    # speckle_type is a class attribute; set it on the instance so the serialized type is Revit-like
+    # without registering classes that would shadow the real ones.
+    element.__dict__["speckle_type"] = speckle_type
+    element.applicationId = f"{number:08x}-0000-0000-0000-000000000000"
+    element.elementId = str(number)
+    element.category = category_name
+    # Type parameters are named apart from instance parameters, as in Revit.
+    prefix = "Type " if is_type else ""
+    element.parameters = create_parameters(number, num_params, rng, classified=rng.random() >= unclassified_ratio, prefix=prefix)
+    if type_ids and type_ids.get(category_name):
+        element.parameters[TYPE_ID_PARAMETER] = create_parameter("Type", rng.choice(type_ids[category_name]), internal_name=TYPE_ID_PARAMETER)
+    return element
+
+
+def create_synthetic_model(num_elements: int = 1000, num_params: int = 10, seed: int = 0,
+                           unclassified_ratio: float = 0.1, num_types_per_category: int = 4) -> Base:
+    """
+    Creates a Revit-like version object.
+
+    Args:
+        num_elements (int): The number of objects in `elements`.
+        num_params (int): The number of parameters of each element.
+        seed (int): The seed of the random values, so the same arguments give the same model.
+        unclassified_ratio (float): The share of objects without classification parameters.
+        num_types_per_category (int): The number of type objects under each `@Types` category.
+
+    Returns:
+        Base: The root object of the model.
+    """
+    rng = random.Random(seed)
+    numbers = iter(range(10 ** 9))
+
+    def create_objects(count, num_params, category=None, type_ids=None, is_type=False):
+        return [create_element(next(numbers), num_params, rng, unclassified_ratio, category, type_ids, is_type) for _ in range(count)]
+
+    types = Base()
+    type_ids = {}
+    for category in CATEGORIES:
+        types[f"@{category[0]}"] = create_objects(num_types_per_category, num_params, category, is_type=True)
+        type_ids[category[0]] = [type_object.elementId for type_object in types[f"@{category[0]}"]]
+
+    root = Collection(name="Synthetic model", collectionType="model")
+    root.elements = create_objects(num_elements, num_params, type_ids=type_ids)
+    root["@Materials"] = create_objects(max(num_elements // 100, 1), min(num_params, 8))
+    root["@Views"] = create_objects(max(num_elements // 500, 1), min(num_params, 8))
+    root["@Project Information"] = create_objects(1, min(num_params, 8))
+    root["@Sheets"] = create_objects(max(num_elements // 1000, 1), min(num_params, 8))
+    root["@Types"] = types
+    return root
+
+
+def create_nested_model(depth: int, num_chains: int = 1, num_params: int = 5, seed: int = 0) -> Base:
+    """
+    Creates a version object whose elements nest other elements `depth` levels deep, like hosted
+    elements, curtain wall panels or nested families.
+
+    Args:
+        depth (int): The number of elements in each chain, each one in the `elements` of the one above.
+        num_chains (int): The number of chains in the root `elements`.
+        num_params (int): The number of parameters of each element.
+        seed (int): The seed of the random values.
+
+    Returns:
+        Base: The root object of the model, holding `depth * num_chains` elements.
+    """
+    rng = random.Random(seed)
+    numbers = iter(range(10 ** 9))
+    root = Collection(name="Nested model", collectionType="model", elements=[])
+    for _ in range(num_chains):
+        host = create_element(next(numbers), num_params, rng)
+        root.elements.append(host)
+        for _ in range(depth - 1):
+            nested = create_element(next(numbers), num_params, rng)
+            host.elements = [nested]
+            host = nested
+    return root
+
+
+class LocalServerTransport(MemoryTransport):
+    """
+    An in-memory stand-in for `ServerTransport`.
+
+    Like the server transport, it only copies the children the target transport does not have yet.
+    """
+
+    def __init__(self, name: str = "LocalServer") -> None:
+        super().__init__(name=name)
+
+    def copy_object_and_children(self, id: str, target_transport: AbstractTransport) -> str:
+        root = self.objects[id]
+        children_ids = list(json.loads(root).get("__closure", {}))
+        present = target_transport.has_objects(children_ids)
+
+        target_transport.begin_write()
+        for child_id in children_ids:
+            if not present[child_id]:
+                target_transport.save_object(child_id, self.objects[child_id])
+        target_transport.save_object(id, root)
+        target_transport.end_write()
+        return root
+
+
+def send_to_local_server(model: Base, transport: Optional[LocalServerTransport] = None) -> Tuple[str, LocalServerTransport]:
+    """Serializes the model into a local server transport and returns its object id and the transport."""
+    transport = transport or LocalServerTransport()
+    object_id = operations.send(model, [transport], use_default_cache=False)
+    return object_id, transport
+
@@ -0,0 +1,120 @@
+"""Helper module for writing the systems as a columnar Parquet or Arrow IPC dataset."""
+
+import os
+import shutil
+from typing import Dict, Iterable, Iterator, List, Tuple
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is only needed for the columnar formats.
+    pa = None
+    pq = None
+
+# The hive partition key of the dataset, one partition per Uniclass system.
+PARTITION_KEY = 'Uniclass system'
+FILE_EXTENSIONS = {'parquet': 'parquet', 'arrow': 'arrow'}
+
+
+def has_pyarrow() -> bool:
+    return pa is not None
+
+
+def require_pyarrow() -> None:
+    if pa is None:
+        raise ImportError("The Parquet and Arrow exports need pyarrow. Install it with `pip install pyarrow`.")
+
+
+def to_arrow_array(values) -> "pa.Array":
+    """
+    Converts one column to an Arrow array, with NaN as null.
+
+    Columns mixing types Arrow can not hold in one array, e.g. text and numbers, are written as text.
+    """
+    try:
+        return pa.array(values, from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.array([None if pd.isna(value) else str(value) for value in values], type=pa.string())
+
+
+def block_to_table(columns: List[str], block: np.ndarray) -> "pa.Table":
+    """Builds an Arrow table from the column names and 2D object array of one system."""
+    return pa.Table.from_arrays([to_arrow_array(block[:, i]) for i in range(len(columns))], names=columns)
+
+
+def dataframe_to_table(df: pd.DataFrame) -> "pa.Table":
+    """Builds an Arrow table from the columns of a system DataFrame, without copying the DataFrame."""
+    return pa.Table.from_arrays([to_arrow_array(df[column]) for column in df.columns], names=[str(column) for column in df.columns])
+
+
+def get_partition_folder(path: str, classification_desc: str) -> str:
+    """The hive partition folder of a system, e.g. `Systems_data.parquet/Uniclass system=Framed%20wall%20systems`."""
+    return os.path.join(path, f"{quote(PARTITION_KEY, safe='')}={quote(str(classification_desc), safe='')}")
+
+
+def write_table(table: "pa.Table", path: str, file_format: str) -> None:
+    if file_format == 'parquet':
+        pq.write_table(table, path)
+    else:
+        with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def write_dataframe(df: pd.DataFrame, path: str, file_format: str = 'parquet') -> None:
+    """Writes one DataFrame to a single Parquet or Arrow IPC file, e.g. the Uniclass summary."""
+    require_pyarrow()
+    write_table(dataframe_to_table(df), path, file_format)
+
+
+def write_tables_to_dataset(tables: Iterable[Tuple[str, "pa.Table"]], path: str, file_format: str = 'parquet') -> Dict[str, str]:
+    """
+    Writes one file per system into a dataset folder partitioned by Uniclass system.
+
+    The folder is replaced if it exists. Each system keeps its own columns, with no 31
+    character limit on its name. Read one system with e.g. `pd.read_parquet(file)`, or the
+    whole dataset with `pyarrow.dataset.dataset(path, format=..., partitioning='hive')`.
+
+    Args:
+        tables (Iterable[Tuple[str, pa.Table]]): The description and table of each system.
+        path (str): The dataset folder, e.g. `Systems_data.parquet`.
+        file_format (str): 'parquet', or 'arrow' for Arrow IPC files.
+
+    Returns:
+        Dict[str, str]: The file written for each system.
+    """
+    require_pyarrow()
+    if file_format not in FILE_EXTENSIONS:
+        raise ValueError(f"Unknown columnar format '{file_format}', expected one of {sorted(FILE_EXTENSIONS)}.")
+
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    os.makedirs(path)
+
+    written_files = {}
+    for classification_desc, table in tables:
+        folder = get_partition_folder(path, classification_desc)
+        os.makedirs(folder, exist_ok=True)
+        file_path = os.path.join(folder, f"part-0.{FILE_EXTENSIONS[file_format]}")
+        write_table(table, file_path, file_format)
+        written_files[classification_desc] = file_path
+    return written_files
+
+
+def write_dataframes_to_dataset(dataframes_dict: Dict[str, pd.DataFrame], path: str, file_format: str = 'parquet') -> Dict[str, str]:
+    """Writes the DataFrame of each system into a partitioned dataset, see `write_tables_to_dataset`."""
+    require_pyarrow()
+    return write_tables_to_dataset(((desc, dataframe_to_table(df)) for desc, df in dataframes_dict.items()), path, file_format)
+
+
+def write_blocks_to_dataset(blocks: Iterator[Tuple[str, List[str], np.ndarray]], path: str, file_format: str = 'parquet') -> Dict[str, str]:
+    """
+    Writes the object blocks yielded by `grouping.iter_system_blocks` into a partitioned dataset.
+
+    Each block goes straight into an Arrow table, so no DataFrame is built for the systems.
+    """
+    require_pyarrow()
+    return write_tables_to_dataset(((desc, block_to_table(columns, block)) for desc, columns, block in blocks), path, file_format)
@@ -0,0 +1,196 @@
+"""Helper module for writing the system sheets to Excel with constant memory."""
+
+import math
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+
+MAX_SHEET_NAME_LENGTH = 31
+INVALID_SHEET_NAME_CHARACTERS = re.compile(r"[\[\]:*?/\\]")
+# The sheet of the Uniclass roll-up, placed before the system sheets.
+SUMMARY_SHEET_NAME = 'Summary'
+
+
+class SheetNames:
+    """
+    Gives each name a valid Excel sheet name that no other name gets.
+
+    Names are truncated to 31 characters, characters Excel does not allow are replaced by '_' and
+    apostrophes are stripped from both ends.
+    When two names end up the same (Excel compares sheet names case-insensitively), the later
+    ones get a ' (2)', ' (3)', ... suffix that fits within the 31 characters. The result only
+    depends on the names and the order they are asked for, so the same systems always get the
+    same sheets.
+
+    Args:
+        reserved_names (Iterable[str]): Sheet names already taken by other sheets, e.g. `SUMMARY_SHEET_NAME`.
+    """
+
+    def __init__(self, reserved_names: Iterable[str] = ()) -> None:
+        self.sheet_names = {}
+        self.used_names = {name.lower() for name in reserved_names}
+
+    def get_sheet_name(self, name: str) -> str:
+        """Get the sheet name of a name, assigning one the first time the name is seen."""
+        if name in self.sheet_names:
+            return self.sheet_names[name]
+
+        # Excel does not allow an apostrophe at either end, which truncating can also leave.
+        valid_name = INVALID_SHEET_NAME_CHARACTERS.sub('_', str(name)).strip("'") or 'Sheet'
+        sheet_name = valid_name[:MAX_SHEET_NAME_LENGTH].rstrip("'")
+        suffix_number = 2
+        while sheet_name.lower() in self.used_names:
+            suffix = f" ({suffix_number})"
+            sheet_name = valid_name[:MAX_SHEET_NAME_LENGTH - len(suffix)] + suffix
+            suffix_number += 1
+
+        self.used_names.add(sheet_name.lower())
+        self.sheet_names[name] = sheet_name
+        return sheet_name
+
+
+def unique_sheet_names(names: Iterable[str], reserved_names: Iterable[str] = ()) -> Dict[str, str]:
+    """
+    Maps each name to a valid Excel sheet name that no other name maps to, see `SheetNames`.
+
+    Args:
+        names (Iterable[str]): The names of the sheets, e.g. the Uniclass system descriptions.
+        reserved_names (Iterable[str]): Sheet names none of the names may get.
+
+    Returns:
+        Dict[str, str]: The sheet name of each name.
+    """
+    sheet_names = SheetNames(reserved_names)
+    return {name: sheet_names.get_sheet_name(name) for name in names}
+
+
+def get_cell_value(value: Any) -> Any:
+    """Convert a DataFrame value to what xlsxwriter should write, with missing values as blank cells."""
+    value_type = value.__class__
+    if value is None or value_type in (str, int, bool):
+        return value
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float):
+        return None if math.isnan(value) else value
+    if value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, (list, tuple, dict, set)):
+        return str(value)
+    return value
+
+
+class StreamingExcelWriter:
+    """
+    Writes sheets row by row with xlsxwriter's `constant_memory` mode.
+
+    Each row is flushed to a temporary file as soon as the next row starts, so memory does not
+    grow with the number of rows. Rows of a sheet must therefore be written in order, but rows
+    of different sheets can be interleaved. The header row is formatted like pandas' `to_excel`.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.workbook = xlsxwriter.Workbook(path, {
+            'constant_memory': True,
+            'default_date_format': 'yyyy-mm-dd hh:mm:ss',
+            'nan_inf_to_errors': True,
+        })
+        self.header_format = self.workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+        self.worksheets = {}
+        self.next_rows = {}
+
+    def __enter__(self) -> "StreamingExcelWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def add_sheet(self, sheet_name: str, columns: List[str]) -> None:
+        """
+        Adds a sheet and writes its header row.
+
+        Args:
+            sheet_name (str): A valid sheet name, see `unique_sheet_names`.
+            columns (List[str]): The column names.
+        """
+        worksheet = self.workbook.add_worksheet(sheet_name)
+        worksheet.write_row(0, 0, [str(column) for column in columns], self.header_format)
+        self.worksheets[sheet_name] = worksheet
+        self.next_rows[sheet_name] = 1
+
+    def write_row(self, sheet_name: str, values: Iterable[Any]) -> None:
+        """Writes the next row of a sheet."""
+        row = self.next_rows[sheet_name]
+        self.worksheets[sheet_name].write_row(row, 0, [get_cell_value(value) for value in values])
+        self.next_rows[sheet_name] = row + 1
+
+    def write_rows(self, sheet_name: str, rows: Iterable[Iterable[Any]]) -> None:
+        """Writes the next rows of a sheet."""
+        for values in rows:
+            self.write_row(sheet_name, values)
+
+    def write_dataframe(self, sheet_name: str, df: pd.DataFrame) -> None:
+        """Adds a sheet with the columns and rows of a DataFrame, without its index."""
+        self.add_sheet(sheet_name, list(df.columns))
+        self.write_rows(sheet_name, df.itertuples(index=False, name=None))
+
+    def close(self) -> None:
+        """Writes the workbook to `path`."""
+        if self.workbook is not None:
+            self.workbook.close()
+            self.workbook = None
+
+
+def write_dataframes_to_excel(dataframes_dict: Dict[str, pd.DataFrame], path: str, sheet_names: Optional[Dict[str, str]] = None,
+                              summary: Optional[pd.DataFrame] = None) -> Dict[str, str]:
+    """
+    Writes each DataFrame to its own sheet with constant memory.
+
+    Args:
+        dataframes_dict (Dict[str, pd.DataFrame]): The DataFrames keyed by their name.
+        path (str): The path of the Excel file.
+        sheet_names (Optional[Dict[str, str]]): The sheet name of each DataFrame. Defaults to
+            `unique_sheet_names` of the keys.
+        summary (Optional[pd.DataFrame]): Written first, to the `SUMMARY_SHEET_NAME` sheet. The
+            given `sheet_names` should then reserve that name.
+
+    Returns:
+        Dict[str, str]: The sheet name of each DataFrame.
+    """
+    reserved_names = [SUMMARY_SHEET_NAME] if summary is not None else []
+    sheet_names = sheet_names or unique_sheet_names(dataframes_dict, reserved_names)
+    with StreamingExcelWriter(path) as writer:
+        if summary is not None:
+            writer.write_dataframe(SUMMARY_SHEET_NAME, summary)
+        for name, df in dataframes_dict.items():
+            writer.write_dataframe(sheet_names[name], df)
+    return sheet_names
+
+
+def write_blocks_to_excel(blocks: Iterable[Tuple[str, List[str], np.ndarray]], path: str, summary: Optional[pd.DataFrame] = None) -> Dict[str, str]:
+    """
+    Writes the object block of each system, as yielded by `grouping.iter_system_blocks`, to its own sheet.
+
+    No DataFrame is built, and each block can be released once its rows are written.
+
+    Args:
+        blocks (Iterable[Tuple[str, List[str], np.ndarray]]): The description, columns and rows of each system.
+        path (str): The path of the Excel file.
+        summary (Optional[pd.DataFrame]): Written first, to the `SUMMARY_SHEET_NAME` sheet.
+
+    Returns:
+        Dict[str, str]: The sheet name of each system.
+    """
+    sheet_names = SheetNames([SUMMARY_SHEET_NAME] if summary is not None else [])
+    with StreamingExcelWriter(path) as writer:
+        if summary is not None:
+            writer.write_dataframe(SUMMARY_SHEET_NAME, summary)
+        for classification_desc, columns, block in blocks:
+            sheet_name = sheet_names.get_sheet_name(classification_desc)
+            writer.add_sheet(sheet_name, columns)
+            writer.write_rows(sheet_name, block)
+    return sheet_names.sheet_names
@@ -0,0 +1,105 @@
+"""Helper module describing where and in which formats the system data is exported."""
+
+import os
+import shutil
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from speckle_automate import AutomationContext
+
+# The format of the Uniclass roll-up file written when an export plan has `summary` set.
+SUMMARY_FORMAT = 'summary.parquet'
+
+
+@dataclass
+class ExportPlan:
+    """
+    The destinations and formats of one export, picked once by the caller.
+
+    Each format is encoded once, into the first destination, and then copied to the other
+    destinations and optionally attached to the automation run with `store_file_result`.
+    Formats written as a folder, like a partitioned Parquet dataset, are copied as a whole
+    and every file in them is attached.
+
+    Attributes:
+        destinations (List[str]): The folders the files are written to. Created if needed.
+        formats (List[str]): The file formats to write, e.g. 'xlsx', 'parquet' or 'arrow'.
+        file_stem (str): The file name without extension.
+        attach_to_automation (bool): Attach each file to the automation run.
+        summary (bool): Also export the Uniclass roll-up, see `uniclass.UniclassIndex`: as the
+            first sheet of the workbook and as a `{file_stem}_summary.parquet` file.
+        summary_file (bool): Write the `{file_stem}_summary.parquet` file of the roll-up. Off
+            when pyarrow is not installed, leaving only the Summary sheet.
+    """
+
+    destinations: List[str] = field(default_factory=lambda: ['.'])
+    formats: List[str] = field(default_factory=lambda: ['xlsx'])
+    file_stem: str = 'Systems_data'
+    attach_to_automation: bool = False
+    summary: bool = False
+    summary_file: bool = True
+
+    @property
+    def output_formats(self) -> List[str]:
+        """The formats written by `execute`, with `SUMMARY_FORMAT` last when `summary` and `summary_file` are set."""
+        return self.formats + [SUMMARY_FORMAT] if self.summary and self.summary_file else list(self.formats)
+
+    def get_file_name(self, file_format: str) -> str:
+        if file_format == SUMMARY_FORMAT:
+            return f"{self.file_stem}_summary.parquet"
+        return f"{self.file_stem}.{file_format}"
+
+    @staticmethod
+    def get_files(path: str) -> List[str]:
+        """The path itself for a file, or every file in it for a folder."""
+        if not os.path.isdir(path):
+            return [path]
+        return sorted(os.path.join(folder, file_name) for folder, _, file_names in os.walk(path) for file_name in file_names)
+
+    def execute(self, writers: Dict[str, Callable[[str], None]], automate_context: Optional[AutomationContext] = None) -> List[str]:
+        """
+        Encodes each format once and places it in every destination.
+
+        Args:
+            writers (Dict[str, Callable[[str], None]]): A function per format that writes the
+                file to the given path.
+            automate_context (Optional[AutomationContext]): The context files are attached to
+                when `attach_to_automation` is set.
+
+        Returns:
+            List[str]: The paths of all written files.
+        """
+        if not self.destinations:
+            raise ValueError("An export plan needs at least one destination.")
+        unknown_formats = [file_format for file_format in self.output_formats if file_format not in writers]
+        if unknown_formats:
+            raise ValueError(f"No writer for export formats: {unknown_formats}")
+        if self.attach_to_automation and automate_context is None:
+            raise ValueError("An automation context is needed to attach files to the automation run.")
+
+        for destination in self.destinations:
+            os.makedirs(destination, exist_ok=True)
+
+        written_paths = []
+        for file_format in self.output_formats:
+            file_name = self.get_file_name(file_format)
+            encoded_path = os.path.join(self.destinations[0], file_name)
+            writers[file_format](encoded_path)
+            written_paths.append(encoded_path)
+
+            for destination in self.destinations[1:]:
+                copy_path = os.path.join(destination, file_name)
+                if os.path.abspath(copy_path) != os.path.abspath(encoded_path):
+                    if os.path.isdir(encoded_path):
+                        if os.path.isdir(copy_path):
+                            shutil.rmtree(copy_path)
+                        shutil.copytree(encoded_path, copy_path)
+                    else:
+                        shutil.copyfile(encoded_path, copy_path)
+                    written_paths.append(copy_path)
+
+            if self.attach_to_automation:
+                for file_path in self.get_files(encoded_path):
+                    automate_context.store_file_result(file_path)
+
+        return written_paths
@@ -1,13 +1,174 @@
-"""Helper module for a simple speckle object tree flattening."""
+"""Helper module for an iterative speckle object tree traversal with filtering."""
 
 from collections.abc import Iterable
+from typing import Any, Iterator, List, NamedTuple, Optional, Sequence, Tuple
 
 from specklepy.objects import Base
 
+# Members followed on every object: collections and hosted or nested elements keep their children here.
+DEFAULT_MEMBER_NAMES = ('elements',)
+COLLECTION_SPECKLE_TYPE = 'Speckle.Core.Models.Collection'
 
-def flatten_base(base: Base) -> Iterable[Base]:
-    """Take a base and flatten it to an iterable of bases."""
-    if hasattr(base, "elements") and base.elements is not None:
-        for element in base["elements"]:
-            yield from flatten_base(element)
-    yield base
+
+def has_speckle_type(speckle_type: str, speckle_types: Iterable[str]) -> bool:
+    """Whether a speckle_type, or one of the types it inherits from, is in `speckle_types`."""
+    return any(inherited_type in speckle_types for inherited_type in speckle_type.split(':'))
+
+
+class TraversedObject(NamedTuple):
+    """An object found by `BaseTraversal.walk`, with the collection it was found under and its parent."""
+
+    base: Any
+    collection: Optional[str]
+    parent_id: Optional[str]
+
+
+class BaseTraversal:
+    """
+    Walks a tree of Base objects without recursion, so deeply nested models do not hit the recursion limit.
+
+    The `member_names` are followed on every object, and with `follow_detached` every
+    `@`-prefixed member too, e.g. `@Types` and its categories. Each object is visited once,
+    by id. Objects with a speckle_type in `prune_speckle_types` are skipped together with
+    everything below them. The other filters only decide which of the visited objects are
+    yielded: the traversal still walks through the objects they leave out.
+
+    Objects are read through `resolve`, `is_object` and the `get_` methods, so a subclass can
+    walk another representation of the tree, e.g. `pipeline.SerializedTraversal`.
+
+    Args:
+        member_names (Sequence[str]): The members holding child objects.
+        follow_detached (bool): Also follow every `@`-prefixed member, in sorted order.
+        prune_speckle_types (Iterable[str]): Speckle types skipped with their children, e.g.
+            'Objects.Geometry.Mesh'. An object matches when any type it inherits from matches.
+        speckle_types (Optional[Iterable[str]]): When given, only objects of these types are yielded.
+        require_parameters (bool): Only yield objects that have a `parameters` object.
+        include_collections (bool): Yield collection objects, not only walk through them.
+        parents_first (bool): Yield each object before its children. Otherwise after them,
+            like the previous recursive `flatten_base`.
+    """
+
+    def __init__(self, member_names: Sequence[str] = DEFAULT_MEMBER_NAMES, follow_detached: bool = False,
+                 prune_speckle_types: Iterable[str] = (), speckle_types: Optional[Iterable[str]] = None,
+                 require_parameters: bool = False, include_collections: bool = True, parents_first: bool = True) -> None:
+        self.member_names = list(member_names)
+        self.follow_detached = follow_detached
+        self.prune_speckle_types = frozenset(prune_speckle_types)
+        self.speckle_types = frozenset(speckle_types) if speckle_types is not None else None
+        self.require_parameters = require_parameters
+        self.include_collections = include_collections
+        self.parents_first = parents_first
+        self.has_filters = not include_collections or self.speckle_types is not None or require_parameters
+
+    def resolve(self, value: Any) -> Any:
+        """The object a member value stands for. Base objects are already in memory."""
+        return value
+
+    def is_object(self, value: Any) -> bool:
+        return isinstance(value, Base)
+
+    def get_id(self, obj: Base) -> Optional[str]:
+        return obj.id
+
+    def get_speckle_type(self, obj: Base) -> str:
+        return obj.speckle_type
+
+    def get_member(self, obj: Base, name: str) -> Any:
+        return getattr(obj, name, None)
+
+    def get_member_names(self, obj: Base) -> List[str]:
+        return obj.get_dynamic_member_names()
+
+    def has_parameters(self, obj: Base) -> bool:
+        return isinstance(getattr(obj, 'parameters', None), Base)
+
+    def get_children(self, obj: Any) -> List[Any]:
+        """The values of the followed members of an object, with lists unpacked, in traversal order."""
+        names = self.member_names
+        if self.follow_detached:
+            names = names + sorted(name for name in self.get_member_names(obj) if name.startswith('@') and name not in names)
+        children = []
+        for name in names:
+            value = self.get_member(obj, name)
+            if isinstance(value, list):
+                children.extend(value)
+            elif value is not None:
+                children.append(value)
+        return children
+
+    def is_included(self, obj: Any) -> bool:
+        """Whether a visited object is yielded."""
+        if not self.include_collections and self.get_speckle_type(obj) == COLLECTION_SPECKLE_TYPE:
+            return False
+        if self.speckle_types is not None and not has_speckle_type(self.get_speckle_type(obj), self.speckle_types):
+            return False
+        if self.require_parameters and not self.has_parameters(obj):
+            return False
+        return True
+
+    def walk(self, value: Any, collection: Optional[str] = None, parent_id: Optional[str] = None) -> Iterator[TraversedObject]:
+        """
+        Walks an object, or a list of them, and yields the included objects.
+
+        Args:
+            value (Any): The object or list of objects to start from.
+            collection (Optional[str]): The label the objects are reported under, e.g. 'elements'.
+                Children keep the label of the object they were found under.
+            parent_id (Optional[str]): The id reported as the parent of the starting objects.
+
+        Yields:
+            TraversedObject: Each included object, with its collection and the id of its parent.
+        """
+        return self.walk_roots([(value, collection, parent_id)])
+
+    def walk_roots(self, roots: Iterable[Tuple[Any, Optional[str], Optional[str]]]) -> Iterator[TraversedObject]:
+        """Walks several starting points in order, see `walk`. An object reached from two of them is yielded once."""
+        # Bound once, this loop runs for every object of the model.
+        resolve, is_object, get_id, get_children = self.resolve, self.is_object, self.get_id, self.get_children
+        is_included = self.is_included if self.has_filters else None
+        prune_speckle_types, parents_first = self.prune_speckle_types, self.parents_first
+
+        seen = set()
+        # (value, collection, parent id, whether its children are already on the stack)
+        stack = [(value, collection, parent_id, False) for value, collection, parent_id in reversed(list(roots))]
+        pop, push = stack.pop, stack.append
+        while stack:
+            value, collection, parent_id, expanded = pop()
+            if expanded:
+                if is_included is None or is_included(value):
+                    yield TraversedObject(value, collection, parent_id)
+                continue
+            if isinstance(value, list):
+                stack.extend((element, collection, parent_id, False) for element in reversed(value))
+                continue
+            value = resolve(value)
+            if not is_object(value):
+                continue
+
+            obj_id = get_id(value)
+            key = obj_id if obj_id is not None else id(value)
+            if key in seen or (prune_speckle_types and has_speckle_type(self.get_speckle_type(value), prune_speckle_types)):
+                continue
+            seen.add(key)
+
+            if not parents_first:
+                push((value, collection, parent_id, True))
+            elif is_included is None or is_included(value):
+                yield TraversedObject(value, collection, parent_id)
+            children = get_children(value)
+            for child in reversed(children):
+                push((child, collection, obj_id, False))
+
+    def traverse(self, base: Any) -> Iterator[Any]:
+        """Yields the included objects of the tree, the starting object included."""
+        for traversed in self.walk(base):
+            yield traversed.base
+
+
+def flatten_base(base: Base, traversal: Optional[BaseTraversal] = None) -> Iterable[Base]:
+    """
+    Take a base and flatten it to an iterable of bases.
+
+    Without a traversal, `elements` are followed and children come before their parent.
+    """
+    return (traversal or BaseTraversal(parents_first=False)).traverse(base)
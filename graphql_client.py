@@ -0,0 +1,129 @@
+"""Helper module for a pooled, optionally caching client of the Speckle GraphQL API."""
+
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+import requests
+from graphql import OperationDefinitionNode, parse
+
+GRAPHQL_FOLDER = Path(__file__).resolve().parent / 'graphql'
+
+
+class GraphQLResponseError(Exception):
+    """Raised when a GraphQL response has no data."""
+
+
+@dataclass(frozen=True)
+class CompiledQuery:
+    """A query parsed once, with the name of its operation."""
+
+    text: str
+    operation_name: Optional[str]
+
+    @classmethod
+    def from_text(cls, text: str) -> "CompiledQuery":
+        """Parses the query, so syntax errors show up when it is loaded rather than when it is sent."""
+        document = parse(text)
+        operations = [definition for definition in document.definitions if isinstance(definition, OperationDefinitionNode)]
+        operation_name = operations[0].name.value if len(operations) == 1 and operations[0].name else None
+        return cls(text=text, operation_name=operation_name)
+
+
+def load_queries(folder: Path = GRAPHQL_FOLDER) -> Dict[str, CompiledQuery]:
+    """Loads and parses every `.graphql` file of a folder, keyed by file name."""
+    return {path.name: CompiledQuery.from_text(path.read_text()) for path in sorted(folder.glob('*.graphql'))}
+
+
+# Loaded once, when the module is imported.
+QUERIES = load_queries()
+
+
+class GraphQLClient:
+    """
+    Sends GraphQL queries over one pooled keep-alive session.
+
+    Each response body is parsed once. With `cache_size` above 0, the data of the most recent
+    (query, variables) pairs is kept and returned without a request; versions are immutable,
+    so this is safe for version and object queries. The client can be shared between threads.
+    """
+
+    def __init__(self, endpoint: str, token: Optional[str] = None, session: Optional[requests.Session] = None,
+                 cache_size: int = 0, timeout: float = 60, pool_size: int = 10) -> None:
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self.cache_size = cache_size
+        self.cache: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        self.lock = threading.Lock()
+
+        if session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
+        self.session.headers.update({"content-type": "application/json", "accept": "application/json"})
+        if token:
+            self.session.headers.update({"Authorization": f"Bearer {token}"})
+
+    def post(self, query: Union[str, CompiledQuery], variables: Optional[dict] = None, operation_name: Optional[str] = None) -> requests.Response:
+        """Sends one query and returns the raw response."""
+        if isinstance(query, CompiledQuery):
+            operation_name = operation_name or query.operation_name
+            query = query.text
+        return self.session.post(self.endpoint, json={
+            "query": query,
+            "operationName": operation_name,
+            "variables": variables or {},
+        }, timeout=self.timeout)
+
+    @staticmethod
+    def get_data(json_response: dict) -> Any:
+        """
+        Gets the data of a parsed response.
+
+        Raises:
+            GraphQLResponseError: When the response has no data.
+        """
+        if "errors" in json_response:
+            print(f"GraphQL response returned errors: {json_response['errors']}")
+        if "data" not in json_response or json_response["data"] is None:
+            raise GraphQLResponseError(f"GraphQL response has no data! Errors: {json_response.get('errors')}")
+        return json_response["data"]
+
+    def execute(self, query: Union[str, CompiledQuery], variables: Optional[dict] = None, operation_name: Optional[str] = None) -> Any:
+        """
+        Sends a query, or answers it from the cache, and returns the data of the response.
+
+        Args:
+            query (Union[str, CompiledQuery]): The query, e.g. one of `QUERIES`.
+            variables (Optional[dict]): The query variables.
+            operation_name (Optional[str]): The operation to run. Defaults to the compiled query's operation.
+
+        Returns:
+            Any: The `data` of the response.
+        """
+        cache_key = None
+        if self.cache_size > 0:
+            query_text = query.text if isinstance(query, CompiledQuery) else query
+            cache_key = (query_text, json.dumps(variables or {}, sort_keys=True))
+            with self.lock:
+                if cache_key in self.cache:
+                    self.cache.move_to_end(cache_key)
+                    return self.cache[cache_key]
+
+        response = self.post(query, variables, operation_name)
+        data = self.get_data(response.json())
+
+        if cache_key is not None:
+            with self.lock:
+                self.cache[cache_key] = data
+                while len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+        return data
+
+    def close(self) -> None:
+        self.session.close()
@@ -0,0 +1,211 @@
+"""Helper module for a columnar grouping of object data by Uniclass system."""
+
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from parameter_store import ParameterStore
+
+CLASSIFICATION_PARAMETER = 'Classification.Uniclass.Ss.Description'
+
+
+def get_parameter_label(param_info: dict) -> str:
+    """Get the column label of a parameter, `name (units)` or just `name` when it has no units."""
+    param_label = param_info['name']
+    if param_info.get('units') is not None:
+        param_label += f" ({param_info['units']})"
+    return param_label
+
+
+def parameters_to_long_table(data: Iterable[dict], label_index: Dict[str, int]) -> Tuple[List[int], List[int], List, List[int], Dict]:
+    """
+    Normalizes the parameters of each object into a long table of (row, label, value) entries.
+
+    Args:
+        data (Iterable[dict]): The data of each object, in row order.
+        label_index (Dict[str, int]): Codes of the labels seen so far. New labels are added in
+            order of first appearance.
+
+    Returns:
+        Tuple: The row, label code and value of each entry, the system code of each row (-1 when
+            the row is not classified) and the systems keyed by their description.
+    """
+    entry_rows, entry_labels, entry_values = [], [], []
+    add_row, add_label, add_value = entry_rows.append, entry_labels.append, entry_values.append
+    row_systems = []
+    system_index = {}
+    # Label codes keyed by (name, units), so each label string is built once.
+    code_by_name_units = {}
+
+    for row, object_data in enumerate(data):
+        parameters = object_data.get('parameters')
+        classification_desc = None
+
+        if parameters:
+            for param_info in parameters.values():
+                if isinstance(param_info, dict):
+                    param_name = param_info['name']
+                    if param_name == CLASSIFICATION_PARAMETER:
+                        classification_desc = param_info['value']
+                        continue
+                    name_units = (param_name, param_info.get('units'))
+                    label_code = code_by_name_units.get(name_units)
+                    if label_code is None:
+                        param_label = get_parameter_label(param_info)
+                        label_code = label_index.setdefault(param_label, len(label_index))
+                        code_by_name_units[name_units] = label_code
+                    add_row(row)
+                    add_label(label_code)
+                    add_value(param_info['value'])
+
+        if classification_desc:
+            row_systems.append(system_index.setdefault(classification_desc, len(system_index)))
+        else:
+            row_systems.append(-1)
+
+    return entry_rows, entry_labels, entry_values, row_systems, system_index
+
+
+def iter_system_blocks(id_frame: pd.DataFrame, data: Iterable[dict]) -> Iterator[Tuple[str, List[str], np.ndarray]]:
+    """
+    Groups the objects by `Classification.Uniclass.Ss.Description` and yields one object block per system.
+
+    The parameters are normalized into a long table once, split by system, and pivoted into
+    one block per system, so no Python dict or DataFrame is built per row. The columns match
+    building each system's DataFrame from one dict per row: the id columns first, then the
+    parameter columns in order of first appearance with the classification column after the
+    first row's parameters. Missing values are NaN.
+
+    Args:
+        id_frame (pd.DataFrame): The identifying columns of each object, e.g. 'Model URL',
+            'Version Object ID' and 'Object ID'.
+        data (Iterable[dict]): The data of each object, in the same order as `id_frame`.
+
+    Yields:
+        Tuple[str, List[str], np.ndarray]: The system description, the column names and the
+            rows of the system as a 2D object array.
+    """
+    id_columns = list(id_frame.columns)
+    # Parameters with the same label as an id column overwrite it, like a dict per row would.
+    label_index = {column: code for code, column in enumerate(id_columns)}
+
+    entry_rows, entry_labels, entry_values, row_systems, system_index = parameters_to_long_table(data, label_index)
+
+    labels = np.empty(len(label_index), dtype=object)
+    labels[:] = list(label_index)
+    entry_rows = np.asarray(entry_rows, dtype=np.intp)
+    entry_labels = np.asarray(entry_labels, dtype=np.intp)
+    values = np.empty(len(entry_values), dtype=object)
+    values[:] = entry_values
+    row_systems = np.asarray(row_systems, dtype=np.intp)
+    id_values = id_frame.to_numpy(dtype=object)
+
+    # Split rows and entries by system once; the stable sort keeps them in row order.
+    row_order = np.argsort(row_systems, kind='stable')
+    row_bounds = np.searchsorted(row_systems[row_order], np.arange(len(system_index) + 1))
+    entry_systems = row_systems[entry_rows]
+    entry_order = np.argsort(entry_systems, kind='stable')
+    entry_bounds = np.searchsorted(entry_systems[entry_order], np.arange(len(system_index) + 1))
+
+    local_rows = np.empty(len(row_systems), dtype=np.intp)
+    label_columns = np.empty(len(labels), dtype=np.intp)
+
+    for classification_desc, system_code in system_index.items():
+        system_rows = row_order[row_bounds[system_code]:row_bounds[system_code + 1]]
+        system_entries = entry_order[entry_bounds[system_code]:entry_bounds[system_code + 1]]
+        local_rows[system_rows] = np.arange(len(system_rows))
+        rows = local_rows[entry_rows[system_entries]]
+        codes = entry_labels[system_entries]
+
+        # Parameter columns in order of first appearance, without the id columns.
+        unique_codes, first_seen = np.unique(codes, return_index=True)
+        is_parameter = unique_codes >= len(id_columns)
+        unique_codes, first_seen = unique_codes[is_parameter], first_seen[is_parameter]
+        appearance = np.argsort(first_seen, kind='stable')
+        parameter_codes = unique_codes[appearance]
+        # The classification column goes after the parameters of the system's first row.
+        first_row_entries = np.searchsorted(rows, 0, side='right')
+        classification_position = len(id_columns) + int(np.count_nonzero(first_seen < first_row_entries))
+
+        label_columns[np.arange(len(id_columns))] = np.arange(len(id_columns))
+        label_columns[parameter_codes] = np.arange(len(parameter_codes)) + len(id_columns)
+        label_columns[parameter_codes[classification_position - len(id_columns):]] += 1
+        columns = id_columns + list(labels[parameter_codes])
+        columns.insert(classification_position, CLASSIFICATION_PARAMETER)
+
+        block = np.full((len(system_rows), len(columns)), np.nan, dtype=object)
+        block[:, :len(id_columns)] = id_values[system_rows]
+        block[:, classification_position] = classification_desc
+
+        # A label repeated within a row keeps its last value, like a dict per row would.
+        cells = rows * len(columns) + label_columns[codes]
+        _, last_seen = np.unique(cells[::-1], return_index=True)
+        last_entries = len(cells) - 1 - last_seen
+        block[rows[last_entries], label_columns[codes[last_entries]]] = values[system_entries[last_entries]]
+
+        yield classification_desc, columns, block
+
+
+def group_by_system_classification(id_frame: pd.DataFrame, data: Iterable[dict]) -> Dict[str, pd.DataFrame]:
+    """
+    Groups the objects into one DataFrame per `Classification.Uniclass.Ss.Description`.
+
+    The DataFrames match building each system's DataFrame from one dict per row, including
+    the dtypes pandas would infer from those rows. See `iter_system_blocks`.
+
+    Args:
+        id_frame (pd.DataFrame): The identifying columns of each object.
+        data (Iterable[dict]): The data of each object, in the same order as `id_frame`.
+
+    Returns:
+        Dict[str, pd.DataFrame]: The DataFrame of each system, keyed by its description.
+    """
+    systems_dfs = {}
+    for classification_desc, columns, block in iter_system_blocks(id_frame, data):
+        systems_dfs[classification_desc] = pd.DataFrame(block, columns=columns).infer_objects()
+
+    return systems_dfs
+
+
+class SystemBlockAccumulator:
+    """
+    Groups objects that arrive page by page, keeping only the compact columns of each page.
+
+    Each page is grouped with `iter_system_blocks` as it arrives and its blocks are added to a
+    `ParameterStore`, so the object data and the blocks of the page can be dropped before the
+    next page. The merged blocks match grouping all pages at once: systems and parameter
+    columns keep their order of first appearance, and the classification column stays after
+    the parameters of each system's first row.
+    """
+
+    def __init__(self) -> None:
+        self.store = ParameterStore()
+        self.rows = 0
+
+    def __len__(self) -> int:
+        """The number of systems."""
+        return len(self.store)
+
+    def add(self, id_frame: pd.DataFrame, data: Iterable[dict]) -> None:
+        """Groups one page of objects, see `iter_system_blocks`."""
+        for classification_desc, columns, block in iter_system_blocks(id_frame, data):
+            self.store.add_block(classification_desc, columns, block)
+        self.rows += len(id_frame)
+
+    def merge(self, other: "SystemBlockAccumulator") -> None:
+        """Appends the objects another accumulator grouped, as if its pages were added after the pages added so far."""
+        self.store.merge(other.store)
+        self.rows += other.rows
+
+    def iter_blocks(self) -> Iterator[Tuple[str, List[str], np.ndarray]]:
+        """Yields the merged block of each system, releasing the stored columns as it goes."""
+        return self.store.iter_blocks()
+
+    def to_dataframes(self) -> Dict[str, pd.DataFrame]:
+        """The DataFrame of each system, like `group_by_system_classification` on all pages."""
+        systems_dfs = {}
+        for classification_desc in list(self.store.systems):
+            systems_dfs[classification_desc] = self.store.get_dataframe(classification_desc)
+            self.store.pop_system(classification_desc)
+        return systems_dfs
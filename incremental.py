@@ -0,0 +1,218 @@
+"""Helper module for incremental exports that only reprocess the objects changed since the last run."""
+
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+STATE_FILE_NAME = 'state.json'
+SYSTEMS_FOLDER_NAME = 'systems'
+# Bumped when the layout of the state changes, so states written by older versions are rebuilt.
+STATE_VERSION = 3
+
+
+def write_system(df: pd.DataFrame, path: str) -> None:
+    """
+    Writes the DataFrame of one system as JSON columns and rows.
+
+    The values keep their Python types, also in columns that mix text and numbers, and floats
+    are written exactly. Reading the file back does not run any code from it, unlike a pickle.
+    """
+    with open(path, 'w') as file:
+        json.dump({'columns': list(df.columns), 'data': df.to_numpy(dtype=object).tolist()}, file)
+
+
+def read_system(path: str) -> pd.DataFrame:
+    """Reads the DataFrame of one system written by `write_system`, with the dtypes pandas infers from its rows."""
+    with open(path, 'r') as file:
+        saved = json.load(file)
+    return pd.DataFrame(saved['data'], columns=saved['columns']).infer_objects()
+
+
+@dataclass
+class ChangeSet:
+    """
+    The objects that differ between the last processed version and the current one.
+
+    Object ids are content hashes, so an edited element shows up as a removed id and an added
+    id. Such pairs that share an `applicationId` are also listed in `changed`. With type
+    parameters, an instance whose type was edited keeps its id, so it is listed as removed,
+    added and changed under that same id.
+    """
+
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    changed: List[Tuple[str, str]] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        return f"{len(self.added)} added, {len(self.removed)} removed, {len(self.changed)} changed"
+
+
+class IncrementalState:
+    """
+    The object ids and per-system results of the last processed version of a model.
+
+    The state is a folder with a `state.json` file, holding the version, the system and
+    application id of every object, and one JSON file per system, see `write_system`.
+
+    The state also keeps the `settings` that shaped the saved systems, e.g. the parameter
+    projection and the joined type parameters. A state saved with other settings is not
+    reused, since its systems would not have the same columns as newly extracted rows.
+    """
+
+    def __init__(self, path: str, model_url: Optional[str] = None, settings: Optional[Dict[str, Any]] = None) -> None:
+        self.path = path
+        self.model_url = model_url
+        self.settings = settings or {}
+        self.version_object_id = None
+        # object id -> [system description or None, applicationId or None, object id of its type or None]
+        self.objects: Dict[str, list] = {}
+        self.systems_df: Dict[str, pd.DataFrame] = {}
+
+    @classmethod
+    def load(cls, path: str, model_url: str, settings: Optional[Dict[str, Any]] = None) -> "IncrementalState":
+        """
+        Loads the state of a model, or an empty state when there is none, it is for another model or
+        other settings, or it was written in an older layout.
+
+        Args:
+            path (str): The state folder.
+            model_url (str): The model the state must belong to.
+            settings (Optional[Dict[str, Any]]): The JSON-serializable settings of this run that
+                shape the systems, which the state must have been saved with.
+
+        Returns:
+            IncrementalState: The state of the last processed version.
+        """
+        state = cls(path, model_url, settings)
+        state_file = os.path.join(path, STATE_FILE_NAME)
+        if not os.path.exists(state_file):
+            return state
+
+        with open(state_file, 'r') as file:
+            saved = json.load(file)
+        if saved.get('model_url') != model_url or saved.get('state_version') != STATE_VERSION \
+                or saved.get('settings') != json.loads(json.dumps(state.settings)):
+            return state
+
+        state.version_object_id = saved['version_object_id']
+        state.objects = saved['objects']
+        for classification_desc, file_name in saved['systems'].items():
+            state.systems_df[classification_desc] = read_system(os.path.join(path, SYSTEMS_FOLDER_NAME, file_name))
+        return state
+
+    def save(self) -> None:
+        """Writes the state, replacing the previous one."""
+        systems_folder = os.path.join(self.path, SYSTEMS_FOLDER_NAME)
+        os.makedirs(systems_folder, exist_ok=True)
+        for file_name in os.listdir(systems_folder):
+            os.remove(os.path.join(systems_folder, file_name))
+
+        systems = {}
+        for number, (classification_desc, df) in enumerate(self.systems_df.items()):
+            file_name = f"{number}.json"
+            write_system(df, os.path.join(systems_folder, file_name))
+            systems[classification_desc] = file_name
+
+        with open(os.path.join(self.path, STATE_FILE_NAME), 'w') as file:
+            json.dump({
+                'state_version': STATE_VERSION,
+                'model_url': self.model_url,
+                'settings': self.settings,
+                'version_object_id': self.version_object_id,
+                'objects': self.objects,
+                'systems': systems,
+            }, file)
+
+    def diff(self, object_ids: List[str], application_ids: Optional[Dict[str, Optional[str]]] = None,
+             type_object_ids: Optional[Dict[str, Optional[str]]] = None) -> ChangeSet:
+        """
+        Compares the object ids of the current version with the last processed version.
+
+        Args:
+            object_ids (List[str]): The object ids of the current version.
+            application_ids (Optional[Dict[str, Optional[str]]]): The applicationId of the current
+                objects, used to pair removed and added ids into changed objects.
+            type_object_ids (Optional[Dict[str, Optional[str]]]): The object id of the type of each
+                current instance, when type parameters are joined. Instances whose type object
+                changed are extracted again, since their joined type parameters may have changed.
+
+        Returns:
+            ChangeSet: The added, removed and changed objects.
+        """
+        current_ids = dict.fromkeys(object_ids)
+        retyped = set()
+        if type_object_ids is not None:
+            retyped = {id for id in current_ids if id in self.objects and self.objects[id][2] != type_object_ids.get(id)}
+        added = [id for id in current_ids if id not in self.objects or id in retyped]
+        removed = [id for id in self.objects if id not in current_ids or id in retyped]
+
+        changed = []
+        if application_ids:
+            removed_by_application_id = {self.objects[id][1]: id for id in removed if self.objects[id][1] and id not in retyped}
+            for id in added:
+                old_id = removed_by_application_id.get(application_ids.get(id)) if id not in retyped else None
+                if old_id is not None:
+                    changed.append((old_id, id))
+        changed.extend((id, id) for id in added if id in retyped)
+
+        return ChangeSet(added=added, removed=removed, changed=changed)
+
+    def apply(self, changes: ChangeSet, new_systems_df: Dict[str, pd.DataFrame], version_object_id: str,
+              application_ids: Optional[Dict[str, Optional[str]]] = None,
+              type_object_ids: Optional[Dict[str, Optional[str]]] = None) -> Dict[str, pd.DataFrame]:
+        """
+        Merges the grouped added objects into the previous results and updates the state.
+
+        Only systems that lost or gained objects are rebuilt. Their kept rows come first and
+        the added rows after them; parameters new to a system are added as columns at the end.
+        Every other system's DataFrame is reused as it is, with its 'Version Object ID' set to
+        the current version.
+
+        Args:
+            changes (ChangeSet): The changes from `diff`.
+            new_systems_df (Dict[str, pd.DataFrame]): The added objects grouped by system.
+            version_object_id (str): The object id of the current version.
+            application_ids (Optional[Dict[str, Optional[str]]]): The applicationId of the added objects.
+            type_object_ids (Optional[Dict[str, Optional[str]]]): The object id of the type of each
+                added instance, see `diff`.
+
+        Returns:
+            Dict[str, pd.DataFrame]: The DataFrame of each system for the current version.
+        """
+        application_ids = application_ids or {}
+        type_object_ids = type_object_ids or {}
+        removed_ids = set(changes.removed)
+        affected_systems = {self.objects[id][0] for id in changes.removed if self.objects[id][0] is not None}
+        affected_systems.update(new_systems_df)
+
+        systems_df = {}
+        for classification_desc in list(self.systems_df) + [desc for desc in new_systems_df if desc not in self.systems_df]:
+            previous_df = self.systems_df.get(classification_desc)
+            if classification_desc not in affected_systems:
+                systems_df[classification_desc] = previous_df
+            else:
+                frames = []
+                if previous_df is not None:
+                    frames.append(previous_df[~previous_df['Object ID'].isin(removed_ids)])
+                if classification_desc in new_systems_df:
+                    frames.append(new_systems_df[classification_desc])
+                frames = [df for df in frames if len(df)]
+                if frames:
+                    systems_df[classification_desc] = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0].reset_index(drop=True)
+            if classification_desc in systems_df:
+                systems_df[classification_desc] = systems_df[classification_desc].assign(**{'Version Object ID': version_object_id})
+
+        for id in changes.removed:
+            del self.objects[id]
+        for id in changes.added:
+            self.objects[id] = [None, application_ids.get(id), type_object_ids.get(id)]
+        for classification_desc, df in new_systems_df.items():
+            for id in df['Object ID']:
+                self.objects[id][0] = classification_desc
+
+        self.version_object_id = version_object_id
+        self.systems_df = systems_df
+        return systems_df
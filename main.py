@@ -3,6 +3,8 @@
 Use the automation_context module to wrap your function in an Autamate context helper
 """
 import os
+import warnings
+from typing import Optional
 
 # from dotenv import load_dotenv
 from pydantic import Field, SecretStr, DirectoryPath 
@@ -11,10 +13,11 @@ from speckle_automate import (
     AutomationContext,
     execute_automate_function,
 )
-from accessing_system_specific_data import AccessSystemSpecificData
-from SpecklePy_accessing_system_specific_data import AccessSystemSpecificDataSpecklePy
-from specklepy.api.client import SpeckleClient
-from specklepy.api.credentials import get_account_from_token
+from export_plan import ExportPlan
+
+# The extraction modules pull in pandas, numpy and the specklepy client, so they are imported in
+# `automate_function`: `generate_schema` and the startup of a run do not wait for them.
+# The legacy GraphQL extraction (accessing_system_specific_data) is not used by the function.
 
 # from flatten import flatten_base
 
@@ -32,6 +35,58 @@ class FunctionInputs(AutomateBase):
         title="Insert the path to the folder where you want to save the Excel output.",
         # description="Ensure the folder path is enclosed in '' or  ""."
                     )
+    export_formats: str = Field(
+        default="xlsx",
+        title="Comma-separated export formats: xlsx, parquet and/or arrow. Parquet and Arrow write one partition per Uniclass system.",
+                    )
+    uniclass_summary: bool = Field(
+        default=False,
+        title="Add element counts and numeric parameter sums per Uniclass Ss group, subgroup and system, as a Summary sheet and a Systems_data_summary.parquet file.",
+                    )
+    object_cache_path: Optional[str] = Field(
+        default=None,
+        title="Optional path to a local object cache file, kept between runs so unchanged objects are not downloaded again.",
+                    )
+    object_cache_max_size_mb: int = Field(
+        default=2048,
+        title="The maximum size of the local object cache in MB.",
+                    )
+    incremental_state_path: Optional[str] = Field(
+        default=None,
+        title="Optional path to a folder that keeps the last processed version, so only changed elements are reprocessed.",
+                    )
+    type_parameters: str = Field(
+        default="",
+        title="Optional comma-separated names of type parameters to add to each element's row, instead of exporting type objects as rows of their own.",
+                    )
+    parameter_columns: str = Field(
+        default="",
+        title="Optional comma-separated names of the parameters to export. Other parameters are skipped.",
+                    )
+    parameter_projection_path: Optional[str] = Field(
+        default=None,
+        title="Optional path to a JSON file listing the parameters to export, globally ('columns') or per Uniclass Ss code ('systems').",
+                    )
+    extraction_workers: int = Field(
+        default=0,
+        title="The number of processes that extract and group the objects in parallel. 0 uses the main process only. Not used with an incremental state folder or a version count above 1.",
+                    )
+    version_count: int = Field(
+        default=1,
+        title="The number of latest versions of the triggering model to export into one table per system, with a Version ID column. Objects shared by versions are processed once. Above 1, the Uniclass summary and the incremental state folder are not used.",
+                    )
+    profile_run: bool = Field(
+        default=False,
+        title="Write a JSON report with the time, object counts and memory of each processing stage.",
+                    )
+    trace_memory: bool = Field(
+        default=False,
+        title="Also measure the peak Python memory of each stage in the profiling report. Slows the run down.",
+                    )
+    attach_profile_report: bool = Field(
+        default=False,
+        title="Attach the profiling report to the automation run.",
+                    )
 
 
 def automate_function(
@@ -49,6 +104,11 @@ def automate_function(
     """
 
     print("The script has started.")
+    from SpecklePy_accessing_system_specific_data import AccessSystemSpecificDataSpecklePy
+    from object_cache import ObjectCache
+    from profiling import StageProfiler
+    from projection import ParameterProjection
+
     client = automate_context.speckle_client
     # TOKEN = client.account.token
     # # token = function_inputs.user_token
@@ -92,11 +152,58 @@ def automate_function(
     os.environ['CURL_CA_BUNDLE'] = certificate
 
 
-    access_system_data = AccessSystemSpecificDataSpecklePy(model_url=model_url, project_id=project_id, server=server, token=token)
-    systems_df = access_system_data.process_speckle_data(folder_path=DirectoryPath(function_inputs.folder_path))
+    # Each format is encoded once into the chosen folder and copied to the working directory.
+    # Set attach_to_automation=True to also attach the files to the run with store_file_result.
+    export_formats = [file_format.strip() for file_format in function_inputs.export_formats.split(',') if file_format.strip()]
+    export_plan = ExportPlan(destinations=[DirectoryPath(function_inputs.folder_path), '.'], formats=export_formats, file_stem='Systems_data',
+                             summary=function_inputs.uniclass_summary)
+
+    object_cache = None
+    if function_inputs.object_cache_path:
+        object_cache = ObjectCache(function_inputs.object_cache_path, max_size_bytes=function_inputs.object_cache_max_size_mb * 1024 ** 2)
+
+    type_parameters = [name.strip() for name in function_inputs.type_parameters.split(',') if name.strip()] or None
+    parameter_columns = [name.strip() for name in function_inputs.parameter_columns.split(',') if name.strip()]
+    projection = ParameterProjection.from_inputs(parameter_columns, function_inputs.parameter_projection_path)
+
+    profiler = StageProfiler(enabled=function_inputs.profile_run, trace_memory=function_inputs.trace_memory)
+
+    # A version history follows the model that triggered the run, not every model of the project.
+    model_id = None
+    if function_inputs.version_count > 1:
+        model_id = automate_context.automation_run_data.triggers[0].payload.model_id
+
+    access_system_data = AccessSystemSpecificDataSpecklePy(model_url=model_url, project_id=project_id, server=server, token=token,
+                                                           object_cache=object_cache, profiler=profiler, model_id=model_id)
+    try:
+        if function_inputs.version_count > 1:
+            ignored_inputs = [name for name, value in [('uniclass_summary', function_inputs.uniclass_summary),
+                                                       ('incremental_state_path', function_inputs.incremental_state_path),
+                                                       ('extraction_workers', function_inputs.extraction_workers)] if value]
+            if ignored_inputs:
+                warnings.warn(f"Ignoring {', '.join(ignored_inputs)}: not used when exporting {function_inputs.version_count} versions.")
+            history_plan = ExportPlan(destinations=export_plan.destinations, formats=export_formats, file_stem='Systems_history')
+            access_system_data.export_version_history(history_plan, function_inputs.version_count, automate_context=automate_context,
+                                                      type_parameters=type_parameters, projection=projection)
+        elif function_inputs.incremental_state_path:
+            access_system_data.process_speckle_data(export_plan=export_plan, automate_context=automate_context,
+                                                    incremental_state_path=function_inputs.incremental_state_path,
+                                                    type_parameters=type_parameters, projection=projection)
+        else:
+            # The systems are not needed here, so they are written straight from the lazy pipeline.
+            access_system_data.export_speckle_data(export_plan, automate_context=automate_context,
+                                                   type_parameters=type_parameters, projection=projection,
+                                                   extraction_workers=function_inputs.extraction_workers)
+    finally:
+        if object_cache is not None:
+            object_cache.close()
+
+    if profiler.enabled:
+        report_plan = ExportPlan(destinations=export_plan.destinations, formats=['json'], file_stem='Profile_report',
+                                 attach_to_automation=function_inputs.attach_profile_report)
+        report_plan.execute({'json': profiler.write_json}, automate_context=automate_context)
     # systems_df = access_system_data.process_speckle_data()
     # print(f"Systems_df: {systems_df}")
-    access_system_data.export_to_excel(dataframes_dict=systems_df, excel_filename='Systems_data.xlsx')
     
 
 
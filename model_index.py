@@ -0,0 +1,103 @@
+"""Helper module for indexing the objects of a received version in one traversal."""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from specklepy.objects.base import Base
+
+from flatten import COLLECTION_SPECKLE_TYPE, BaseTraversal
+
+# The top-level collections of a Revit model that hold objects with data.
+KEYS_WITH_DATA = ['@Materials', '@Views', '@Project Information', '@Sheets', 'elements']
+TYPES_KEY = '@Types'
+
+
+@dataclass
+class ModelIndex:
+    """
+    The objects of a version that hold data, with where they were found.
+
+    Attributes:
+        object_ids (List[str]): The object ids, without duplicates, in traversal order.
+        objects (Dict[str, Base]): The objects keyed by object id.
+        speckle_types (Dict[str, str]): The speckle_type of each object.
+        collections (Dict[str, str]): The collection each object was found in, e.g. 'elements',
+            '@Materials' or '@Types/@Walls' for the type objects of a category.
+        parents (Dict[str, Optional[str]]): The id of the object that holds each object.
+    """
+
+    object_ids: List[str] = field(default_factory=list)
+    objects: Dict[str, Base] = field(default_factory=dict)
+    speckle_types: Dict[str, str] = field(default_factory=dict)
+    collections: Dict[str, str] = field(default_factory=dict)
+    parents: Dict[str, Optional[str]] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.object_ids)
+
+    def add(self, element: Base, collection: str, parent_id: Optional[str]) -> None:
+        if element.id in self.objects:
+            return
+        self.object_ids.append(element.id)
+        self.objects[element.id] = element
+        self.speckle_types[element.id] = element.speckle_type
+        self.collections[element.id] = collection
+        self.parents[element.id] = parent_id
+
+    def get_collection_ids(self, collection: str) -> List[str]:
+        """The ids of the objects found in one collection."""
+        return [id for id in self.object_ids if self.collections[id] == collection]
+
+    def is_type(self, id: str) -> bool:
+        """Whether the object is a type object from a `@Types` category."""
+        return self.collections[id].startswith(TYPES_KEY + '/')
+
+    @property
+    def type_ids(self) -> List[str]:
+        return [id for id in self.object_ids if self.is_type(id)]
+
+    @property
+    def instance_ids(self) -> List[str]:
+        return [id for id in self.object_ids if not self.is_type(id)]
+
+
+def get_roots(base_object: Base, keys_with_data: Optional[List[str]] = None) -> List[Tuple[Any, str, Optional[str]]]:
+    """The (value, collection, parent id) the traversal of a version starts from, in collection order."""
+    roots = [(getattr(base_object, key, None), key, base_object.id) for key in (keys_with_data if keys_with_data is not None else KEYS_WITH_DATA)]
+
+    types_base = getattr(base_object, TYPES_KEY, None)
+    if isinstance(types_base, Base):
+        # Sorted, like the serializer writes them; the member names come from a set.
+        for key in sorted(types_base.get_dynamic_member_names()):
+            if key.startswith('@'):
+                roots.append((getattr(types_base, key, None), f"{TYPES_KEY}/{key}", types_base.id))
+    return roots
+
+
+def index_model(base_object: Base, keys_with_data: Optional[List[str]] = None, traversal: Optional[BaseTraversal] = None) -> ModelIndex:
+    """
+    Walks the received version once and indexes the objects that hold data.
+
+    The objects are the ones in the `keys_with_data` collections of the root and in each
+    `@`-prefixed category of `@Types`, with the objects nested in their `elements`, like
+    hosted elements and curtain wall panels. Keys the model does not have are skipped.
+    Nested collections, as sent by newer connectors, are walked into; the collections
+    themselves are not indexed.
+
+    Args:
+        base_object (Base): The received Speckle Base object of the version.
+        keys_with_data (Optional[List[str]]): The root collections to index. Defaults to `KEYS_WITH_DATA`.
+        traversal (Optional[BaseTraversal]): The members to follow and the objects to skip below
+            the collections. Defaults to following `elements`, without filters.
+
+    Returns:
+        ModelIndex: The ids, objects, speckle types, collections and parents of the objects.
+    """
+    index = ModelIndex()
+    traversal = traversal or BaseTraversal(include_collections=False)
+
+    for traversed in traversal.walk_roots(get_roots(base_object, keys_with_data)):
+        if traversed.base.id is not None:
+            index.add(traversed.base, traversed.collection, traversed.parent_id)
+
+    return index
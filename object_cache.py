@@ -0,0 +1,228 @@
+"""Helper module for a persistent, size-bounded local cache of Speckle objects."""
+
+import json
+import os
+import sqlite3
+from typing import Dict, Iterable, List, Optional
+
+from specklepy.logging.exceptions import SpeckleException
+from specklepy.transports.abstract_transport import AbstractTransport
+
+# SQLite limits the number of parameters in one statement.
+SQLITE_BATCH_SIZE = 900
+
+
+class ObjectCache(AbstractTransport):
+    """
+    An on-disk cache of serialized objects keyed by object id, with least recently used eviction.
+
+    Speckle objects are content-addressed, so an id always refers to the same data and cached
+    objects never go stale. The cache is a transport: pass it as the `local_transport` of
+    `operations.receive` and the `ServerTransport` only downloads the children it does not
+    already have. When the cache is closed and has grown past `max_size_bytes`, the least
+    recently used objects are removed. Eviction waits for `close` so that objects received
+    in the current run stay readable until the run is done.
+
+    Writes and last-used updates are buffered and flushed in batches. The connection must
+    only be used from the thread that created the cache.
+    """
+
+    def __init__(self, path: str, max_size_bytes: int = 2 * 1024 ** 3, name: str = "ObjectCache") -> None:
+        super().__init__()
+        self._name = name
+        self.path = path
+        self.max_size_bytes = max_size_bytes
+
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS objects (id TEXT PRIMARY KEY, data TEXT NOT NULL, size INTEGER NOT NULL, last_used INTEGER NOT NULL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS objects_last_used ON objects (last_used)")
+        self.connection.commit()
+
+        self.clock = self.connection.execute("SELECT COALESCE(MAX(last_used), 0) FROM objects").fetchone()[0]
+        self.pending_objects = {}
+        self.pending_uses = {}
+
+    def __repr__(self) -> str:
+        return f"ObjectCache(path: '{self.path}', max_size_bytes: {self.max_size_bytes})"
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def tick(self) -> int:
+        self.clock += 1
+        return self.clock
+
+    def begin_write(self) -> None:
+        pass
+
+    def end_write(self) -> None:
+        self.flush()
+
+    def save_object(self, id: str, serialized_object: str) -> None:
+        self.pending_objects[id] = serialized_object
+        self.pending_uses[id] = self.tick()
+        if len(self.pending_objects) >= SQLITE_BATCH_SIZE:
+            self.flush()
+
+    def save_object_from_transport(self, id: str, source_transport: AbstractTransport) -> None:
+        self.save_object(id, source_transport.get_object(id))
+
+    def get_object(self, id: str) -> Optional[str]:
+        if id in self.pending_objects:
+            return self.pending_objects[id]
+        row = self.connection.execute("SELECT data FROM objects WHERE id = ?", (id,)).fetchone()
+        if row is None:
+            return None
+        self.pending_uses[id] = self.tick()
+        return row[0]
+
+    def get_objects(self, id_list: Iterable[str]) -> Dict[str, str]:
+        """
+        Get the cached objects out of a list of ids, in batched queries.
+
+        Args:
+            id_list (Iterable[str]): The ids to look up.
+
+        Returns:
+            Dict[str, str]: The serialized objects that are in the cache, keyed by id.
+        """
+        self.flush()
+        found = {}
+        for batch in self.batches(id_list):
+            placeholders = ",".join("?" * len(batch))
+            found.update(self.connection.execute(f"SELECT id, data FROM objects WHERE id IN ({placeholders})", batch))
+        for id in found:
+            self.pending_uses[id] = self.tick()
+        return found
+
+    def has_objects(self, id_list: List[str]) -> Dict[str, bool]:
+        self.flush()
+        found = set()
+        for batch in self.batches(id_list):
+            placeholders = ",".join("?" * len(batch))
+            found.update(row[0] for row in self.connection.execute(f"SELECT id FROM objects WHERE id IN ({placeholders})", batch))
+        return {id: id in found for id in id_list}
+
+    def has_complete_object(self, id: str) -> bool:
+        """
+        Check that an object and all the children in its closure are cached.
+
+        `operations.receive` assumes every child is cached once the parent is, which eviction
+        can break, so check this before receiving through the cache.
+
+        Args:
+            id (str): The id of the parent object.
+
+        Returns:
+            bool: True when the object and all its children are cached.
+        """
+        serialized_object = self.get_object(id)
+        if serialized_object is None:
+            return False
+        children_ids = list(json.loads(serialized_object).get("__closure", {}))
+        return all(self.has_objects(children_ids).values())
+
+    def discard(self, id: str) -> None:
+        """Remove an object from the cache."""
+        self.flush()
+        self.connection.execute("DELETE FROM objects WHERE id = ?", (id,))
+        self.connection.commit()
+
+    def copy_object_and_children(self, id: str, target_transport: AbstractTransport) -> str:
+        """
+        Copies a cached object and the children in its closure into another transport.
+
+        Like `ServerTransport`, only the children the target transport does not have yet are copied.
+
+        Args:
+            id (str): The id of the parent object.
+            target_transport (AbstractTransport): The transport to copy the objects into.
+
+        Returns:
+            str: The serialized parent object.
+
+        Raises:
+            SpeckleException: When the object or one of its children is not cached.
+        """
+        serialized_object = self.get_object(id)
+        if serialized_object is None:
+            raise SpeckleException(f"Object {id} is not in the object cache {self.path}.")
+        children_ids = list(json.loads(serialized_object).get("__closure", {}))
+        present = target_transport.has_objects(children_ids)
+        missing_ids = [child_id for child_id in children_ids if not present[child_id]]
+        children = self.get_objects(missing_ids)
+        if len(children) < len(missing_ids):
+            raise SpeckleException(f"Object {id} is not complete in the object cache {self.path}: "
+                                   f"{len(missing_ids) - len(children)} of its children are missing.")
+
+        target_transport.begin_write()
+        for child_id in missing_ids:
+            target_transport.save_object(child_id, children[child_id])
+        target_transport.save_object(id, serialized_object)
+        target_transport.end_write()
+        return serialized_object
+
+    def flush(self) -> None:
+        """Writes the buffered objects and last-used updates."""
+        if self.pending_objects:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO objects (id, data, size, last_used) VALUES (?, ?, ?, ?)",
+                [(id, data, len(data.encode("utf-8")), self.pending_uses.pop(id)) for id, data in self.pending_objects.items()],
+            )
+            self.pending_objects = {}
+        if self.pending_uses:
+            self.connection.executemany(
+                "UPDATE objects SET last_used = ? WHERE id = ?",
+                [(last_used, id) for id, last_used in self.pending_uses.items()],
+            )
+            self.pending_uses = {}
+        self.connection.commit()
+
+    def size_bytes(self) -> int:
+        """The total size of the cached objects."""
+        self.flush()
+        return self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM objects").fetchone()[0]
+
+    def evict(self) -> int:
+        """
+        Removes the least recently used objects until the cache fits in `max_size_bytes`.
+
+        Returns:
+            int: The number of removed objects.
+        """
+        excess = self.size_bytes() - self.max_size_bytes
+        if excess <= 0:
+            return 0
+
+        evicted_ids = []
+        for id, size in self.connection.execute("SELECT id, size FROM objects ORDER BY last_used"):
+            evicted_ids.append(id)
+            excess -= size
+            if excess <= 0:
+                break
+
+        for batch in self.batches(evicted_ids):
+            placeholders = ",".join("?" * len(batch))
+            self.connection.execute(f"DELETE FROM objects WHERE id IN ({placeholders})", batch)
+        self.connection.commit()
+        return len(evicted_ids)
+
+    def close(self) -> None:
+        """Flushes the buffered writes, evicts down to `max_size_bytes` and closes the database."""
+        if self.connection is not None:
+            self.evict()
+            self.connection.close()
+            self.connection = None
+
+    @staticmethod
+    def batches(id_list: Iterable[str]) -> List[List[str]]:
+        id_list = list(id_list)
+        return [id_list[i:i + SQLITE_BATCH_SIZE] for i in range(0, len(id_list), SQLITE_BATCH_SIZE)]
@@ -0,0 +1,158 @@
+"""Helper module for fetching many Speckle objects concurrently from a server."""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+import requests
+
+from object_cache import ObjectCache
+
+
+class ObjectFetcher:
+    """
+    Downloads objects in batches from the server's object download endpoint.
+
+    Each batch is one `POST /api/getobjects/{project_id}` request, and batches are sent
+    from a bounded thread pool over one pooled session. The server answers with one
+    `id<TAB>json` line per object, which is parsed into the same `id -> dict` mapping
+    that `create_obj_id_data_dictionary` returns.
+
+    Detached children (e.g. display values) are left as `referencedId` references instead
+    of being inlined. The grouping stage only reads `parameters`, so its output is the same.
+
+    When an `ObjectCache` is given, cached objects are read from it and only the others are
+    downloaded and then added to it. The size of the downloaded response bodies is counted
+    in `bytes_received`.
+    """
+
+    retry_status_codes = {429, 500, 502, 503, 504}
+
+    def __init__(
+        self,
+        server: str,
+        project_id: str,
+        token: Optional[str] = None,
+        batch_size: int = 500,
+        max_workers: int = 4,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        timeout: float = 60,
+        session: Optional[requests.Session] = None,
+        cache: Optional[ObjectCache] = None,
+    ) -> None:
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1.")
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1.")
+
+        self.endpoint = f"{server.rstrip('/')}/api/getobjects/{project_id}"
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+        self.cache = cache
+        self.bytes_received = 0
+        self.lock = threading.Lock()
+
+        if session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        # A given session is shared with other users, so its connection pool and headers are left
+        # as configured and the headers of the object endpoint are sent with each request instead.
+        self.session = session
+        self.headers = {"Accept": "text/plain"}
+        if token:
+            self.headers["Authorization"] = f"Bearer {token}"
+
+    def batches(self, object_ids: Iterable[str]) -> List[List[str]]:
+        """
+        Splits the ids into batches of at most `batch_size`, dropping duplicates.
+
+        Args:
+            object_ids (Iterable[str]): The ids to split.
+
+        Returns:
+            List[List[str]]: The batches, in the order the ids were given.
+        """
+        unique_ids = list(dict.fromkeys(object_ids))
+        return [unique_ids[i:i + self.batch_size] for i in range(0, len(unique_ids), self.batch_size)]
+
+    def fetch_batch(self, object_ids: List[str]) -> Dict[str, str]:
+        """
+        Downloads one batch of objects, retrying with exponential backoff.
+
+        Args:
+            object_ids (List[str]): The ids in the batch.
+
+        Returns:
+            Dict[str, str]: The serialized objects keyed by object id.
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.post(
+                    self.endpoint, data={"objects": json.dumps(object_ids)}, headers=self.headers, timeout=self.timeout
+                )
+                if response.status_code not in self.retry_status_codes:
+                    response.raise_for_status()
+                    with self.lock:
+                        self.bytes_received += len(response.content)
+                    response.encoding = "utf-8"
+                    return self.parse_response(response.text)
+                error = requests.HTTPError(f"HTTP error {response.status_code} from {self.endpoint}", response=response)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+
+            if attempt < self.max_retries:
+                time.sleep(self.backoff_factor * (2 ** attempt))
+
+        raise error
+
+    def parse_response(self, text: str) -> Dict[str, str]:
+        """
+        Splits the `id<TAB>json` lines returned by the object download endpoint.
+
+        Args:
+            text (str): The response body.
+
+        Returns:
+            Dict[str, str]: The serialized objects keyed by object id.
+        """
+        objects = {}
+        for line in text.splitlines():
+            if line:
+                object_id, object_json = line.split("\t", 1)
+                objects[object_id] = object_json
+        return objects
+
+    def fetch(self, object_ids: Iterable[str]) -> Dict[str, dict]:
+        """
+        Downloads all the given objects, one batch per request, with up to `max_workers` requests in flight.
+
+        Args:
+            object_ids (Iterable[str]): The ids of the objects to download.
+
+        Returns:
+            Dict[str, dict]: The object data keyed by object id, in the order the ids were given.
+        """
+        object_ids = list(dict.fromkeys(object_ids))
+        serialized_objects = self.cache.get_objects(object_ids) if self.cache is not None else {}
+        batches = self.batches(id for id in object_ids if id not in serialized_objects)
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, max(len(batches), 1))) as executor:
+            # Results are handled here, on the calling thread, which also owns the cache connection.
+            for objects in executor.map(self.fetch_batch, batches):
+                serialized_objects.update(objects)
+                if self.cache is not None:
+                    for id, serialized_object in objects.items():
+                        self.cache.save_object(id, serialized_object)
+
+        if self.cache is not None:
+            self.cache.end_write()
+
+        return {id: json.loads(serialized_objects[id]) for id in object_ids if id in serialized_objects}
@@ -0,0 +1,299 @@
+"""Helper module for a compact, column-oriented store of the grouped parameter values."""
+
+import sys
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# The code of a missing value in a dictionary-encoded column.
+MISSING = -1
+
+
+def is_missing(value: Any) -> bool:
+    """Whether a block cell is empty. Blocks fill missing values with NaN, which a NaN value can not be told apart from."""
+    return value.__class__ is float and value != value
+
+
+class ValueDictionary:
+    """
+    The distinct values of a store, each kept once and referred to by an integer code.
+
+    Values are told apart by type as well as value, so 1, 1.0 and True get different codes.
+    Values that can not be hashed, e.g. lists, get a code each.
+    """
+
+    def __init__(self) -> None:
+        self.codes: Dict[Any, int] = {}
+        self.values = np.empty(64, dtype=object)
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def add(self, value: Any) -> int:
+        if self.size == len(self.values):
+            values = np.empty(2 * len(self.values), dtype=object)
+            values[:self.size] = self.values
+            self.values = values
+        self.values[self.size] = value
+        self.size += 1
+        return self.size - 1
+
+    def encode(self, values: np.ndarray) -> np.ndarray:
+        """The code of each value, adding the values not seen before. Missing values get `MISSING`."""
+        codes = np.empty(len(values), dtype=np.int32)
+        get_code, add = self.codes.get, self.add
+        for i, value in enumerate(values):
+            if is_missing(value):
+                codes[i] = MISSING
+                continue
+            # Strings can not be equal to a number, so they are keyed by themselves.
+            key = value if value.__class__ is str else (value.__class__, value)
+            try:
+                code = get_code(key)
+                if code is None:
+                    code = self.codes[key] = add(value)
+            except TypeError:
+                code = add(value)
+            codes[i] = code
+        return codes
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """The values of the codes that are not `MISSING`."""
+        return self.values[codes]
+
+
+class ColumnChunk(NamedTuple):
+    """
+    The values one block added to a column, from row `start` of its system.
+
+    `values` is float64 for floats, with NaN for missing values, int64 for integers, with
+    `valid` marking the rows that have one, int32 codes into the store's `ValueDictionary`,
+    or an object array for values that are all different, e.g. object ids.
+    """
+
+    start: int
+    values: np.ndarray
+    valid: Optional[np.ndarray] = None
+
+
+class StoredSystem:
+    """The columns of one system, in order of first appearance, and its number of rows."""
+
+    __slots__ = ('columns', 'rows')
+
+    def __init__(self) -> None:
+        self.columns: Dict[str, List[ColumnChunk]] = {}
+        self.rows = 0
+
+
+class ParameterStore:
+    """
+    The object blocks of each system, kept column by column in typed arrays.
+
+    A block adds each of its columns as one chunk. Columns of floats or integers are kept in
+    float64 or int64 arrays. Other columns are dictionary-encoded against one `ValueDictionary`
+    for the whole store, so a text value repeated by many objects, like a material or a level,
+    is kept once and costs 4 bytes per object. Only columns whose values are all different, like
+    the object ids, keep their values as they are. Column names are interned.
+
+    The decoded blocks match stacking the added blocks: the columns are the union of the
+    columns of a system in order of first appearance, values keep their Python types and
+    cells a block did not have are NaN.
+    """
+
+    def __init__(self) -> None:
+        self.dictionary = ValueDictionary()
+        self.systems: Dict[str, StoredSystem] = {}
+
+    def __len__(self) -> int:
+        return len(self.systems)
+
+    @property
+    def rows(self) -> int:
+        return sum(system.rows for system in self.systems.values())
+
+    @property
+    def nbytes(self) -> int:
+        """The size of the value arrays, without the Python objects of the dictionary and the object columns."""
+        return self.dictionary.values.nbytes + sum(
+            chunk.values.nbytes + (chunk.valid.nbytes if chunk.valid is not None else 0)
+            for system in self.systems.values() for chunks in system.columns.values() for chunk in chunks)
+
+    def encode_column(self, start: int, values: np.ndarray) -> ColumnChunk:
+        """Keeps one column of a block in the most compact of the `ColumnChunk` representations."""
+        value_types = set(map(type, values))
+        if value_types <= {float}:
+            return ColumnChunk(start, values.astype(np.float64))
+        if value_types <= {int, float}:
+            valid = np.fromiter((value.__class__ is int for value in values), dtype=bool, count=len(values))
+            if all(is_missing(value) for value in values[~valid]):
+                try:
+                    integers = np.zeros(len(values), dtype=np.int64)
+                    integers[valid] = values[valid].astype(np.int64)
+                    return ColumnChunk(start, integers, None if valid.all() else valid)
+                except OverflowError:
+                    pass
+        if value_types <= {str}:
+            try:
+                if len(set(values)) == len(values):
+                    return ColumnChunk(start, values.copy())
+            except TypeError:
+                pass
+        return ColumnChunk(start, self.dictionary.encode(values))
+
+    def add_block(self, classification_desc: str, columns: List[str], block: np.ndarray) -> None:
+        """
+        Adds the rows of one system.
+
+        Args:
+            classification_desc (str): The system description.
+            columns (List[str]): The column names of the block.
+            block (np.ndarray): The rows as a 2D object array, with NaN for missing values.
+        """
+        system = self.systems.get(classification_desc)
+        if system is None:
+            system = self.systems[sys.intern(classification_desc)] = StoredSystem()
+        for i, column in enumerate(columns):
+            column = sys.intern(column) if column.__class__ is str else column
+            system.columns.setdefault(column, []).append(self.encode_column(system.rows, block[:, i]))
+        system.rows += len(block)
+
+    def decode_column(self, chunks: List[ColumnChunk], out: np.ndarray) -> None:
+        """Writes the values of a column into an object array that holds NaN for missing values."""
+        for start, values, valid in chunks:
+            if values.dtype == np.int32:
+                valid = values != MISSING
+                out[start + np.flatnonzero(valid)] = self.dictionary.decode(values[valid])
+            elif valid is None:
+                out[start:start + len(values)] = values
+            else:
+                out[start + np.flatnonzero(valid)] = values[valid]
+
+    def get_block(self, classification_desc: str) -> Tuple[List[str], np.ndarray]:
+        """The columns and rows of one system as a 2D object array."""
+        system = self.systems[classification_desc]
+        block = np.full((system.rows, len(system.columns)), np.nan, dtype=object)
+        for i, chunks in enumerate(system.columns.values()):
+            self.decode_column(chunks, block[:, i])
+        return list(system.columns), block
+
+    def get_numeric_column(self, chunks: List[ColumnChunk], rows: int) -> Optional[np.ndarray]:
+        """
+        A column of only floats and integers as the array pandas would infer for it, without
+        building Python objects, or None for other columns.
+        """
+        if any(chunk.values.dtype not in (np.float64, np.int64) for chunk in chunks):
+            return None
+        if all(chunk.values.dtype == np.int64 and chunk.valid is None for chunk in chunks) \
+                and sum(len(chunk.values) for chunk in chunks) == rows:
+            return np.concatenate([chunk.values for chunk in chunks])
+        column = np.full(rows, np.nan)
+        for chunk in chunks:
+            rows_of_chunk = np.arange(len(chunk.values)) if chunk.valid is None else np.flatnonzero(chunk.valid)
+            column[chunk.start + rows_of_chunk] = chunk.values[rows_of_chunk]
+        return column
+
+    def get_dataframe(self, classification_desc: str) -> pd.DataFrame:
+        """
+        The DataFrame of one system, with the dtypes pandas infers from its block.
+
+        Float and integer columns are built straight from their typed arrays.
+        """
+        system = self.systems[classification_desc]
+        data = {}
+        for column, chunks in system.columns.items():
+            values = self.get_numeric_column(chunks, system.rows)
+            if values is None:
+                values = np.full(system.rows, np.nan, dtype=object)
+                self.decode_column(chunks, values)
+            data[column] = values
+        return pd.DataFrame(data, index=pd.RangeIndex(system.rows), copy=False).infer_objects()
+
+    def get_column(self, classification_desc: str, column: str) -> np.ndarray:
+        """The values of one column of a system as an object array, with NaN for missing values."""
+        system = self.systems[classification_desc]
+        values = np.full(system.rows, np.nan, dtype=object)
+        self.decode_column(system.columns[column], values)
+        return values
+
+    def merge(self, other: "ParameterStore") -> None:
+        """
+        Appends the rows of another store, like adding its blocks after the blocks added so far.
+
+        The dictionary of the other store is translated once, so its chunks are appended
+        without being decoded.
+        """
+        code_map = self.dictionary.encode(other.dictionary.values[:len(other.dictionary)])
+        for classification_desc, other_system in other.systems.items():
+            system = self.systems.get(classification_desc)
+            if system is None:
+                system = self.systems[classification_desc] = StoredSystem()
+            for column, chunks in other_system.columns.items():
+                merged_chunks = system.columns.setdefault(column, [])
+                for start, values, valid in chunks:
+                    if values.dtype == np.int32:
+                        codes = np.full(len(values), MISSING, dtype=np.int32)
+                        has_value = values != MISSING
+                        codes[has_value] = code_map[values[has_value]]
+                        values = codes
+                    merged_chunks.append(ColumnChunk(system.rows + start, values, valid))
+            system.rows += other_system.rows
+
+    def drop_rows(self, classification_desc: str, dropped: np.ndarray) -> None:
+        """
+        Removes rows of a system, keeping the others in order.
+
+        Columns with no value left are removed, and so is a system with no rows left.
+
+        Args:
+            classification_desc (str): The system description.
+            dropped (np.ndarray): A boolean mask of the rows to remove.
+        """
+        system = self.systems[classification_desc]
+        kept = ~dropped
+        kept_before = np.concatenate([[0], np.cumsum(kept)])
+        for column in list(system.columns):
+            chunks = []
+            for start, values, valid in system.columns[column]:
+                kept_rows = kept[start:start + len(values)]
+                chunk = ColumnChunk(int(kept_before[start]), values[kept_rows], valid[kept_rows] if valid is not None else None)
+                if self.has_values(chunk):
+                    chunks.append(chunk)
+            if chunks:
+                system.columns[column] = chunks
+            else:
+                del system.columns[column]
+        system.rows = int(kept_before[-1])
+        if system.rows == 0:
+            del self.systems[classification_desc]
+
+    @staticmethod
+    def has_values(chunk: ColumnChunk) -> bool:
+        """Whether a chunk has at least one value that is not missing."""
+        values = chunk.values
+        if values.dtype == np.float64:
+            return bool((~np.isnan(values)).any())
+        if values.dtype == np.int32:
+            return bool((values != MISSING).any())
+        if values.dtype == np.int64:
+            return len(values) > 0 and (chunk.valid is None or bool(chunk.valid.any()))
+        return not all(is_missing(value) for value in values)
+
+    def pop_system(self, classification_desc: str) -> None:
+        self.systems.pop(classification_desc)
+
+    def iter_blocks(self, release: bool = True) -> Iterator[Tuple[str, List[str], np.ndarray]]:
+        """
+        Yields the description, columns and rows of each system, one system at a time.
+
+        Args:
+            release (bool): Drop each system from the store once its block is built. The
+                dictionary is kept until the store is dropped.
+        """
+        for classification_desc in list(self.systems):
+            columns, block = self.get_block(classification_desc)
+            if release:
+                self.pop_system(classification_desc)
+            yield classification_desc, columns, block
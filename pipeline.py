@@ -0,0 +1,178 @@
+"""Helper module for a lazy extraction pipeline that reads one object at a time from the received objects."""
+
+import json
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from specklepy.transports.abstract_transport import AbstractTransport
+
+from flatten import BaseTraversal
+from model_index import KEYS_WITH_DATA, TYPES_KEY
+from projection import CLASSIFICATION_NUMBER_PARAMETER, ParameterProjection
+
+# The objects grouped at a time. Larger chunks group faster, smaller ones hold less object data.
+DEFAULT_CHUNK_SIZE = 1000
+REFERENCE_SPECKLE_TYPE = 'reference'
+
+
+def load_object(transport: AbstractTransport, id: str) -> dict:
+    """
+    Reads and parses one serialized object.
+
+    Raises:
+        KeyError: When the transport does not have the object.
+    """
+    serialized_object = transport.get_object(id)
+    if serialized_object is None:
+        raise KeyError(f"Object {id} is not in transport {transport.name}.")
+    return json.loads(serialized_object)
+
+
+def resolve(value, transport: AbstractTransport):
+    """Loads the object a detached reference points to. Other values are returned as they are."""
+    if isinstance(value, dict) and value.get('speckle_type') == REFERENCE_SPECKLE_TYPE and 'referencedId' in value:
+        return load_object(transport, value['referencedId'])
+    return value
+
+
+def is_base(value) -> bool:
+    return isinstance(value, dict) and 'speckle_type' in value
+
+
+class SerializedTraversal(BaseTraversal):
+    """
+    A `BaseTraversal` of parsed objects, loading detached children from a transport as they are reached.
+
+    Takes the same filters as `BaseTraversal` after the transport.
+    """
+
+    def __init__(self, transport: AbstractTransport, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.transport = transport
+
+    def resolve(self, value):
+        return resolve(value, self.transport)
+
+    def is_object(self, value) -> bool:
+        return is_base(value)
+
+    def get_id(self, obj: dict) -> Optional[str]:
+        return obj.get('id')
+
+    def get_speckle_type(self, obj: dict) -> str:
+        return obj['speckle_type']
+
+    def get_member(self, obj: dict, name: str):
+        return obj.get(name)
+
+    def get_member_names(self, obj: dict) -> List[str]:
+        return list(obj)
+
+    def has_parameters(self, obj: dict) -> bool:
+        # A detached `parameters` is a reference, which counts as present without loading it.
+        return is_base(obj.get('parameters'))
+
+
+def get_version_roots(root: dict, transport: AbstractTransport, keys_with_data: Optional[List[str]] = None,
+                      include_instances: bool = True, include_types: bool = True) -> List[Tuple[object, str, Optional[str]]]:
+    """
+    The starting points of a walk of the version: the `keys_with_data` collections and the categories of `@Types`.
+
+    Returns:
+        List[Tuple[object, str, Optional[str]]]: The value, collection and parent id of each
+            starting point, see `BaseTraversal.walk_roots`.
+    """
+    roots = []
+    if include_instances:
+        roots.extend((root.get(key), key, root.get('id')) for key in (keys_with_data if keys_with_data is not None else KEYS_WITH_DATA))
+    if include_types:
+        types_base = resolve(root.get(TYPES_KEY), transport)
+        if is_base(types_base):
+            roots.extend((types_base[key], f"{TYPES_KEY}/{key}", types_base.get('id')) for key in sorted(types_base) if key.startswith('@'))
+    return roots
+
+
+def iter_roots_objects(roots: List[Tuple[object, str, Optional[str]]], transport: AbstractTransport,
+                       traversal: Optional[SerializedTraversal] = None) -> Iterator[Tuple[str, dict]]:
+    """Walks the starting points of `get_version_roots`, or a part of them, see `iter_version_objects`."""
+    traversal = traversal or SerializedTraversal(transport, include_collections=False)
+    for traversed in traversal.walk_roots(roots):
+        if traversed.base.get('id') is not None:
+            yield traversed.collection, traversed.base
+
+
+def iter_version_objects(root: dict, transport: AbstractTransport, keys_with_data: Optional[List[str]] = None,
+                         include_instances: bool = True, include_types: bool = True,
+                         traversal: Optional[SerializedTraversal] = None) -> Iterator[Tuple[str, dict]]:
+    """
+    Walks the serialized version and yields the objects that hold data, loading each one when it is reached.
+
+    The objects, their order and their collections are the ones `model_index.index_model`
+    finds in the deserialized version, but no Base tree is built and an object can be released
+    as soon as the next one is requested.
+
+    Args:
+        root (dict): The parsed version object.
+        transport (AbstractTransport): The transport holding the objects of the version.
+        keys_with_data (Optional[List[str]]): The root collections to walk. Defaults to `KEYS_WITH_DATA`.
+        include_instances (bool): Walk the `keys_with_data` collections.
+        include_types (bool): Walk the categories of `@Types`.
+        traversal (Optional[SerializedTraversal]): The members to follow and the objects to skip
+            below the collections. Defaults to following `elements`, without filters.
+
+    Yields:
+        Tuple[str, dict]: The collection of each object, e.g. 'elements' or '@Types/@Walls', and its parsed data.
+    """
+    roots = get_version_roots(root, transport, keys_with_data, include_instances, include_types)
+    return iter_roots_objects(roots, transport, traversal)
+
+
+def get_serialized_object_data(object_json: dict, transport: AbstractTransport, projection: Optional[ParameterProjection] = None) -> dict:
+    """
+    Converts a parsed object to the plain dictionary read by the grouping stage.
+
+    The result matches `AccessSystemSpecificDataSpecklePy.get_object_data` on the deserialized object.
+
+    Args:
+        object_json (dict): The parsed object.
+        transport (AbstractTransport): The transport detached parameters are loaded from.
+        projection (Optional[ParameterProjection]): The parameters to keep. Others are not read.
+
+    Returns:
+        dict: The `id`, `speckle_type` and `parameters` of the object.
+    """
+    data = {"id": object_json['id'], "speckle_type": object_json['speckle_type']}
+
+    parameters = resolve(object_json.get('parameters'), transport)
+    if is_base(parameters):
+        named_params = []
+        for param_name, param in sorted(parameters.items()):
+            if param_name.startswith('_'):
+                continue
+            param = resolve(param, transport)
+            if is_base(param) and 'name' in param:
+                named_params.append((param_name, param))
+
+        columns = None
+        if projection is not None:
+            ss_code = next((param.get('value') for _, param in named_params if param['name'] == CLASSIFICATION_NUMBER_PARAMETER), None)
+            columns = projection.get_columns(ss_code)
+
+        data["parameters"] = {
+            param_name: {"name": param['name'], "value": param.get('value'), "units": param.get('units')}
+            for param_name, param in named_params if columns is None or projection.keeps(param_name, param['name'], columns)
+        }
+
+    return data
+
+
+def iter_chunks(values: Iterable, chunk_size: int) -> Iterator[list]:
+    """Splits an iterable into lists of at most `chunk_size` values, without reading ahead."""
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1.")
+    iterator = iter(values)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
@@ -0,0 +1,168 @@
+"""Helper module for stage-level timing and memory profiling of a run."""
+
+import json
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from specklepy.transports.abstract_transport import AbstractTransport
+
+try:
+    import resource
+except ImportError:  # Not available on Windows.
+    resource = None
+
+
+def get_peak_rss_bytes() -> Optional[int]:
+    """The peak resident set size of the process so far, or None where it can't be read."""
+    if resource is None:
+        return None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak_rss if sys.platform == 'darwin' else peak_rss * 1024
+
+
+class StageRecord:
+    """The measurements of one stage."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.seconds = 0.0
+        self.counts: Dict[str, Any] = {}
+        self.peak_rss_bytes: Optional[int] = None
+        self.peak_traced_bytes: Optional[int] = None
+
+    def count(self, name: str, value: Any) -> None:
+        """Record a count for the stage, e.g. the number of objects it handled."""
+        self.counts[name] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        record = {'name': self.name, 'seconds': round(self.seconds, 6), **self.counts}
+        if self.peak_rss_bytes is not None:
+            record['peak_rss_bytes'] = self.peak_rss_bytes
+        if self.peak_traced_bytes is not None:
+            record['peak_traced_bytes'] = self.peak_traced_bytes
+        return record
+
+
+class DisabledStage:
+    """Stands in for a stage when profiling is off, so the instrumented code costs close to nothing."""
+
+    def __enter__(self) -> "DisabledStage":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        pass
+
+    def count(self, name: str, value: Any) -> None:
+        pass
+
+
+DISABLED_STAGE = DisabledStage()
+
+
+class StageProfiler:
+    """
+    Measures the wall time, counts and memory of each stage of a run.
+
+    Wrap each stage in `with profiler.stage('name') as stage:` and record counts with
+    `stage.count(...)`. Peak RSS is read after each stage; with `trace_memory` the peak of
+    Python allocations during each stage is measured with tracemalloc too, which slows the
+    run down. When the profiler is disabled, `stage` returns a shared no-op stage.
+    """
+
+    def __init__(self, enabled: bool = False, trace_memory: bool = False) -> None:
+        self.enabled = enabled
+        self.trace_memory = enabled and trace_memory
+        self.stages: List[StageRecord] = []
+        self.started_at = time.perf_counter()
+
+    def stage(self, name: str):
+        if not self.enabled:
+            return DISABLED_STAGE
+        return self.measure_stage(name)
+
+    @contextmanager
+    def measure_stage(self, name: str) -> Iterator[StageRecord]:
+        record = StageRecord(name)
+        self.stages.append(record)
+
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        elif self.trace_memory:
+            tracemalloc.reset_peak()
+
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.seconds = time.perf_counter() - start
+            record.peak_rss_bytes = get_peak_rss_bytes()
+            if self.trace_memory:
+                record.peak_traced_bytes = tracemalloc.get_traced_memory()[1]
+                if started_tracing:
+                    tracemalloc.stop()
+
+    def report(self) -> Dict[str, Any]:
+        """
+        The measurements of all stages as a JSON-serializable dictionary.
+
+        Returns:
+            Dict[str, Any]: The total wall time, the peak RSS of the process and one entry per stage.
+        """
+        return {
+            'total_seconds': round(time.perf_counter() - self.started_at, 6),
+            'peak_rss_bytes': get_peak_rss_bytes(),
+            'stages': [record.to_dict() for record in self.stages],
+        }
+
+    def write_json(self, path: str) -> str:
+        """Writes the report to a JSON file and returns its path."""
+        with open(path, 'w') as file:
+            json.dump(self.report(), file, indent=2)
+        return path
+
+
+class ByteCountingTransport(AbstractTransport):
+    """
+    Wraps the local transport of a receive and counts the size of the objects written into it.
+
+    Everything `operations.receive` downloads is saved into its local transport, so this gives
+    the number of objects and bytes received from the server.
+    """
+
+    def __init__(self, transport: AbstractTransport) -> None:
+        super().__init__()
+        self.transport = transport
+        self.objects_received = 0
+        self.bytes_received = 0
+
+    @property
+    def name(self) -> str:
+        return self.transport.name
+
+    def begin_write(self) -> None:
+        self.transport.begin_write()
+
+    def end_write(self) -> None:
+        self.transport.end_write()
+
+    def save_object(self, id: str, serialized_object: str) -> None:
+        self.objects_received += 1
+        self.bytes_received += len(serialized_object.encode('utf-8'))
+        self.transport.save_object(id, serialized_object)
+
+    def save_object_from_transport(self, id: str, source_transport: AbstractTransport) -> None:
+        self.save_object(id, source_transport.get_object(id))
+
+    def get_object(self, id: str) -> Optional[str]:
+        return self.transport.get_object(id)
+
+    def has_objects(self, id_list: List[str]) -> Dict[str, bool]:
+        return self.transport.has_objects(id_list)
+
+    def copy_object_and_children(self, id: str, target_transport: AbstractTransport) -> str:
+        return self.transport.copy_object_and_children(id, target_transport)
@@ -0,0 +1,150 @@
+"""Helper module for projecting object parameters onto the columns that are kept in the export."""
+
+import copy
+import json
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional
+
+from grouping import CLASSIFICATION_PARAMETER
+
+CLASSIFICATION_NUMBER_PARAMETER = 'Classification.Uniclass.Ss.Number'
+# Always kept, the grouping needs them.
+CLASSIFICATION_PARAMETERS = frozenset([CLASSIFICATION_PARAMETER, CLASSIFICATION_NUMBER_PARAMETER])
+
+
+class ParameterProjection:
+    """
+    The parameter names to keep, globally or per Uniclass Ss code.
+
+    An object classified with an Ss code listed in `system_columns` keeps the parameters
+    listed for that code. The most specific code wins, so 'Ss_25' covers 'Ss_25_10_30'
+    unless 'Ss_25_10' is listed too. Other objects keep the `columns` parameters, or every
+    parameter when `columns` is None. The classification parameters are always kept, and so
+    are the parameters stored under one of the `keys`, whatever their name.
+
+    A projection file is a JSON object like
+    `{"columns": ["Mark", "Length"], "systems": {"Ss_25_10": ["Mark", "Fire Rating"]}}`.
+    """
+
+    def __init__(self, columns: Optional[Iterable[str]] = None, system_columns: Optional[Dict[str, Iterable[str]]] = None,
+                 keys: Iterable[str] = ()) -> None:
+        self.columns = self.with_classification(columns) if columns is not None else None
+        self.system_columns = {code: self.with_classification(names) for code, names in (system_columns or {}).items()}
+        # Longest codes first, so the most specific code is matched first.
+        self.system_codes = sorted(self.system_columns, key=len, reverse=True)
+        # Parameter keys kept for a later stage, e.g. the type id a type join looks instances up by.
+        self.keys = frozenset(keys)
+
+    def __repr__(self) -> str:
+        return f"ParameterProjection(columns: {None if self.columns is None else sorted(self.columns)}, systems: {sorted(self.system_columns)})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The projection as a JSON-serializable dictionary, e.g. to tell whether saved results were made with it."""
+        return {
+            'columns': sorted(self.columns) if self.columns is not None else None,
+            'systems': {code: sorted(names) for code, names in sorted(self.system_columns.items())},
+            'keys': sorted(self.keys),
+        }
+
+    @staticmethod
+    def with_classification(names: Iterable[str]) -> FrozenSet[str]:
+        return frozenset(names) | CLASSIFICATION_PARAMETERS
+
+    @classmethod
+    def from_file(cls, path: str) -> "ParameterProjection":
+        """
+        Reads a projection file.
+
+        Args:
+            path (str): The JSON file with the optional `columns` and `systems` keys.
+
+        Returns:
+            ParameterProjection: The projection.
+        """
+        with open(path, 'r') as file:
+            config = json.load(file)
+        unknown_keys = set(config) - {'columns', 'systems'}
+        if unknown_keys:
+            raise ValueError(f"Unknown keys in parameter projection file {path}: {sorted(unknown_keys)}")
+        return cls(columns=config.get('columns'), system_columns=config.get('systems'))
+
+    @classmethod
+    def from_inputs(cls, columns: Optional[List[str]] = None, path: Optional[str] = None) -> Optional["ParameterProjection"]:
+        """
+        Builds the projection from a list of parameter names and/or a projection file.
+
+        The names, when given, replace the global `columns` of the file.
+
+        Returns:
+            Optional[ParameterProjection]: The projection, or None when neither is given.
+        """
+        if not columns and not path:
+            return None
+        projection = cls.from_file(path) if path else cls()
+        if columns:
+            projection.columns = cls.with_classification(columns)
+        return projection
+
+    def with_keys(self, keys: Iterable[str]) -> "ParameterProjection":
+        """A copy of the projection that also keeps the parameters stored under `keys`."""
+        projection = copy.copy(self)
+        projection.keys = self.keys | frozenset(keys)
+        return projection
+
+    def keeps(self, key: str, name: str, columns: Optional[FrozenSet[str]]) -> bool:
+        """Whether a parameter is kept, given the `get_columns` of its object."""
+        return columns is None or name in columns or key in self.keys
+
+    @staticmethod
+    def get_ss_code(parameters: Dict[str, dict]) -> Optional[str]:
+        """The Uniclass Ss code in the parameters of parsed object data, if there is one."""
+        for param_info in parameters.values():
+            if isinstance(param_info, dict) and param_info.get('name') == CLASSIFICATION_NUMBER_PARAMETER:
+                return param_info.get('value')
+        return None
+
+    def get_columns(self, ss_code: Optional[str]) -> Optional[FrozenSet[str]]:
+        """
+        The parameter names to keep for an object.
+
+        Args:
+            ss_code (Optional[str]): The Uniclass Ss code of the object, if it has one.
+
+        Returns:
+            Optional[FrozenSet[str]]: The names to keep, or None to keep every parameter.
+        """
+        if ss_code:
+            for code in self.system_codes:
+                if ss_code == code or ss_code.startswith(code + '_'):
+                    return self.system_columns[code]
+        return self.columns
+
+    def project(self, parameters: Dict[str, dict]) -> Dict[str, dict]:
+        """
+        Keeps the parameters of one object that are projected, for object data that was already parsed.
+
+        Args:
+            parameters (Dict[str, dict]): The `parameters` of the object data.
+
+        Returns:
+            Dict[str, dict]: The kept parameters.
+        """
+        columns = self.get_columns(self.get_ss_code(parameters))
+        if columns is None:
+            return parameters
+        return {key: param_info for key, param_info in parameters.items()
+                if isinstance(param_info, dict) and self.keeps(key, param_info.get('name'), columns)}
+
+    def drop_keys(self, parameters: Dict[str, dict]) -> None:
+        """
+        Removes the parameters that were only kept for their key, in place, once they are no longer needed.
+
+        Args:
+            parameters (Dict[str, dict]): The `parameters` of the object data.
+        """
+        columns = self.get_columns(self.get_ss_code(parameters))
+        if columns is None:
+            return
+        for key in self.keys:
+            param_info = parameters.get(key)
+            if isinstance(param_info, dict) and param_info.get('name') not in columns:
+                del parameters[key]
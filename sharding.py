@@ -0,0 +1,233 @@
+"""Helper module for extracting and grouping the objects of a version in several processes."""
+
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from specklepy.transports.abstract_transport import AbstractTransport
+from specklepy.transports.sqlite import SQLiteTransport
+
+from flatten import COLLECTION_SPECKLE_TYPE
+from grouping import SystemBlockAccumulator
+from object_cache import ObjectCache
+from pipeline import DEFAULT_CHUNK_SIZE, SerializedTraversal, get_serialized_object_data, iter_chunks, iter_roots_objects
+from profiling import ByteCountingTransport
+from projection import ParameterProjection
+from type_join import TypeParameterJoin
+
+# Shards per worker: more, smaller shards even out workers that get slower parts of the model.
+SHARDS_PER_WORKER = 4
+OBJECT_ID_COLUMN = 'Object ID'
+# Serialized objects start with their id and speckle_type, so the type is read from the first characters.
+SPECKLE_TYPE_PREFIX_LENGTH = 256
+SPECKLE_TYPE_PATTERN = re.compile(r'"speckle_type"\s*:\s*"([^"]*)"')
+
+Partition = Tuple[Any, Optional[str], Optional[str]]
+
+# The state of a worker process, set once by `init_worker`.
+WORKER_STATE: Dict[str, Any] = {}
+
+
+class ShardResult(NamedTuple):
+    """The grouped objects of one shard and the ids of the objects it walked, in order."""
+
+    accumulator: SystemBlockAccumulator
+    object_ids: List[str]
+
+
+def get_worker_count(workers: Optional[int]) -> int:
+    """The number of worker processes: `workers`, or one per CPU when it is None."""
+    return max(1, workers if workers is not None else (os.cpu_count() or 1))
+
+
+def get_start_method() -> str:
+    """
+    How to start the worker processes: forked from the main thread, otherwise through a fork server or spawned.
+
+    Forked workers inherit the received objects instead of receiving a pickled copy. But a
+    process forked from another thread, e.g. a model thread of a batch, can inherit locks held
+    by the other threads (requests, SQLite, logging) and deadlock on them.
+    """
+    start_methods = multiprocessing.get_all_start_methods()
+    if 'fork' in start_methods and threading.current_thread() is threading.main_thread():
+        return 'fork'
+    return 'forkserver' if 'forkserver' in start_methods else 'spawn'
+
+
+def reuse_transport(transport: AbstractTransport) -> AbstractTransport:
+    return transport
+
+
+def get_transport_factory(transport: AbstractTransport) -> Callable[[], AbstractTransport]:
+    """
+    A picklable function that gives a worker its own access to the objects of a transport.
+
+    SQLite databases are opened again in each worker, since a connection must not be shared
+    between processes. Other transports, like a `MemoryTransport`, are inherited by the forked
+    workers, or pickled where processes are spawned, see `get_start_method`.
+    """
+    if isinstance(transport, ByteCountingTransport):
+        transport = transport.transport
+    if isinstance(transport, ObjectCache):
+        return partial(ObjectCache, transport.path, transport.max_size_bytes)
+    if isinstance(transport, SQLiteTransport):
+        return partial(SQLiteTransport, base_path=transport._base_path, app_name=transport.app_name, scope=transport.scope)
+    return partial(reuse_transport, transport)
+
+
+def peek_speckle_type(serialized_object: str) -> Optional[str]:
+    """The speckle_type of a serialized object when it is among its first characters, without parsing the object."""
+    match = SPECKLE_TYPE_PATTERN.search(serialized_object, 0, SPECKLE_TYPE_PREFIX_LENGTH)
+    return match.group(1) if match else None
+
+
+def get_partitions(roots: List[Partition], traversal: SerializedTraversal) -> List[Partition]:
+    """
+    Splits the starting points of a walk into one partition per object below the collections.
+
+    Lists are unpacked and collections are replaced by their children, in walk order, so
+    walking the partitions one after the other visits the objects in the same order as walking
+    the roots. The objects themselves are not parsed: a detached object is only loaded when the
+    first characters of its data say it is a collection.
+
+    Args:
+        roots (List[Partition]): The value, collection and parent id of each starting point,
+            see `pipeline.get_version_roots`.
+        traversal (SerializedTraversal): The traversal the partitions are walked with.
+
+    Returns:
+        List[Partition]: The value, collection and parent id of each partition.
+    """
+    partitions = []
+    expanded = set()
+    stack = list(reversed(roots))
+    while stack:
+        value, collection, parent_id = stack.pop()
+        if isinstance(value, list):
+            stack.extend((element, collection, parent_id) for element in reversed(value))
+            continue
+
+        if traversal.is_object(value) and value.get('referencedId') is not None:
+            serialized_object = traversal.transport.get_object(value['referencedId'])
+            is_collection = serialized_object is not None and peek_speckle_type(serialized_object) == COLLECTION_SPECKLE_TYPE
+        else:
+            is_collection = traversal.is_object(value) and traversal.get_speckle_type(value) == COLLECTION_SPECKLE_TYPE
+        obj = traversal.resolve(value) if is_collection else None
+        if obj is None or traversal.get_speckle_type(obj) != COLLECTION_SPECKLE_TYPE:
+            partitions.append((value, collection, parent_id))
+            continue
+
+        obj_id = traversal.get_id(obj)
+        if obj_id is not None:
+            if obj_id in expanded:
+                continue
+            expanded.add(obj_id)
+        stack.extend((child, collection, obj_id) for child in reversed(traversal.get_children(obj)))
+    return partitions
+
+
+def split_into_shards(partitions: List[Partition], shard_count: int) -> List[List[Partition]]:
+    """Splits the partitions into at most `shard_count` runs of consecutive partitions of about the same length."""
+    shard_count = max(1, min(shard_count, len(partitions)))
+    bounds = np.linspace(0, len(partitions), shard_count + 1).round().astype(int)
+    return [partitions[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def init_worker(transport_factory: Callable[[], AbstractTransport], model_url: str, version_object_id: str,
+                projection: Optional[ParameterProjection], type_join: Optional[TypeParameterJoin], chunk_size: int) -> None:
+    WORKER_STATE.update(transport=transport_factory(), model_url=model_url, version_object_id=version_object_id,
+                        projection=projection, type_join=type_join, chunk_size=chunk_size)
+
+
+def group_shard(partitions: List[Partition]) -> ShardResult:
+    """
+    Extracts and groups the objects of one shard in a worker, like the lazy pipeline does for the whole version.
+
+    The rows get the same 'Model URL', 'Version Object ID' and 'Object ID' columns as
+    `AccessSystemSpecificDataSpecklePy.create_speckle_data_dataframe` gives them.
+    """
+    transport, projection, type_join = WORKER_STATE['transport'], WORKER_STATE['projection'], WORKER_STATE['type_join']
+    object_ids = []
+
+    def iter_object_data():
+        for _, object_json in iter_roots_objects(partitions, transport):
+            object_data = get_serialized_object_data(object_json, transport, projection)
+            if type_join is not None:
+                type_join.join_object(object_data)
+            object_ids.append(object_data['id'])
+            yield object_data
+
+    accumulator = SystemBlockAccumulator()
+    for chunk in iter_chunks(iter_object_data(), WORKER_STATE['chunk_size']):
+        id_frame = pd.DataFrame({
+            "Model URL": WORKER_STATE['model_url'],
+            "Version Object ID": WORKER_STATE['version_object_id'],
+            "Object ID": [object_data['id'] for object_data in chunk],
+        })
+        accumulator.add(id_frame, chunk)
+    return ShardResult(accumulator, object_ids)
+
+
+def merge_shard_results(results: Iterable[ShardResult]) -> SystemBlockAccumulator:
+    """
+    Merges the shards in order into one accumulator, equal to grouping the whole version in one process.
+
+    An object reached from two shards, e.g. an element shared by two collections, keeps only
+    its rows from the first shard, like a single walk visits each object once.
+    """
+    merged = SystemBlockAccumulator()
+    seen_ids = set()
+    for accumulator, object_ids in results:
+        duplicate_ids = seen_ids.intersection(object_ids)
+        if duplicate_ids:
+            store = accumulator.store
+            for classification_desc in list(store.systems):
+                system_ids = store.get_column(classification_desc, OBJECT_ID_COLUMN)
+                dropped = np.fromiter((id in duplicate_ids for id in system_ids), dtype=bool, count=len(system_ids))
+                if dropped.any():
+                    store.drop_rows(classification_desc, dropped)
+            accumulator.rows -= len(duplicate_ids)
+        seen_ids.update(object_ids)
+        merged.merge(accumulator)
+    return merged
+
+
+def group_in_processes(roots: List[Partition], transport: AbstractTransport, model_url: str, version_object_id: str,
+                       workers: Optional[int] = None, projection: Optional[ParameterProjection] = None,
+                       type_join: Optional[TypeParameterJoin] = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> SystemBlockAccumulator:
+    """
+    Extracts and groups the objects below the roots in a pool of worker processes.
+
+    The roots are split into partitions below the collections, and runs of consecutive
+    partitions are grouped as shards in the workers. The shards are merged in order as they
+    come back, so rows, columns and systems are in the same order as grouping in one process.
+
+    Args:
+        roots (List[Partition]): The starting points of the walk, see `pipeline.get_version_roots`.
+        transport (AbstractTransport): The transport holding the received objects. Pending
+            writes are flushed before the workers start.
+        model_url (str): The 'Model URL' of the rows.
+        version_object_id (str): The 'Version Object ID' of the rows.
+        workers (Optional[int]): The number of worker processes. Defaults to one per CPU.
+        projection (Optional[ParameterProjection]): The parameters to keep.
+        type_join (Optional[TypeParameterJoin]): The type parameters to join onto each instance.
+        chunk_size (int): The number of objects a worker groups at a time.
+
+    Returns:
+        SystemBlockAccumulator: The grouped objects of all shards.
+    """
+    workers = get_worker_count(workers)
+    transport.end_write()
+    partitions = get_partitions(roots, SerializedTraversal(transport, include_collections=False))
+    shards = split_into_shards(partitions, workers * SHARDS_PER_WORKER)
+
+    initargs = (get_transport_factory(transport), model_url, version_object_id, projection, type_join, chunk_size)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(get_start_method()),
+                             initializer=init_worker, initargs=initargs) as executor:
+        return merge_shard_results(executor.map(group_shard, shards))
@@ -0,0 +1,80 @@
+"""Test the batch driver with offline models."""
+import pytest
+from specklepy.transports.memory import MemoryTransport
+
+from batch import BatchRunner, ModelReference
+from benchmarks.offline import OfflineAccessSystemSpecificData
+from benchmarks.synthetic_model import create_synthetic_model, send_to_local_server
+from SpecklePy_accessing_system_specific_data import AccessSystemSpecificDataSpecklePy
+
+
+class OfflineBatchModel(OfflineAccessSystemSpecificData):
+    def get_version_object_id(self, client):
+        if self.model_id == "broken":
+            raise ValueError("Model has no versions.")
+        return super().get_version_object_id(client)
+
+
+class OfflineBatchRunner(BatchRunner):
+    def __init__(self, models, **kwargs):
+        super().__init__(token="token", **kwargs)
+        self.models = models
+
+    def create_access_system_data(self, reference):
+        version_object_id, remote_transport = self.models.get(reference.model_id, (None, None))
+        return OfflineBatchModel(version_object_id, remote_transport, model_url=reference.url, project_id=reference.project_id,
+                                 server=reference.server, token=self.token, model_id=reference.model_id)
+
+
+@pytest.fixture(scope="module")
+def models():
+    return {name: send_to_local_server(create_synthetic_model(num_elements=30, seed=seed)) for seed, name in enumerate(["first", "second"])}
+
+
+def test_model_urls_are_parsed():
+    reference = ModelReference.from_url("https://speckle.example/projects/abc/models/def@123")
+    assert (reference.server, reference.project_id, reference.model_id, reference.version_id) == ("https://speckle.example", "abc", "def", "123")
+    assert ModelReference.from_url("https://speckle.example/projects/abc").model_id is None
+    with pytest.raises(ValueError):
+        ModelReference.from_url("https://speckle.example/streams/abc")
+
+
+def test_failures_are_isolated_and_each_model_is_exported(tmp_path, models):
+    urls = [
+        "https://speckle.example/projects/p/models/first",
+        "not a url",
+        "https://speckle.example/projects/p/models/broken",
+        "https://speckle.example/projects/p/models/second",
+    ]
+    results = OfflineBatchRunner(models, max_workers=2).run(urls, str(tmp_path))
+
+    assert [result.succeeded for result in results] == [True, False, False, True]
+    assert "Model has no versions." in results[2].error
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["p_first_Systems_data.xlsx", "p_second_Systems_data.xlsx"]
+    assert [result.written_paths for result in results] == [[str(tmp_path / "p_first_Systems_data.xlsx")], [], [],
+                                                           [str(tmp_path / "p_second_Systems_data.xlsx")]]
+
+
+def test_each_model_gets_a_private_local_transport():
+    runner = BatchRunner(token="token")
+    runner.clients["https://speckle.example"] = None
+    reference = ModelReference.from_url("https://speckle.example/projects/p/models/first")
+
+    transports = [runner.create_access_system_data(reference).create_local_transport() for _ in range(2)]
+
+    assert all(isinstance(transport, MemoryTransport) for transport in transports)
+    assert transports[0] is not transports[1]
+    runner.close()
+
+
+def test_combined_export_has_the_rows_of_all_models(tmp_path, models, monkeypatch):
+    exported = {}
+    monkeypatch.setattr(AccessSystemSpecificDataSpecklePy, "export_systems",
+                        lambda self, systems_df, export_plan, automate_context=None: exported.update(systems_df) or ["combined"])
+    urls = ["https://speckle.example/projects/p/models/first", "https://speckle.example/projects/p/models/second"]
+
+    results = OfflineBatchRunner(models).run(urls, str(tmp_path), combined=True)
+
+    assert all(result.written_paths == ["combined"] for result in results)
+    assert sum(len(df) for df in exported.values()) == sum(result.objects for result in results)
+    assert {url for df in exported.values() for url in df["Model URL"]} == set(urls)
@@ -0,0 +1,53 @@
+"""Test the partitioned Parquet and Arrow IPC exports."""
+import numpy as np
+import pandas as pd
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.dataset as ds  # noqa: E402
+
+from columnar_export import write_blocks_to_dataset, write_dataframes_to_dataset  # noqa: E402
+from export_plan import ExportPlan  # noqa: E402
+
+LONG_NAME = "Hot and cold water supply systems / distribution pipework"
+
+
+@pytest.mark.parametrize("file_format", ["parquet", "arrow"])
+def test_dataset_is_partitioned_by_full_system_name(tmp_path, file_format):
+    systems_df = {
+        LONG_NAME: pd.DataFrame({"Object ID": ["a", "b"], "Length (m)": [1.5, np.nan], "Mark": ["M1", 2]}),
+        "Walls": pd.DataFrame({"Object ID": ["c"], "Fire Rating": ["60 min"]}),
+    }
+    path = str(tmp_path / f"Systems_data.{file_format}")
+
+    written_files = write_dataframes_to_dataset(systems_df, path, file_format)
+
+    dataset = ds.dataset(written_files[LONG_NAME], format="ipc" if file_format == "arrow" else file_format)
+    table = dataset.to_table()
+    assert table.column("Length (m)").to_pylist() == [1.5, None]
+    # Text and numbers in one column are written as text.
+    assert table.column("Mark").to_pylist() == ["M1", "2"]
+
+    partitioned = ds.dataset(path, format="ipc" if file_format == "arrow" else file_format, partitioning="hive")
+    systems = [str(fragment.partition_expression) for fragment in partitioned.get_fragments()]
+    assert len(systems) == 2
+    assert any(LONG_NAME in expression for expression in systems)
+
+
+def test_blocks_are_written_without_dataframes(tmp_path):
+    block = np.array([["a", 1.0], ["b", np.nan]], dtype=object)
+    written_files = write_blocks_to_dataset(iter([("Walls", ["Object ID", "Length (m)"], block)]), str(tmp_path / "out.parquet"))
+
+    assert pd.read_parquet(written_files["Walls"])["Length (m)"].tolist()[0] == 1.0
+
+
+def test_dataset_folders_are_copied_to_every_destination(tmp_path):
+    plan = ExportPlan(destinations=[str(tmp_path / "first"), str(tmp_path / "second")], formats=["parquet"])
+    systems_df = {"Walls": pd.DataFrame({"Object ID": ["a"]})}
+
+    plan.execute({"parquet": lambda path: write_dataframes_to_dataset(systems_df, path)})
+    # A second export replaces the copies instead of failing on the existing folders.
+    written_paths = plan.execute({"parquet": lambda path: write_dataframes_to_dataset(systems_df, path)})
+
+    assert written_paths == [str(tmp_path / "first" / "Systems_data.parquet"), str(tmp_path / "second" / "Systems_data.parquet")]
+    assert ExportPlan.get_files(written_paths[1])[0].endswith("part-0.parquet")
@@ -0,0 +1,54 @@
+"""Test the constant memory Excel export and its sheet names."""
+import re
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from excel_export import unique_sheet_names, write_dataframes_to_excel
+
+
+def test_unique_sheet_names_do_not_collide():
+    long_name = "Heating, ventilation and air conditioning systems"
+    names = [long_name, long_name + " (2)", long_name.upper(), "Pipes: supply/return", "Ducts"]
+
+    sheet_names = unique_sheet_names(names)
+
+    assert sheet_names == {
+        long_name: "Heating, ventilation and air co",
+        long_name + " (2)": "Heating, ventilation and ai (2)",
+        long_name.upper(): "HEATING, VENTILATION AND AI (3)",
+        "Pipes: supply/return": "Pipes_ supply_return",
+        "Ducts": "Ducts",
+    }
+    assert all(len(sheet_name) <= 31 for sheet_name in sheet_names.values())
+    assert unique_sheet_names(names) == sheet_names
+
+
+def test_truncated_sheet_names_do_not_end_with_an_apostrophe(tmp_path):
+    name = 'a' * 30 + "'b"
+
+    sheet_names = unique_sheet_names([name, "'Quoted'"])
+
+    assert sheet_names == {name: 'a' * 30, "'Quoted'": 'Quoted'}
+    write_dataframes_to_excel({name: pd.DataFrame({'Mark': ['M1']})}, str(tmp_path / "Systems_data.xlsx"), sheet_names=sheet_names)
+
+
+def test_write_dataframes_to_excel_writes_one_sheet_per_dataframe(tmp_path):
+    path = tmp_path / "Systems_data.xlsx"
+    dataframes_dict = {
+        "Wall framing systems": pd.DataFrame({"Object ID": ["a", "b"], "Length (m)": [1.5, np.nan], "Mark": ["M-1", None]}),
+        "Wall framing systems and other long names": pd.DataFrame({"Object ID": ["c"], "Count": [np.int64(3)]}),
+    }
+
+    sheet_names = write_dataframes_to_excel(dataframes_dict, str(path))
+
+    with zipfile.ZipFile(path) as workbook:
+        workbook_xml = workbook.read("xl/workbook.xml").decode()
+        first_sheet_xml = workbook.read("xl/worksheets/sheet1.xml").decode()
+
+    assert re.findall(r'<sheet name="([^"]+)"', workbook_xml) == list(sheet_names.values())
+    assert list(sheet_names.values()) == ["Wall framing systems", "Wall framing systems and other "]
+    # Header plus two rows; the missing length and mark are left blank.
+    assert first_sheet_xml.count("<row ") == 3
+    assert first_sheet_xml.count("<c ") == 3 + 4
@@ -0,0 +1,39 @@
+"""Test that an export plan encodes each format once."""
+import pytest
+
+from export_plan import ExportPlan
+
+
+class FakeAutomationContext:
+    def __init__(self):
+        self.stored_files = []
+
+    def store_file_result(self, file_path):
+        self.stored_files.append(file_path)
+
+
+def test_each_format_is_encoded_once_and_copied(tmp_path):
+    encoded_paths = []
+
+    def write_xlsx(path):
+        encoded_paths.append(path)
+        with open(path, "w") as file:
+            file.write("workbook")
+
+    destinations = [str(tmp_path / "output"), str(tmp_path / "copy")]
+    context = FakeAutomationContext()
+    plan = ExportPlan(destinations=destinations, formats=["xlsx"], attach_to_automation=True)
+
+    written_paths = plan.execute({"xlsx": write_xlsx}, automate_context=context)
+
+    assert encoded_paths == [str(tmp_path / "output" / "Systems_data.xlsx")]
+    assert written_paths == [str(tmp_path / "output" / "Systems_data.xlsx"), str(tmp_path / "copy" / "Systems_data.xlsx")]
+    assert (tmp_path / "copy" / "Systems_data.xlsx").read_text() == "workbook"
+    assert context.stored_files == encoded_paths
+
+
+def test_unknown_format_is_rejected_before_writing(tmp_path):
+    plan = ExportPlan(destinations=[str(tmp_path)], formats=["xlsx", "ods"])
+
+    with pytest.raises(ValueError, match="ods"):
+        plan.execute({"xlsx": lambda path: pytest.fail("nothing should be written")})
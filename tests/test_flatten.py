@@ -0,0 +1,80 @@
+"""Test the iterative object traversal."""
+import sys
+
+from specklepy.api import operations
+from specklepy.objects.base import Base
+from specklepy.objects.other import Collection
+from specklepy.transports.memory import MemoryTransport
+
+from benchmarks.synthetic_model import create_nested_model, send_to_local_server
+from flatten import BaseTraversal, flatten_base
+from model_index import index_model
+from pipeline import iter_version_objects, load_object
+
+
+class Mesh(Base, speckle_type="Tests.Flatten.Mesh"):
+    pass
+
+
+def create_base(name, elements=None, parameters=True):
+    base = Base(name=name)
+    if parameters:
+        base.parameters = Base()
+    if elements is not None:
+        base.elements = elements
+    return base
+
+
+def names(objects):
+    return [base.name for base in objects]
+
+
+def test_flatten_base_yields_children_before_their_parent():
+    root = create_base("root", [create_base("a", [create_base("a1"), create_base("a2")]), create_base("b")])
+
+    assert names(flatten_base(root)) == ["a1", "a2", "a", "b", "root"]
+    assert names(BaseTraversal().traverse(root)) == ["root", "a", "a1", "a2", "b"]
+
+
+def test_deep_nesting_does_not_hit_the_recursion_limit():
+    model = create_nested_model(depth=sys.getrecursionlimit() * 2, num_params=1)
+
+    assert sum(1 for _ in flatten_base(model)) == sys.getrecursionlimit() * 2 + 1
+
+
+def test_shared_objects_are_yielded_once():
+    shared = create_base("shared")
+    shared.id = "shared-id"
+    root = create_base("root", [create_base("a", [shared]), create_base("b", [shared])])
+
+    assert names(BaseTraversal().traverse(root)) == ["root", "a", "shared", "b"]
+
+
+def test_detached_members_and_filters():
+    mesh = Mesh(name="mesh")
+    mesh.elements = [create_base("under mesh")]
+    root = Collection(name="root", elements=[create_base("a", [mesh]), create_base("no parameters", parameters=False)])
+    root["@Types"] = create_base("types", parameters=False)
+    root["@Types"]["@Walls"] = [create_base("wall type")]
+
+    assert names(BaseTraversal().traverse(root)) == ["root", "a", "mesh", "under mesh", "no parameters"]
+    assert names(BaseTraversal(follow_detached=True).traverse(root)) == [
+        "root", "a", "mesh", "under mesh", "no parameters", "types", "wall type"]
+    assert names(BaseTraversal(prune_speckle_types=["Tests.Flatten.Mesh"]).traverse(root)) == ["root", "a", "no parameters"]
+    assert names(BaseTraversal(speckle_types=["Tests.Flatten.Mesh"]).traverse(root)) == ["mesh"]
+    assert names(BaseTraversal(follow_detached=True, require_parameters=True, include_collections=False).traverse(root)) == [
+        "a", "under mesh", "wall type"]
+
+
+def test_nested_elements_are_indexed_in_both_pipelines():
+    model = create_nested_model(depth=4, num_chains=3, num_params=2)
+    version_object_id, transport = send_to_local_server(model)
+
+    model_index = index_model(operations.receive(version_object_id, transport, MemoryTransport()))
+    objects = list(iter_version_objects(load_object(transport, version_object_id), transport))
+
+    assert len(model_index) == 12
+    assert [object_json['id'] for _, object_json in objects] == model_index.object_ids
+    host_id, nested_id = model_index.object_ids[:2]
+    assert model_index.parents[nested_id] == host_id
+    assert model_index.collections[nested_id] == 'elements'
@@ -0,0 +1,164 @@
+"""Test the pooled GraphQL client against a local stand-in of the server's GraphQL endpoint."""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+from accessing_system_specific_data import AccessSystemSpecificData
+from graphql_client import QUERIES, CompiledQuery, GraphQLClient, GraphQLResponseError
+
+TOKEN = "token"
+VERSIONS = {"project": {"versions": {"items": [{"referencedObject": "root"}]}}}
+
+
+def create_child(i):
+    # Later children bring new parameters, so the pages of a system have different columns.
+    parameters = {f"p{j}": {"name": f"Param {j}", "value": i * j, "units": "mm" if j % 2 else None} for j in range(i % 4 + 1)}
+    if i % 3:
+        parameters["ss"] = {"name": "Classification.Uniclass.Ss.Description", "value": f"System {i % 3}", "units": None}
+    return {"data": {"id": f"id{i}", "speckle_type": "Objects.BuiltElements.Revit.RevitElement", "parameters": parameters}}
+
+
+CHILDREN = [create_child(i) for i in range(23)]
+
+
+def get_children_page(variables):
+    """Pages through CHILDREN like the server, with the index of the next child as cursor."""
+    start = int(variables.get("cursor") or 0)
+    end = start + variables["limit"]
+    return {"data": {"stream": {"object": {"children": {
+        "totalCount": len(CHILDREN),
+        "cursor": str(end) if end < len(CHILDREN) else None,
+        "objects": CHILDREN[start:end],
+    }}}}}
+
+
+class GraphQLServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), GraphQLRequestHandler)
+        self.requests = []
+        self.client_ports = set()
+        self.response = {"data": VERSIONS}
+        self.pages = {"CommitChildren": get_children_page}
+
+
+class GraphQLRequestHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so reused connections can be seen by their client port.
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append((body, self.headers.get("Authorization")))
+        self.server.client_ports.add(self.client_address[1])
+
+        page = self.server.pages.get(body["operationName"])
+        payload = json.dumps(page(body["variables"]) if page else self.server.response).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+@pytest.fixture
+def graphql_server():
+    server = GraphQLServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def get_endpoint(server):
+    host, port = server.server_address
+    return f"http://{host}:{port}/graphql"
+
+
+def test_queries_are_compiled_with_their_operation_name():
+    assert QUERIES["GetStreamQuery.graphql"].operation_name == "Stream"
+    assert QUERIES["GetCommitQuery.graphql"].operation_name == "Commit"
+
+
+def test_execute_reuses_one_connection(graphql_server):
+    client = GraphQLClient(get_endpoint(graphql_server), TOKEN)
+
+    for i in range(5):
+        assert client.execute(QUERIES["GetStreamQuery.graphql"], {"streamId": f"project{i}"}) == VERSIONS
+
+    assert len(graphql_server.requests) == 5
+    assert len(graphql_server.client_ports) == 1
+    body, auth = graphql_server.requests[0]
+    assert body["operationName"] == "Stream"
+    assert body["variables"] == {"streamId": "project0"}
+    assert auth == f"Bearer {TOKEN}"
+    client.close()
+
+
+def test_execute_answers_repeated_queries_from_the_cache(graphql_server):
+    client = GraphQLClient(get_endpoint(graphql_server), TOKEN, cache_size=1)
+    query = QUERIES["GetStreamQuery.graphql"]
+
+    client.execute(query, {"streamId": "project"})
+    client.execute(query, {"streamId": "project"})
+    assert len(graphql_server.requests) == 1
+
+    # The oldest entry is evicted once the cache is full.
+    client.execute(query, {"streamId": "other"})
+    client.execute(query, {"streamId": "project"})
+    assert len(graphql_server.requests) == 3
+    client.close()
+
+
+def test_execute_raises_when_the_response_has_no_data(graphql_server):
+    graphql_server.response = {"errors": [{"message": "Not found"}], "data": None}
+    client = GraphQLClient(get_endpoint(graphql_server), TOKEN, cache_size=10)
+
+    with pytest.raises(GraphQLResponseError, match="Not found"):
+        client.execute(CompiledQuery.from_text("query Stream { project { id } }"))
+    with pytest.raises(GraphQLResponseError):
+        client.execute(CompiledQuery.from_text("query Stream { project { id } }"))
+    # Failed responses are not cached.
+    assert len(graphql_server.requests) == 2
+    client.close()
+
+
+def test_access_system_data_queries_through_the_client(graphql_server):
+    access_system_data = AccessSystemSpecificData(stream_url=None, stream_id="project", server=get_endpoint(graphql_server), token=TOKEN)
+
+    stream_response = access_system_data.get_query_response("GetStreamQuery.graphql", {"streamId": "project"}, "Stream")
+
+    assert access_system_data.get_list_of_commit_object_ids(stream_response) == ["root"]
+    assert graphql_server.requests[0][0]["query"] == access_system_data.read_query("GetStreamQuery.graphql")
+
+
+@pytest.mark.parametrize("prefetch", [True, False])
+def test_iter_commit_children_pages_follows_the_cursors(graphql_server, prefetch):
+    access_system_data = AccessSystemSpecificData(stream_url=None, stream_id="project", server=get_endpoint(graphql_server), token=TOKEN)
+
+    pages = list(access_system_data.iter_commit_children_pages("root", page_size=10, prefetch=prefetch))
+
+    assert [len(page) for page in pages] == [10, 10, 3]
+    assert [child for page in pages for child in page] == CHILDREN
+    assert [body["variables"]["cursor"] for body, _ in graphql_server.requests] == [None, "10", "20"]
+    assert all(body["variables"]["limit"] == 10 for body, _ in graphql_server.requests)
+
+
+@pytest.mark.parametrize("page_size", [1, 4, 100])
+def test_group_commit_children_matches_grouping_all_children(graphql_server, page_size):
+    access_system_data = AccessSystemSpecificData(stream_url="url", stream_id="project", server=get_endpoint(graphql_server), token=TOKEN)
+    expected = access_system_data.groupby_system_classification(
+        access_system_data.create_speckle_data_dataframe(commit_data_dictionary=CHILDREN, commit_object_ids=["root"]))
+
+    systems_df = access_system_data.group_commit_children(["root"], page_size=page_size)
+
+    assert list(systems_df) == list(expected) == ["System 1", "System 2"]
+    for classification_desc, df in expected.items():
+        pd.testing.assert_frame_equal(systems_df[classification_desc], df)
@@ -0,0 +1,119 @@
+"""Test that the columnar grouping matches the row-by-row grouping it replaced."""
+import random
+
+import pandas as pd
+import pytest
+
+from grouping import CLASSIFICATION_PARAMETER, SystemBlockAccumulator, group_by_system_classification
+
+ID_COLUMNS = ['Model URL', 'Version Object ID', 'Object ID']
+SYSTEMS = ["Framed wall systems", "Door systems", "Lighting systems"]
+PARAMETERS = [("Mark", None), ("Length", "m"), ("Length", "mm"), ("Area", "m²"), ("Count", None), ("Comments", None), ("Is External", None)]
+
+
+def groupby_system_classification_with_iterrows(df):
+    """The grouping before the columnar engine: one dict per row, one DataFrame per system."""
+    systems_data = {}
+
+    for _, row in df.iterrows():
+        data = row['data']
+
+        if 'parameters' in data.keys():
+            parameters = data['parameters']
+            classification_desc = None
+            other_params = {
+                'Model URL': row['Model URL'],
+                'Version Object ID': row['Version Object ID'],
+                'Object ID': row['Object ID'],
+            }
+
+            for param_name, param_info in parameters.items():
+                if isinstance(param_info, dict):
+                    if param_info['name'] == CLASSIFICATION_PARAMETER:
+                        classification_desc = param_info['value']
+                    else:
+                        param_label = param_info['name']
+                        if param_info['units'] != None:
+                            param_label += f" ({param_info['units']})"
+                        other_params[param_label] = param_info['value']
+
+            if classification_desc:
+                if classification_desc not in systems_data:
+                    systems_data[classification_desc] = []
+
+                other_params[CLASSIFICATION_PARAMETER] = classification_desc
+                systems_data[classification_desc].append(other_params)
+
+    systems_dfs = {}
+    for classification_desc, desc_data in systems_data.items():
+        systems_dfs[classification_desc] = pd.DataFrame(desc_data)
+
+    return systems_dfs
+
+
+def random_value(rng, name):
+    if name == "Mark":
+        return rng.choice([f"M-{rng.randint(1, 99)}", None, 7])
+    if name == "Count":
+        return rng.randint(0, 10)
+    if name == "Is External":
+        return rng.choice([True, False])
+    if name == "Comments":
+        return rng.choice(["", "Checked", None])
+    return rng.choice([round(rng.uniform(0, 10), 3), None, float("nan")])
+
+
+def create_objects_frame(num_objects, seed):
+    """
+    Object rows with parameters missing at random, labels repeated within an object, a parameter
+    that shadows an id column, and rows that are not classified or have no parameters.
+    """
+    rng = random.Random(seed)
+    rows = []
+    for number in range(num_objects):
+        parameters = {}
+        for key, (name, units) in enumerate(rng.sample(PARAMETERS, rng.randint(0, len(PARAMETERS)))):
+            parameters[f"param-{key}"] = {"name": name, "value": random_value(rng, name), "units": units}
+        if rng.random() < 0.2 and parameters:
+            # The same label under another key: the later value wins.
+            name, units = rng.choice([(info["name"], info["units"]) for info in parameters.values()])
+            parameters["duplicate"] = {"name": name, "value": random_value(rng, name), "units": units}
+        if rng.random() < 0.05:
+            parameters["shadow"] = {"name": "Object ID", "value": f"shadowed-{number}", "units": None}
+        if rng.random() < 0.1:
+            parameters["applicationId"] = "not a parameter"
+        classification = rng.choice(SYSTEMS + ["", None, "missing"])
+        if classification != "missing":
+            parameters["classification"] = {"name": CLASSIFICATION_PARAMETER, "value": classification, "units": None}
+        # Insert the classification anywhere, so it does not always come last.
+        items = list(parameters.items())
+        rng.shuffle(items)
+        data = {"parameters": dict(items)} if rng.random() > 0.05 else {}
+        rows.append({"Model URL": "model", "Version Object ID": "version", "Object ID": f"id-{number}", "data": data})
+    return pd.DataFrame(rows)
+
+
+def assert_same_systems(systems_df, expected):
+    assert list(systems_df) == list(expected)
+    for classification_desc, df in expected.items():
+        pd.testing.assert_frame_equal(systems_df[classification_desc], df)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_grouping_matches_the_iterrows_grouping(seed):
+    df = create_objects_frame(300, seed)
+
+    systems_df = group_by_system_classification(df[ID_COLUMNS], df['data'])
+
+    assert_same_systems(systems_df, groupby_system_classification_with_iterrows(df))
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_pages_match_the_iterrows_grouping(seed):
+    df = create_objects_frame(300, seed)
+    accumulator = SystemBlockAccumulator()
+    for start in range(0, len(df), 64):
+        page = df.iloc[start:start + 64]
+        accumulator.add(page[ID_COLUMNS], page['data'])
+
+    assert_same_systems(accumulator.to_dataframes(), groupby_system_classification_with_iterrows(df))
@@ -0,0 +1,124 @@
+"""Test merging added and removed objects into the previous system results."""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.offline import OfflineAccessSystemSpecificData
+from benchmarks.synthetic_model import create_synthetic_model, send_to_local_server
+from incremental import IncrementalState
+from projection import ParameterProjection
+
+
+def system_df(object_ids, version, marks, system='Walls'):
+    return pd.DataFrame({
+        'Model URL': 'model',
+        'Version Object ID': version,
+        'Object ID': object_ids,
+        'Mark': marks,
+        'Classification.Uniclass.Ss.Description': system,
+    })
+
+
+def test_only_affected_systems_are_rebuilt(tmp_path):
+    state = IncrementalState(str(tmp_path), model_url='model')
+    first_run = {'Walls': system_df(['a', 'b'], 'v1', ['M1', 'M2']), 'Doors': system_df(['c'], 'v1', ['D1'], 'Doors')}
+    state.apply(state.diff(['a', 'b', 'c'], {'a': 'wall-a', 'b': 'wall-b'}), first_run, 'v1', {'a': 'wall-a', 'b': 'wall-b'})
+    state.save()
+
+    state = IncrementalState.load(str(tmp_path), model_url='model')
+    changes = state.diff(['a', 'b2', 'c'], {'b2': 'wall-b'})
+    assert changes.added == ['b2']
+    assert changes.removed == ['b']
+    assert changes.changed == [('b', 'b2')]
+
+    systems_df = state.apply(changes, {'Walls': system_df(['b2'], 'v2', ['M2 edited'])}, 'v2', {'b2': 'wall-b'})
+
+    assert list(systems_df) == ['Walls', 'Doors']
+    assert systems_df['Walls']['Object ID'].tolist() == ['a', 'b2']
+    assert systems_df['Walls']['Mark'].tolist() == ['M1', 'M2 edited']
+    assert systems_df['Doors']['Object ID'].tolist() == ['c']
+    assert (systems_df['Doors']['Version Object ID'] == 'v2').all()
+    assert state.objects == {'a': ['Walls', 'wall-a', None], 'b2': ['Walls', 'wall-b', None], 'c': ['Doors', None, None]}
+
+
+def test_state_of_another_model_is_ignored(tmp_path):
+    state = IncrementalState(str(tmp_path), model_url='model')
+    state.apply(state.diff(['a']), {'Walls': system_df(['a'], 'v1', ['M1'])}, 'v1')
+    state.save()
+
+    assert IncrementalState.load(str(tmp_path), model_url='other model').objects == {}
+
+
+def test_systems_are_saved_as_json_with_their_values(tmp_path):
+    state = IncrementalState(str(tmp_path), model_url='model')
+    walls = system_df(['a', 'b', 'c'], 'v1', ['M1', 2, np.nan]).assign(Length=[0.1 + 0.2, np.nan, 3.0], Count=[1, 2, 3])
+    state.apply(state.diff(['a', 'b', 'c']), {'Walls': walls}, 'v1')
+    state.save()
+
+    assert os.listdir(tmp_path / 'systems') == ['0.json']
+    loaded = IncrementalState.load(str(tmp_path), model_url='model')
+    pd.testing.assert_frame_equal(loaded.systems_df['Walls'], walls)
+    assert loaded.systems_df['Walls']['Mark'].tolist()[:2] == ['M1', 2]
+
+
+def test_state_of_an_older_layout_is_ignored(tmp_path):
+    (tmp_path / 'state.json').write_text(json.dumps({'model_url': 'model', 'version_object_id': 'v1', 'objects': {'a': ['Walls', None]},
+                                                     'systems': {'Walls': '0.pkl'}}))
+
+    assert IncrementalState.load(str(tmp_path), model_url='model').objects == {}
+
+
+def test_state_saved_with_other_settings_is_ignored(tmp_path):
+    state = IncrementalState(str(tmp_path), model_url='model', settings={'type_parameters': ['Type Mark'], 'projection': None})
+    state.apply(state.diff(['a']), {'Walls': system_df(['a'], 'v1', ['M1'])}, 'v1')
+    state.save()
+
+    assert IncrementalState.load(str(tmp_path), model_url='model', settings={'type_parameters': None, 'projection': None}).objects == {}
+    assert IncrementalState.load(str(tmp_path), model_url='model', settings={'type_parameters': ['Type Mark'], 'projection': None}).objects
+
+
+def test_run_with_other_settings_rebuilds_the_systems(tmp_path):
+    access_system_data = OfflineAccessSystemSpecificData(*send_to_local_server(create_synthetic_model(num_elements=40, num_params=6, seed=4)))
+    access_system_data.process_speckle_data(fetch_workers=0, incremental_state_path=str(tmp_path), projection=ParameterProjection(columns=['Mark']))
+
+    systems_df = access_system_data.process_speckle_data(fetch_workers=0, incremental_state_path=str(tmp_path))
+
+    expected = access_system_data.process_speckle_data(fetch_workers=0, streaming=False)
+    assert list(systems_df) == list(expected)
+    for classification_desc, df in expected.items():
+        pd.testing.assert_frame_equal(systems_df[classification_desc], df)
+
+
+def test_instances_of_an_edited_type_are_changed(tmp_path):
+    state = IncrementalState(str(tmp_path), model_url='model')
+    state.apply(state.diff(['a', 'b'], type_object_ids={'a': 'type-1', 'b': 'type-2'}), {'Walls': system_df(['a', 'b'], 'v1', ['M1', 'M2'])}, 'v1',
+                type_object_ids={'a': 'type-1', 'b': 'type-2'})
+
+    changes = state.diff(['a', 'b'], {'a': 'wall-a'}, type_object_ids={'a': 'type-1', 'b': 'type-2 edited'})
+
+    assert changes.added == ['b']
+    assert changes.removed == ['b']
+    assert changes.changed == [('b', 'b')]
+
+
+def test_edited_type_is_joined_again(tmp_path):
+    model = create_synthetic_model(num_elements=40, num_params=6, seed=4)
+    first_version, remote_transport = send_to_local_server(model)
+    fire_rating = next(param for types in model["@Types"].__dict__.values() if isinstance(types, list) for type_object in types
+                       for param in type_object.parameters.__dict__.values() if getattr(param, 'name', None) == 'Type Fire Rating')
+    fire_rating.value = 'Edited'
+    second_version, _ = send_to_local_server(model, remote_transport)
+
+    OfflineAccessSystemSpecificData(first_version, remote_transport).process_speckle_data(
+        fetch_workers=0, incremental_state_path=str(tmp_path), type_parameters=['Type Fire Rating'])
+    access_system_data = OfflineAccessSystemSpecificData(second_version, remote_transport)
+    systems_df = access_system_data.process_speckle_data(fetch_workers=0, incremental_state_path=str(tmp_path), type_parameters=['Type Fire Rating'])
+
+    expected = access_system_data.process_speckle_data(fetch_workers=0, streaming=False, type_parameters=['Type Fire Rating'])
+    assert sorted(systems_df) == sorted(expected)
+    assert any('Edited' in df.get('Type Fire Rating', pd.Series(dtype=object)).tolist() for df in expected.values())
+    for classification_desc, df in expected.items():
+        df = df.sort_values('Object ID', ignore_index=True)
+        pd.testing.assert_frame_equal(systems_df[classification_desc].sort_values('Object ID', ignore_index=True)[list(df.columns)], df)
@@ -0,0 +1,48 @@
+"""Test indexing the objects of a version in one traversal."""
+from specklepy.objects.base import Base
+from specklepy.objects.other import Collection
+
+from model_index import index_model
+
+
+class Material(Base, speckle_type='Tests.ModelIndex.Material'):
+    pass
+
+
+def create_object(id, base_class=Base):
+    element = base_class()
+    element.id = id
+    return element
+
+
+def test_index_collects_root_collections_and_type_categories():
+    root = Collection(name='model', elements=[create_object('wall'), create_object('door')])
+    root.id = 'root'
+    root['@Materials'] = [create_object('concrete', Material), create_object('wall')]
+    types = Base()
+    types.id = 'types'
+    types['@Walls'] = [create_object('wall type')]
+    types['not a category'] = [create_object('ignored')]
+    root['@Types'] = types
+
+    index = index_model(root)
+
+    # '@Views', '@Project Information' and '@Sheets' are missing from this model.
+    assert index.object_ids == ['concrete', 'wall', 'door', 'wall type']
+    assert index.speckle_types['concrete'] == 'Tests.ModelIndex.Material'
+    assert index.speckle_types['wall'] == 'Base'
+    assert index.collections == {'concrete': '@Materials', 'wall': '@Materials', 'door': 'elements', 'wall type': '@Types/@Walls'}
+    assert index.parents == {'concrete': 'root', 'wall': 'root', 'door': 'root', 'wall type': 'types'}
+    assert index.get_collection_ids('elements') == ['door']
+
+
+def test_nested_collections_are_walked_into():
+    level = Collection(name='Level 1', elements=[create_object('wall'), create_object('door')])
+    level.id = 'level'
+    root = Collection(name='model', elements=[level, create_object('roof')])
+    root.id = 'root'
+
+    index = index_model(root)
+
+    assert index.object_ids == ['wall', 'door', 'roof']
+    assert index.parents == {'wall': 'level', 'door': 'level', 'roof': 'root'}
@@ -0,0 +1,73 @@
+"""Test the persistent object cache."""
+import json
+
+import pytest
+from specklepy.logging.exceptions import SpeckleException
+from specklepy.transports.memory import MemoryTransport
+
+from object_cache import ObjectCache
+
+
+def serialized(id, size=100, closure=None):
+    data = {"id": id, "padding": "x" * size}
+    if closure:
+        data["__closure"] = {child: 1 for child in closure}
+    return json.dumps(data)
+
+
+def test_objects_persist_between_runs(tmp_path):
+    path = str(tmp_path / "objects.db")
+    cache = ObjectCache(path)
+    cache.save_object("a", serialized("a"))
+    cache.end_write()
+    cache.close()
+
+    cache = ObjectCache(path)
+    assert cache.get_object("a") == serialized("a")
+    assert cache.has_objects(["a", "b"]) == {"a": True, "b": False}
+    cache.close()
+
+
+def test_least_recently_used_objects_are_evicted_on_close(tmp_path):
+    path = str(tmp_path / "objects.db")
+    cache = ObjectCache(path, max_size_bytes=3 * len(serialized("a")))
+    for id in ["a", "b", "c", "d"]:
+        cache.save_object(id, serialized(id))
+    cache.end_write()
+    cache.get_object("a")
+    # Everything received in the run stays readable until the cache is closed.
+    assert all(cache.has_objects(["a", "b", "c", "d"]).values())
+    cache.close()
+
+    cache = ObjectCache(path)
+    assert cache.has_objects(["a", "b", "c", "d"]) == {"a": True, "b": False, "c": True, "d": True}
+    cache.close()
+
+
+def test_parent_with_evicted_children_is_not_complete(tmp_path):
+    cache = ObjectCache(str(tmp_path / "objects.db"))
+    cache.save_object("child", serialized("child"))
+    cache.save_object("parent", serialized("parent", closure=["child", "other child"]))
+    cache.end_write()
+
+    assert not cache.has_complete_object("parent")
+    cache.save_object("other child", serialized("other child"))
+    assert cache.has_complete_object("parent")
+    cache.close()
+
+
+def test_object_and_missing_children_are_copied(tmp_path):
+    cache = ObjectCache(str(tmp_path / "objects.db"))
+    for id in ["child", "other child"]:
+        cache.save_object(id, serialized(id))
+    cache.save_object("parent", serialized("parent", closure=["child", "other child"]))
+    cache.end_write()
+    target = MemoryTransport()
+    target.save_object("child", "already there")
+
+    assert cache.copy_object_and_children("parent", target) == serialized("parent", closure=["child", "other child"])
+    assert target.objects == {"child": "already there", "other child": serialized("other child"),
+                              "parent": serialized("parent", closure=["child", "other child"])}
+    with pytest.raises(SpeckleException):
+        cache.copy_object_and_children("missing", target)
+    cache.close()
@@ -0,0 +1,101 @@
+"""Test converting received objects straight to the data the grouping reads, and the frame built from that data."""
+import json
+
+import pandas as pd
+import pytest
+from specklepy.api import operations
+from specklepy.objects.geometry import Mesh
+from specklepy.serialization.base_object_serializer import BaseObjectSerializer
+from specklepy.transports.memory import MemoryTransport
+
+from accessing_system_specific_data import AccessSystemSpecificData
+from benchmarks.benchmark_create_dataframe import create_dataframe_with_series_apply
+from benchmarks.synthetic_model import create_synthetic_model, send_to_local_server
+from model_index import index_model
+from SpecklePy_accessing_system_specific_data import AccessSystemSpecificDataSpecklePy
+
+
+def create_mesh():
+    return Mesh.create(vertices=[0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0, 0.0], faces=[3, 0, 1, 2])
+
+
+@pytest.fixture(scope="module")
+def received_objects():
+    """The objects of a received version whose elements have display meshes and detached geometry."""
+    model = create_synthetic_model(num_elements=60, num_params=6, seed=7, unclassified_ratio=0.2)
+    for element in model.elements:
+        element.displayValue = [create_mesh()]
+        element["@solid"] = create_mesh()
+    version_object_id, transport = send_to_local_server(model)
+    return index_model(operations.receive(version_object_id, transport, MemoryTransport())).objects
+
+
+@pytest.fixture
+def access_system_data():
+    return AccessSystemSpecificDataSpecklePy(model_url="https://speckle.example/projects/p", project_id="p", server="https://speckle.example", token="")
+
+
+def test_object_data_is_grouped_like_the_serialized_objects(received_objects, access_system_data):
+    serializer = BaseObjectSerializer()
+    serialized_data = {id: json.loads(serializer.write_json(element)[1]) for id, element in received_objects.items()}
+    object_data = {id: access_system_data.get_object_data(element) for id, element in received_objects.items()}
+
+    systems_df = access_system_data.groupby_system_classification(access_system_data.create_speckle_data_dataframe(object_data, "version"))
+
+    expected = access_system_data.groupby_system_classification(access_system_data.create_speckle_data_dataframe(serialized_data, "version"))
+    assert list(systems_df) == list(expected)
+    for classification_desc, df in expected.items():
+        pd.testing.assert_frame_equal(systems_df[classification_desc], df)
+
+
+def test_geometry_and_display_values_are_skipped(received_objects, access_system_data):
+    element = next(element for element in received_objects.values() if getattr(element, 'displayValue', None))
+
+    data = access_system_data.get_object_data(element)
+
+    assert set(data) == {"id", "speckle_type", "parameters"}
+    assert data["id"] == element.id
+    assert all(set(param) == {"name", "value", "units"} for param in data["parameters"].values())
+    assert "Mesh" not in json.dumps(data)
+
+
+def create_legacy_dataframe_with_series_apply(access_system_data, commit_data_dictionary, commit_object_ids):
+    """The previous construction of the GraphQL path, with a second apply for the id and type."""
+    data_list = []
+    for dictionary in commit_data_dictionary:
+        data_list.append({"speckle_data": {"Model URL": access_system_data.stream_url, "Version Object ID": commit_object_ids[0], "data": dictionary}})
+
+    data_df = pd.DataFrame(data_list)
+    data_df = data_df.speckle_data.apply(pd.Series)
+    data_df['Object ID'], data_df['speckle_type'] = zip(*data_df['data'].apply(access_system_data.extract_id_type))
+    return data_df[['Model URL', 'Version Object ID', 'Object ID', 'speckle_type', 'data']]
+
+
+def create_object_data(number):
+    """Object data whose members differ between objects: parameters, application ids and display values come and go."""
+    data = {"id": f"{number:032x}", "speckle_type": "Objects.BuiltElements.Revit.RevitWall" if number % 3 else "Base"}
+    if number % 4:
+        data["parameters"] = {"MARK": {"name": "Mark", "value": f"M-{number}", "units": None}}
+    if number % 5 == 0:
+        data["applicationId"] = f"app-{number}"
+    if number % 7 == 0:
+        data["displayValue"] = [{"referencedId": "mesh"}]
+    return data
+
+
+def test_dataframe_matches_the_series_apply_construction(access_system_data):
+    id_data_dictionary = {data["id"]: data for data in map(create_object_data, range(50))}
+
+    data_df = access_system_data.create_speckle_data_dataframe(id_data_dictionary, "version")
+
+    pd.testing.assert_frame_equal(data_df, create_dataframe_with_series_apply(id_data_dictionary, access_system_data.model_url, "version"))
+    assert data_df["data"].tolist() == list(id_data_dictionary.values())
+
+
+def test_legacy_dataframe_matches_the_series_apply_construction():
+    access_system_data = AccessSystemSpecificData(stream_url="https://speckle.example/streams/p", stream_id="p", server="https://speckle.example", token="")
+    commit_data_dictionary = [{"data": create_object_data(number)} for number in range(50)]
+
+    data_df = access_system_data.create_speckle_data_dataframe(commit_data_dictionary, ["version"])
+
+    pd.testing.assert_frame_equal(data_df, create_legacy_dataframe_with_series_apply(access_system_data, commit_data_dictionary, ["version"]))
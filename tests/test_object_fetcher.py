@@ -0,0 +1,110 @@
+"""Test the concurrent object fetcher against a local stand-in of the server's object endpoint."""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pytest
+import requests
+
+from object_fetcher import ObjectFetcher
+
+PROJECT_ID = "project"
+TOKEN = "token"
+OBJECTS = {
+    f"id{i}": {"id": f"id{i}", "speckle_type": "Base", "parameters": {"p": {"name": "Mark", "value": i, "units": None}}}
+    for i in range(25)
+}
+
+
+class ObjectServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), ObjectRequestHandler)
+        self.requests = []
+        self.accept_headers = []
+        self.failures = 0
+
+
+class ObjectRequestHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"])).decode()
+        self.server.requests.append((self.path, self.headers.get("Authorization")))
+        self.server.accept_headers.append(self.headers.get("Accept"))
+
+        if self.server.failures:
+            self.server.failures -= 1
+            self.send_response(503)
+            self.end_headers()
+            return
+
+        ids = json.loads(parse_qs(body)["objects"][0])
+        lines = "".join(f"{id}\t{json.dumps(OBJECTS[id])}\n" for id in ids if id in OBJECTS)
+        payload = lines.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+@pytest.fixture
+def object_server():
+    server = ObjectServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def create_fetcher(server, **kwargs):
+    host, port = server.server_address
+    return ObjectFetcher(server=f"http://{host}:{port}", project_id=PROJECT_ID, token=TOKEN, backoff_factor=0, **kwargs)
+
+
+def test_fetch_returns_id_data_mapping_in_batches(object_server):
+    fetcher = create_fetcher(object_server, batch_size=10, max_workers=3)
+    object_ids = list(OBJECTS) + ["id0", "missing"]
+
+    id_data_dictionary = fetcher.fetch(object_ids)
+
+    assert id_data_dictionary == OBJECTS
+    assert list(id_data_dictionary) == list(OBJECTS)
+    assert len(object_server.requests) == 3
+    assert all(path == f"/api/getobjects/{PROJECT_ID}" for path, _ in object_server.requests)
+    assert all(auth == f"Bearer {TOKEN}" for _, auth in object_server.requests)
+    assert fetcher.bytes_received == sum(len(f"{id}\t{json.dumps(data)}\n") for id, data in OBJECTS.items())
+
+
+def test_shared_session_headers_are_left_unchanged(object_server):
+    session = requests.Session()
+    headers = dict(session.headers)
+    fetcher = create_fetcher(object_server, session=session)
+
+    assert fetcher.fetch(["id1"]) == {"id1": OBJECTS["id1"]}
+    assert dict(session.headers) == headers
+    assert object_server.requests[0][1] == f"Bearer {TOKEN}"
+    assert object_server.accept_headers == ["text/plain"]
+    session.close()
+
+
+def test_fetch_retries_server_errors(object_server):
+    object_server.failures = 2
+    fetcher = create_fetcher(object_server, batch_size=100, max_retries=2)
+
+    assert fetcher.fetch(["id1", "id2"]) == {"id1": OBJECTS["id1"], "id2": OBJECTS["id2"]}
+    assert len(object_server.requests) == 3
+
+
+def test_fetch_raises_when_retries_are_exhausted(object_server):
+    object_server.failures = 5
+    fetcher = create_fetcher(object_server, max_retries=1)
+
+    with pytest.raises(requests.HTTPError):
+        fetcher.fetch(["id1"])
+    assert len(object_server.requests) == 2
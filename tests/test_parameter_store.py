@@ -0,0 +1,93 @@
+"""Test that the parameter store keeps the grouped blocks compactly and gives them back unchanged."""
+import numpy as np
+import pandas as pd
+
+from parameter_store import MISSING, ParameterStore, ValueDictionary
+
+
+def create_block(rows):
+    block = np.empty((len(rows), len(rows[0])), dtype=object)
+    for i, row in enumerate(rows):
+        for j, value in enumerate(row):
+            block[i, j] = value
+    return block
+
+
+PAGES = [
+    (["Object ID", "Length (m)", "Count", "Material", "Is External"], create_block([
+        ["a", 1.5, 3, "Concrete", True],
+        ["b", np.nan, 4, "Concrete", False],
+    ])),
+    (["Object ID", "Count", "Material", "Mixed", "Length (m)", "Tags"], create_block([
+        ["c", np.nan, "Steel", 1, 2.0, ["x", "y"]],
+        ["d", 2 ** 70, None, 1.0, -0.0, np.nan],
+        ["e", 5, "Concrete", "1", 3.25, np.nan],
+    ])),
+]
+
+
+def stack_blocks(pages):
+    """The blocks of one system stacked on the union of their columns, as the store should decode them."""
+    columns = list(dict.fromkeys(column for page_columns, _ in pages for column in page_columns))
+    stacked = np.full((sum(len(block) for _, block in pages), len(columns)), np.nan, dtype=object)
+    start = 0
+    for page_columns, block in pages:
+        stacked[start:start + len(block), [columns.index(column) for column in page_columns]] = block
+        start += len(block)
+    return columns, stacked
+
+
+def test_value_dictionary_keeps_types_apart():
+    dictionary = ValueDictionary()
+    values = np.empty(8, dtype=object)
+    values[:] = [1, 1.0, True, "1", np.nan, "1", None, 1]
+
+    codes = dictionary.encode(values)
+
+    assert codes.tolist() == [0, 1, 2, 3, MISSING, 3, 4, 0]
+    assert [type(value) for value in dictionary.decode(codes[codes != MISSING])] == [int, float, bool, str, str, type(None), int]
+
+
+def test_blocks_are_decoded_unchanged():
+    store = ParameterStore()
+    for columns, block in PAGES:
+        store.add_block("Walls", columns, block)
+
+    expected_columns, expected_block = stack_blocks(PAGES)
+    columns, block = store.get_block("Walls")
+
+    assert columns == expected_columns
+    assert [[type(value) for value in row] for row in block] == [[type(value) for value in row] for row in expected_block]
+    pd.testing.assert_frame_equal(pd.DataFrame(block), pd.DataFrame(expected_block))
+    assert np.signbit(block[3, columns.index("Length (m)")])
+    pd.testing.assert_frame_equal(store.get_dataframe("Walls"), pd.DataFrame(expected_block, columns=expected_columns).infer_objects())
+
+
+def test_columns_use_typed_arrays_and_repeated_values_are_kept_once():
+    store = ParameterStore()
+    columns = ["Object ID", "Material", "Length (m)", "Count"]
+    for page in range(3):
+        store.add_block("Walls", columns, create_block([[f"id-{page}-{row}", f"Material {row % 2}", row / 2, row]
+                                                        for row in range(100)]))
+
+    chunks = store.systems["Walls"].columns
+    assert [chunk.values.dtype for chunk in chunks["Object ID"]] == [np.dtype(object)] * 3
+    assert [chunk.values.dtype for chunk in chunks["Material"]] == [np.dtype(np.int32)] * 3
+    assert [chunk.values.dtype for chunk in chunks["Length (m)"]] == [np.dtype(np.float64)] * 3
+    assert [chunk.values.dtype for chunk in chunks["Count"]] == [np.dtype(np.int64)] * 3
+    assert len(store.dictionary) == 2
+    assert store.get_dataframe("Walls").dtypes.tolist() == [np.dtype(object), np.dtype(object), np.dtype(np.float64), np.dtype(np.int64)]
+
+
+def test_iter_blocks_releases_each_system():
+    store = ParameterStore()
+    store.add_block("Walls", ["Object ID"], create_block([["a"]]))
+    store.add_block("Doors", ["Object ID"], create_block([["b"], ["c"]]))
+    store.add_block("Walls", ["Object ID", "Mark"], create_block([["d", "W1"]]))
+
+    assert store.rows == 4
+    blocks = store.iter_blocks()
+    assert next(blocks)[:2] == ("Walls", ["Object ID", "Mark"])
+    assert list(store.systems) == ["Doors"]
+    assert [desc for desc, _, _ in blocks] == ["Doors"]
+    assert len(store) == 0
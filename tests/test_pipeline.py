@@ -0,0 +1,64 @@
+"""Test the lazy pipeline against the materialized extraction of the received version."""
+import pandas as pd
+import pytest
+from specklepy.api import operations
+from specklepy.transports.memory import MemoryTransport
+
+from benchmarks.offline import OfflineAccessSystemSpecificData
+from benchmarks.synthetic_model import create_synthetic_model, send_to_local_server
+from export_plan import ExportPlan
+from model_index import index_model
+from pipeline import get_serialized_object_data, iter_chunks, iter_version_objects, load_object
+from projection import ParameterProjection
+
+
+@pytest.fixture(scope="module")
+def sent_model():
+    return send_to_local_server(create_synthetic_model(num_elements=60, num_params=6, seed=3, unclassified_ratio=0.2))
+
+
+def test_version_objects_match_the_model_index(sent_model):
+    version_object_id, transport = sent_model
+    root = load_object(transport, version_object_id)
+    model_index = index_model(operations.receive(version_object_id, transport, MemoryTransport()))
+    access_system_data = OfflineAccessSystemSpecificData(version_object_id, transport)
+
+    objects = list(iter_version_objects(root, transport))
+
+    assert [object_json['id'] for _, object_json in objects] == model_index.object_ids
+    assert [collection for collection, _ in objects] == [model_index.collections[id] for id in model_index.object_ids]
+    for _, object_json in objects:
+        assert get_serialized_object_data(object_json, transport) == access_system_data.get_object_data(model_index.objects[object_json['id']])
+
+
+def test_iter_chunks_splits_without_reading_ahead():
+    assert list(iter_chunks(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    with pytest.raises(ValueError):
+        list(iter_chunks([], 0))
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"type_parameters": ["Type Fire Rating"]},
+                                    {"projection": ParameterProjection(columns=["Mark", "Level"])},
+                                    {"projection": ParameterProjection(columns=["Mark"]), "type_parameters": ["Type Fire Rating"]}])
+def test_streaming_matches_the_materialized_extraction(sent_model, kwargs):
+    access_system_data = OfflineAccessSystemSpecificData(*sent_model)
+
+    expected = access_system_data.process_speckle_data(fetch_workers=0, streaming=False, **kwargs)
+    systems_df = access_system_data.process_speckle_data(chunk_size=7, **kwargs)
+
+    assert list(systems_df) == list(expected)
+    for classification_desc, df in expected.items():
+        pd.testing.assert_frame_equal(systems_df[classification_desc], df)
+
+
+def test_export_speckle_data_writes_every_format(tmp_path, sent_model):
+    access_system_data = OfflineAccessSystemSpecificData(*sent_model)
+    systems_df = access_system_data.process_speckle_data(chunk_size=7)
+    export_plan = ExportPlan(destinations=[str(tmp_path)], formats=['xlsx', 'parquet'], file_stem='Systems_data')
+
+    written_paths = access_system_data.export_speckle_data(export_plan, chunk_size=7)
+
+    assert written_paths == [str(tmp_path / 'Systems_data.xlsx'), str(tmp_path / 'Systems_data.parquet')]
+    sheets = pd.read_excel(written_paths[0], sheet_name=None)
+    assert [len(df) for df in sheets.values()] == [len(df) for df in systems_df.values()]
+    assert [list(df.columns) for df in sheets.values()] == [list(df.columns) for df in systems_df.values()]
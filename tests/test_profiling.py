@@ -0,0 +1,43 @@
+"""Test the stage profiler and the byte counting transport."""
+import json
+
+from specklepy.transports.memory import MemoryTransport
+
+from profiling import DISABLED_STAGE, ByteCountingTransport, StageProfiler
+
+
+def test_stages_are_recorded_in_order(tmp_path):
+    profiler = StageProfiler(enabled=True, trace_memory=True)
+    with profiler.stage('receive') as stage:
+        stage.count('objects', 3)
+        data = [0] * 10000
+    with profiler.stage('export'):
+        pass
+
+    path = profiler.write_json(str(tmp_path / 'report.json'))
+    with open(path) as file:
+        report = json.load(file)
+
+    assert [stage['name'] for stage in report['stages']] == ['receive', 'export']
+    assert report['stages'][0]['objects'] == 3
+    assert report['stages'][0]['peak_traced_bytes'] >= len(data) * 8
+    assert report['total_seconds'] >= sum(stage['seconds'] for stage in report['stages'])
+
+
+def test_disabled_profiler_records_nothing():
+    profiler = StageProfiler()
+    with profiler.stage('receive') as stage:
+        stage.count('objects', 3)
+
+    assert stage is DISABLED_STAGE
+    assert profiler.report()['stages'] == []
+
+
+def test_received_bytes_are_counted():
+    transport = ByteCountingTransport(MemoryTransport())
+    transport.save_object('a', '{"id": "a"}')
+    transport.save_object('b', '{"id": "b", "name": "é"}')
+
+    assert transport.objects_received == 2
+    assert transport.bytes_received == len('{"id": "a"}') + len('{"id": "b", "name": "é"}'.encode('utf-8'))
+    assert transport.get_object('a') == '{"id": "a"}'
@@ -0,0 +1,51 @@
+"""Test projecting object parameters onto the kept columns."""
+import json
+
+from specklepy.objects.base import Base
+from specklepy.objects.other import RevitParameter
+
+from projection import ParameterProjection
+from SpecklePy_accessing_system_specific_data import AccessSystemSpecificDataSpecklePy
+
+
+def parameter(name, value, units=None):
+    return {'name': name, 'value': value, 'units': units}
+
+
+def object_parameters(ss_code):
+    return {
+        'CLASS': parameter('Classification.Uniclass.Ss.Description', 'Walls'),
+        'NUMBER': parameter('Classification.Uniclass.Ss.Number', ss_code),
+        'MARK': parameter('Mark', 'M1'),
+        'LENGTH': parameter('Length', 2.0, 'm'),
+        'FIRE': parameter('Fire Rating', '60 min'),
+    }
+
+
+def test_most_specific_ss_code_wins(tmp_path):
+    path = tmp_path / 'projection.json'
+    path.write_text(json.dumps({'columns': ['Mark'], 'systems': {'Ss_25': ['Length'], 'Ss_25_10': ['Fire Rating']}}))
+    projection = ParameterProjection.from_file(str(path))
+
+    assert set(projection.project(object_parameters('Ss_25_10_30'))) == {'CLASS', 'NUMBER', 'FIRE'}
+    assert set(projection.project(object_parameters('Ss_25_30_20'))) == {'CLASS', 'NUMBER', 'LENGTH'}
+    # 'Ss_25' does not cover 'Ss_250'.
+    assert set(projection.project(object_parameters('Ss_250'))) == {'CLASS', 'NUMBER', 'MARK'}
+
+
+def test_without_projection_inputs_everything_is_kept():
+    assert ParameterProjection.from_inputs([], None) is None
+    assert ParameterProjection(system_columns={'Ss_25': ['Mark']}).project(object_parameters('Ss_70')) == object_parameters('Ss_70')
+
+
+def test_parameters_are_skipped_during_extraction():
+    parameters = Base()
+    for key, param_info in object_parameters('Ss_25_10_30').items():
+        parameters[key] = RevitParameter(name=param_info['name'], value=param_info['value'])
+    element = Base()
+    element.parameters = parameters
+
+    access_system_data = AccessSystemSpecificDataSpecklePy("url", "project", "server", "token")
+    object_data = access_system_data.get_object_data(element, ParameterProjection(system_columns={'Ss_25_10': ['Mark']}))
+
+    assert list(object_data['parameters']) == ['CLASS', 'MARK', 'NUMBER']
@@ -0,0 +1,86 @@
+"""Test that extracting and grouping in worker processes gives the same systems as one process."""
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+from specklepy.objects.other import Collection
+
+from benchmarks.offline import OfflineAccessSystemSpecificData
+from benchmarks.synthetic_model import create_synthetic_model, send_to_local_server
+from pipeline import SerializedTraversal, get_version_roots, iter_roots_objects, iter_version_objects, load_object
+from projection import ParameterProjection
+from sharding import get_partitions, get_start_method, merge_shard_results, peek_speckle_type, split_into_shards
+
+
+@pytest.fixture(scope="module")
+def sent_model():
+    """A model with its elements in two category collections, one element being in both."""
+    model = create_synthetic_model(num_elements=90, num_params=6, seed=11, unclassified_ratio=0.2)
+    elements = model.elements
+    model.elements = [Collection(name="Walls", collectionType="category", elements=elements[:50] + [elements[70]]),
+                      Collection(name="Other", collectionType="category", elements=elements[50:])]
+    return send_to_local_server(model)
+
+
+def test_peek_speckle_type():
+    assert peek_speckle_type('{"id": "a", "speckle_type": "Speckle.Core.Models.Collection", "elements": []}') == "Speckle.Core.Models.Collection"
+    assert peek_speckle_type('{"id": "a", "name": "' + "x" * 300 + '", "speckle_type": "Base"}') is None
+
+
+def test_partitions_walk_the_objects_in_order(sent_model):
+    version_object_id, transport = sent_model
+    root = load_object(transport, version_object_id)
+    partitions = get_partitions(get_version_roots(root, transport), SerializedTraversal(transport, include_collections=False))
+
+    expected = [(collection, object_json['id']) for collection, object_json in iter_version_objects(root, transport)]
+    walked = [(collection, object_json['id']) for shard in split_into_shards(partitions, 7)
+              for collection, object_json in iter_roots_objects(shard, transport)]
+
+    assert len(split_into_shards(partitions, 7)) == 7
+    assert len(partitions) > len(expected) - 10
+    # The element in both collections is walked once by a single walk, and once per shard here.
+    assert walked.count(walked[-1]) == 1
+    assert list(dict.fromkeys(walked)) == expected
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"type_parameters": ["Type Fire Rating"]},
+                                    {"projection": ParameterProjection(columns=["Mark", "Level"])},
+                                    {"projection": ParameterProjection(columns=["Mark"]), "type_parameters": ["Type Fire Rating"]}])
+def test_processes_match_one_process(sent_model, kwargs):
+    access_system_data = OfflineAccessSystemSpecificData(*sent_model)
+
+    expected = access_system_data.process_speckle_data(chunk_size=8, **kwargs)
+    systems_df = access_system_data.process_speckle_data(chunk_size=5, extraction_workers=2, **kwargs)
+
+    assert list(systems_df) == list(expected)
+    for classification_desc, df in expected.items():
+        pd.testing.assert_frame_equal(systems_df[classification_desc], df)
+
+
+def test_workers_are_not_forked_from_other_threads(sent_model):
+    access_system_data = OfflineAccessSystemSpecificData(*sent_model)
+    expected = access_system_data.process_speckle_data()
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        start_method = executor.submit(get_start_method).result()
+        systems_df = executor.submit(access_system_data.process_speckle_data, extraction_workers=2).result()
+
+    assert start_method != "fork"
+    assert list(systems_df) == list(expected)
+    for classification_desc, df in expected.items():
+        pd.testing.assert_frame_equal(systems_df[classification_desc], df)
+
+
+def test_merge_keeps_the_first_rows_of_a_shared_object(sent_model):
+    access_system_data = OfflineAccessSystemSpecificData(*sent_model)
+    accumulator = access_system_data.group_speckle_data()
+    rows = accumulator.rows
+    _, columns, block = next(access_system_data.group_speckle_data().iter_blocks())
+    object_ids = list(block[:, columns.index("Object ID")])
+
+    merged = merge_shard_results([(accumulator, object_ids), (access_system_data.group_speckle_data(), object_ids)])
+
+    assert merged.rows == 2 * rows - len(object_ids)
+    _, merged_columns, merged_block = next(merged.iter_blocks())
+    assert merged_columns == columns
+    assert list(merged_block[:, columns.index("Object ID")]) == object_ids
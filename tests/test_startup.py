@@ -0,0 +1,28 @@
+"""Test that the schema can be generated without loading the extraction stack."""
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from benchmarks.benchmark_startup import HEAVY_MODULES, REPO_ROOT
+
+SCRIPT = """
+import sys
+sys.argv = ['main.py', 'generate_schema', sys.argv[1]]
+import main
+from speckle_automate import execute_automate_function
+execute_automate_function(main.automate_function, main.FunctionInputs)
+print(' '.join(sorted(sys.modules)))
+"""
+
+
+def test_generate_schema_does_not_import_heavy_modules(tmp_path):
+    schema_path = tmp_path / "schema.json"
+
+    completed = subprocess.run([sys.executable, "-c", SCRIPT, str(schema_path)], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+
+    modules = set(completed.stdout.split())
+    assert [module for module in HEAVY_MODULES if module in modules] == []
+    properties = json.loads(Path(schema_path).read_text())["properties"]
+    assert "uniclassSummary" in properties
+    assert "versionCount" in properties
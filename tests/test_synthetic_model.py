@@ -0,0 +1,33 @@
+"""Test that the benchmark model has the shape the pipeline reads."""
+from specklepy.api import operations
+from specklepy.transports.memory import MemoryTransport
+
+from benchmarks.synthetic_model import create_synthetic_model, send_to_local_server
+from SpecklePy_accessing_system_specific_data import AccessSystemSpecificDataSpecklePy
+
+
+def test_synthetic_model_round_trips_through_the_pipeline():
+    model = create_synthetic_model(num_elements=200, num_params=12, seed=1)
+    version_object_id, remote_transport = send_to_local_server(model)
+    base_object = operations.receive(version_object_id, remote_transport, MemoryTransport())
+
+    access_system_data = AccessSystemSpecificDataSpecklePy("url", "project", "server", "token")
+    object_ids = access_system_data.get_list_of_object_ids(base_object)
+    # 200 elements, 2 materials, 1 view, 1 project information, 1 sheet and 4 types in each of 5 categories.
+    assert len(object_ids) == 225
+
+    objects_by_id = access_system_data.get_objects_by_id(base_object)
+    element_data = access_system_data.get_object_data(objects_by_id[base_object.elements[0].id])
+    # The generated parameters plus the reference to the element's type.
+    assert len(element_data["parameters"]) == 13
+
+    data_df = access_system_data.create_speckle_data_dataframe(
+        {id: access_system_data.get_object_data(element) for id, element in objects_by_id.items()}, version_object_id)
+    systems_df = access_system_data.groupby_system_classification(data_df)
+    assert 0 < sum(len(df) for df in systems_df.values()) < len(object_ids)
+
+
+def test_same_seed_gives_the_same_model():
+    first_id, _ = send_to_local_server(create_synthetic_model(num_elements=20, seed=3))
+    second_id, _ = send_to_local_server(create_synthetic_model(num_elements=20, seed=3))
+    assert first_id == second_id
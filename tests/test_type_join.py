@@ -0,0 +1,62 @@
+"""Test joining type parameters onto instance rows."""
+from specklepy.api import operations
+from specklepy.transports.memory import MemoryTransport
+
+from benchmarks.offline import OfflineAccessSystemSpecificData
+from benchmarks.synthetic_model import create_synthetic_model, send_to_local_server
+from projection import ParameterProjection
+from SpecklePy_accessing_system_specific_data import AccessSystemSpecificDataSpecklePy
+from type_join import TypeParameterJoin
+
+
+def parameter(name, value, units=None):
+    return {'name': name, 'value': value, 'units': units}
+
+
+def test_requested_type_parameters_are_joined_by_type_id():
+    type_join = TypeParameterJoin(['Fire Rating', 'Type Mark'])
+    type_join.add_type(['101', 'type-guid'], {'parameters': {
+        'FIRE_RATING': parameter('Fire Rating', '60 min'),
+        'TYPE_MARK': parameter('Type Mark', 'W1'),
+        'WIDTH': parameter('Width', 0.3, 'm'),
+    }})
+    id_data_dictionary = {
+        'a': {'parameters': {'ELEM_TYPE_PARAM': parameter('Type', 101), 'TYPE_MARK': parameter('Type Mark', 'own mark')}},
+        'b': {'parameters': {'ELEM_TYPE_PARAM': parameter('Type', 'unknown')}},
+        'c': {'parameters': {}},
+    }
+
+    assert type_join.join(id_data_dictionary) == 1
+    assert id_data_dictionary['a']['parameters'] == {
+        'ELEM_TYPE_PARAM': parameter('Type', 101),
+        'TYPE_MARK': parameter('Type Mark', 'own mark'),
+        'FIRE_RATING': parameter('Fire Rating', '60 min'),
+    }
+    assert id_data_dictionary['b']['parameters'] == {'ELEM_TYPE_PARAM': parameter('Type', 'unknown')}
+
+
+def test_types_of_a_model_are_looked_up_instead_of_exported():
+    version_object_id, remote_transport = send_to_local_server(create_synthetic_model(num_elements=50, num_params=8, seed=2))
+    base_object = operations.receive(version_object_id, remote_transport, MemoryTransport())
+    access_system_data = AccessSystemSpecificDataSpecklePy("url", "project", "server", "token")
+    model_index = access_system_data.index_model(base_object)
+
+    type_join = access_system_data.create_type_parameter_join(model_index, ['Type Fire Rating'])
+    data = {id: access_system_data.get_object_data(model_index.objects[id]) for id in model_index.get_collection_ids('elements')}
+
+    assert len(model_index.type_ids) == 20
+    assert type_join.join(data) == 50
+    assert all(any(param['name'] == 'Type Fire Rating' for param in object_data['parameters'].values()) for object_data in data.values())
+
+
+def test_types_are_joined_onto_projected_instances():
+    version_object_id, remote_transport = send_to_local_server(create_synthetic_model(num_elements=50, num_params=8, seed=2))
+    access_system_data = OfflineAccessSystemSpecificData(version_object_id, remote_transport)
+
+    for projection in [ParameterProjection(columns=['Mark']), ParameterProjection(columns=['Mark', 'Type'])]:
+        for kwargs in [{}, {'streaming': False, 'fetch_workers': 0}]:
+            systems_df = access_system_data.process_speckle_data(type_parameters=['Type Fire Rating'], projection=projection, **kwargs)
+
+            assert all('Type Fire Rating' in df.columns for df in systems_df.values())
+            # The type id is only exported when the projection names it.
+            assert all(('Type' in df.columns) == ('Type' in projection.columns) for df in systems_df.values())
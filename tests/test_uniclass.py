@@ -0,0 +1,115 @@
+"""Test the Uniclass code index and its roll-up to groups, subgroups and systems."""
+import numpy as np
+import pandas as pd
+import pytest
+
+import columnar_export
+from benchmarks.offline import OfflineAccessSystemSpecificData
+from benchmarks.synthetic_model import create_synthetic_model, send_to_local_server
+from export_plan import ExportPlan
+from grouping import CLASSIFICATION_PARAMETER
+from projection import CLASSIFICATION_NUMBER_PARAMETER
+from uniclass import UniclassIndex, get_code_prefix
+
+COLUMNS = ['Object ID', CLASSIFICATION_PARAMETER, CLASSIFICATION_NUMBER_PARAMETER, 'Area (m²)', 'Mark', 'Is External']
+
+
+def create_block(rows):
+    block = np.empty((len(rows), len(COLUMNS)), dtype=object)
+    block[:] = rows
+    return block
+
+
+@pytest.fixture
+def uniclass_index():
+    return UniclassIndex.from_blocks([
+        ("Wall systems", COLUMNS, create_block([
+            ["a", "Wall systems", "Ss_25_10_30", 2.0, "W1", True],
+            ["b", "Wall systems", "Ss_25_10_30", 3.5, "W2", False],
+            ["c", "Wall system", "Ss_25_10_32", None, "W3", True],
+        ])),
+        ("Partitions", COLUMNS, create_block([
+            ["d", "Partitions", "Ss_25_30_20", 4, "P1", False],
+            ["e", "Partitions", None, 100.0, "P2", False],
+        ])),
+        ("Wall system", COLUMNS, create_block([
+            ["f", "Wall system", "Ss_25_10_32", 1.0, "W4", True],
+            ["g", "Wall system", "Ss_25_10_32", 1.0, "W5", True],
+        ])),
+    ])
+
+
+def test_get_code_prefix():
+    assert get_code_prefix("Ss_25_10_30", 2) == "Ss_25"
+    assert get_code_prefix("Ss_25_10_30", 4) == "Ss_25_10_30"
+    assert get_code_prefix("Ss_25_10_30_25", 4) == "Ss_25_10_30"
+    assert get_code_prefix("Ss_25", 3) is None
+
+
+def test_codes_are_keyed_by_prefix(uniclass_index):
+    assert len(uniclass_index) == 3
+    assert uniclass_index.get_codes("Ss_25") == ["Ss_25_10_30", "Ss_25_10_32", "Ss_25_30_20"]
+    assert uniclass_index.get_codes("Ss_25_10") == ["Ss_25_10_30", "Ss_25_10_32"]
+    assert uniclass_index.get_codes("Ss_30") == []
+    # Ss_25_10_32 was grouped under 'Wall systems' once and under 'Wall system' twice.
+    assert uniclass_index.get_description("Ss_25_10_32") == "Wall system"
+
+
+def test_summarize_rolls_up_every_level(uniclass_index):
+    summary = uniclass_index.summarize()
+
+    assert list(summary.columns) == ['Level', 'Code', 'Description', 'Elements', 'Area (m²)']
+    assert list(zip(summary['Level'], summary['Code'], summary['Elements'])) == [
+        ("Group", "Ss_25", 6),
+        ("Subgroup", "Ss_25_10", 5),
+        ("System", "Ss_25_10_30", 2),
+        ("System", "Ss_25_10_32", 3),
+        ("Subgroup", "Ss_25_30", 1),
+        ("System", "Ss_25_30_20", 1),
+    ]
+    assert summary['Area (m²)'].tolist() == [11.5, 7.5, 5.5, 2.0, 4.0, 4.0]
+    assert summary['Description'].tolist()[2:4] == ["Wall systems", "Wall system"]
+    assert summary['Description'].isna().tolist() == [True, True, False, False, True, False]
+
+
+def test_empty_index_has_an_empty_summary():
+    summary = UniclassIndex().summarize()
+
+    assert summary.empty
+    assert list(summary.columns)[:4] == ['Level', 'Code', 'Description', 'Elements']
+
+
+def test_summary_matches_the_exported_systems(tmp_path):
+    access_system_data = OfflineAccessSystemSpecificData(*send_to_local_server(
+        create_synthetic_model(num_elements=80, num_params=4, seed=5, unclassified_ratio=0.2)))
+    systems_df = access_system_data.process_speckle_data(chunk_size=9)
+    export_plan = ExportPlan(destinations=[str(tmp_path)], formats=['xlsx'], summary=True)
+
+    written_paths = access_system_data.export_speckle_data(export_plan, chunk_size=9)
+
+    assert written_paths == [str(tmp_path / 'Systems_data.xlsx'), str(tmp_path / 'Systems_data_summary.parquet')]
+    summary = pd.read_parquet(written_paths[1])
+    pd.testing.assert_frame_equal(summary, UniclassIndex.from_dataframes(systems_df).summarize(), check_dtype=False)
+    sheets = pd.read_excel(written_paths[0], sheet_name=None)
+    assert list(sheets)[0] == 'Summary'
+    assert len(sheets['Summary']) == len(summary)
+
+    classified = pd.concat(systems_df.values())[CLASSIFICATION_NUMBER_PARAMETER].dropna()
+    systems = summary[summary['Level'] == 'System'].set_index('Code')['Elements']
+    assert systems.sum() == len(classified)
+    assert systems.to_dict() == classified.map(lambda code: get_code_prefix(code, 4)).value_counts().to_dict()
+
+
+def test_summary_sheet_is_written_without_pyarrow(tmp_path, monkeypatch):
+    access_system_data = OfflineAccessSystemSpecificData(*send_to_local_server(
+        create_synthetic_model(num_elements=30, num_params=4, seed=5, unclassified_ratio=0.2)))
+    export_plan = ExportPlan(destinations=[str(tmp_path)], formats=['xlsx'], summary=True)
+    monkeypatch.setattr(columnar_export, 'pa', None)
+
+    with pytest.warns(UserWarning, match="pyarrow"):
+        written_paths = access_system_data.export_speckle_data(export_plan, chunk_size=9)
+
+    assert written_paths == [str(tmp_path / 'Systems_data.xlsx')]
+    sheets = pd.read_excel(written_paths[0], sheet_name=None)
+    assert list(sheets)[0] == 'Summary'
+    assert len(sheets) > 1
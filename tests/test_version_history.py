@@ -0,0 +1,123 @@
+"""Test that a version history has the rows of each version and extracts each distinct object once."""
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+import main
+import SpecklePy_accessing_system_specific_data
+
+from benchmarks.offline import OfflineAccessSystemSpecificData
+from benchmarks.synthetic_model import create_synthetic_model, send_to_local_server
+from pipeline import iter_version_objects, load_object
+from version_history import VERSION_ID_COLUMN, ModelVersion
+
+
+def create_model():
+    return create_synthetic_model(num_elements=60, num_params=6, seed=5, unclassified_ratio=0.2)
+
+
+def set_parameter_value(element, name, value):
+    param = next(param for param in element.parameters.__dict__.values() if getattr(param, 'name', None) == name)
+    param.value = value
+
+
+@pytest.fixture(scope="module")
+def sent_versions():
+    """Two versions of a model, the newest with one element edited, one removed and one type edited."""
+    first_object_id, transport = send_to_local_server(create_model())
+    model = create_model()
+    set_parameter_value(model.elements[0], "Mark", "Edited")
+    model.elements = model.elements[:-1]
+    type_object = next(type_object for types in model["@Types"].__dict__.values() if isinstance(types, list)
+                       for type_object in types if any(getattr(param, 'name', None) == "Type Fire Rating"
+                                                       for param in type_object.parameters.__dict__.values()))
+    set_parameter_value(type_object, "Type Fire Rating", "Edited")
+    second_object_id, _ = send_to_local_server(model, transport)
+    return [ModelVersion("v2", second_object_id), ModelVersion("v1", first_object_id)], transport
+
+
+class OfflineVersionHistory(OfflineAccessSystemSpecificData):
+    def __init__(self, versions, remote_transport):
+        super().__init__(None, remote_transport)
+        self.versions = versions
+
+    def get_model_versions(self, client, limit=1):
+        return self.versions[:limit]
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"type_parameters": ["Type Fire Rating"]}])
+def test_each_version_matches_a_single_version(sent_versions, kwargs):
+    versions, transport = sent_versions
+    history_df = OfflineVersionHistory(versions, transport).group_version_history(2, chunk_size=7, **kwargs).to_dataframes()
+
+    for version in versions:
+        expected = OfflineAccessSystemSpecificData(version.referenced_object, transport).process_speckle_data(**kwargs)
+        systems_df = {classification_desc: df[df[VERSION_ID_COLUMN] == version.id] for classification_desc, df in history_df.items()}
+        systems_df = {classification_desc: df for classification_desc, df in systems_df.items() if len(df)}
+
+        assert sorted(systems_df) == sorted(expected)
+        for classification_desc, df in expected.items():
+            assert set(systems_df[classification_desc][VERSION_ID_COLUMN]) == {version.id}
+            version_df = systems_df[classification_desc][list(df.columns)].reset_index(drop=True)
+            pd.testing.assert_frame_equal(version_df, df, check_dtype=False)
+
+
+def test_shared_objects_are_extracted_once(sent_versions):
+    versions, transport = sent_versions
+    object_ids = [[object_json['id'] for _, object_json in iter_version_objects(load_object(transport, version.referenced_object), transport)]
+                  for version in versions]
+
+    history = OfflineVersionHistory(versions, transport).group_version_history(2)
+
+    assert len(history) == 2
+    assert history.version_rows == sum(len(ids) for ids in object_ids)
+    assert history.object_count == len(set(object_ids[0]) | set(object_ids[1]))
+    # The newest version only adds the element and the type that were edited.
+    assert history.object_count == len(object_ids[1]) + 2
+
+
+class FakeProjectClient:
+    """Lists the versions of the models of one project, newest first, like `SpeckleClient`."""
+
+    def __init__(self, versions_by_model):
+        self.versions_by_model = versions_by_model
+        self.model = SimpleNamespace(get_with_versions=self.get_with_versions)
+        self.commit = SimpleNamespace(list=self.list_commits)
+
+    def get_with_versions(self, model_id, project_id, versions_limit):
+        return SimpleNamespace(versions=SimpleNamespace(items=self.versions_by_model[model_id][:versions_limit]))
+
+    def list_commits(self, stream_id, limit):
+        versions = [version for versions in self.versions_by_model.values() for version in versions]
+        return sorted(versions, key=lambda version: version.createdAt, reverse=True)[:limit]
+
+
+def test_only_versions_of_the_triggering_model_are_exported(sent_versions, tmp_path, monkeypatch):
+    versions, transport = sent_versions
+    other_object_id, _ = send_to_local_server(create_synthetic_model(num_elements=20, num_params=6, seed=9), transport)
+    client = FakeProjectClient({
+        "walls": [SimpleNamespace(id=version.id, referencedObject=version.referenced_object, createdAt=created_at, message=None)
+                  for version, created_at in zip(versions, [2, 1])],
+        "other": [SimpleNamespace(id="other v1", referencedObject=other_object_id, createdAt=3, message=None)],
+    })
+
+    def create_access_system_data(**kwargs):
+        access_system_data = OfflineAccessSystemSpecificData(None, transport, **kwargs)
+        access_system_data.get_speckle_client = lambda: client
+        return access_system_data
+
+    monkeypatch.setattr(SpecklePy_accessing_system_specific_data, "AccessSystemSpecificDataSpecklePy", create_access_system_data)
+    monkeypatch.setenv("CURL_CA_BUNDLE", "")
+    (tmp_path / "run").mkdir()
+    monkeypatch.chdir(tmp_path / "run")
+    automate_context = SimpleNamespace(
+        speckle_client=SimpleNamespace(account=SimpleNamespace(serverInfo=SimpleNamespace(url="https://speckle.example"), token="")),
+        automation_run_data=SimpleNamespace(project_id="p", triggers=[SimpleNamespace(payload=SimpleNamespace(model_id="walls", version_id="v2"))]),
+        mark_run_success=lambda message: None,
+    )
+
+    main.automate_function(automate_context, main.FunctionInputs(folder_path=str(tmp_path), version_count=3))
+
+    sheets = pd.read_excel(tmp_path / "Systems_history.xlsx", sheet_name=None)
+    assert set(pd.concat(sheets.values())[VERSION_ID_COLUMN]) == {"v2", "v1"}
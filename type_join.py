@@ -0,0 +1,87 @@
+"""Helper module for joining type parameters onto the rows of their instances."""
+
+from typing import Dict, Iterable, Optional
+
+from projection import ParameterProjection
+
+# The parameter of an instance that holds the element id of its type.
+TYPE_ID_PARAMETER = 'ELEM_TYPE_PARAM'
+
+
+class TypeParameterJoin:
+    """
+    A lookup of type parameters keyed by type id, merged into the data of instances.
+
+    Type objects are kept out of the object rows. Only the parameters named in `columns`
+    are kept for each type, and each instance gets those of its own type, found through
+    the `type_id_parameter` of the instance. Parameters the instance already has are kept.
+
+    With a parameter projection, instances must be extracted with `self.projection`, which also
+    keeps the type id. The join drops the type id again when the projection does not name it.
+    """
+
+    def __init__(self, columns: Iterable[str], type_id_parameter: str = TYPE_ID_PARAMETER,
+                 projection: Optional[ParameterProjection] = None) -> None:
+        self.columns = set(columns)
+        self.type_id_parameter = type_id_parameter
+        self.projection = projection.with_keys([type_id_parameter]) if projection is not None else None
+        self.types: Dict[str, Dict[str, dict]] = {}
+        # The object id of the type each type id refers to, which changes whenever the type does.
+        self.type_object_ids: Dict[str, Optional[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def add_type(self, type_ids: Iterable[Optional[str]], type_data: dict) -> None:
+        """
+        Adds the requested parameters of one type object.
+
+        Args:
+            type_ids (Iterable[Optional[str]]): The ids instances may refer to the type by,
+                e.g. its element id and application id. None values are skipped.
+            type_data (dict): The object data of the type, as made by `get_object_data`.
+        """
+        parameters = {
+            key: param_info for key, param_info in (type_data.get('parameters') or {}).items()
+            if isinstance(param_info, dict) and param_info.get('name') in self.columns
+        }
+        for type_id in type_ids:
+            if type_id is not None:
+                self.types[str(type_id)] = parameters
+                self.type_object_ids[str(type_id)] = type_data.get('id')
+
+    def get_type_id(self, object_data: dict) -> Optional[str]:
+        """The type id an instance refers to, or None when it has no type parameter."""
+        param_info = (object_data.get('parameters') or {}).get(self.type_id_parameter)
+        if not isinstance(param_info, dict) or param_info.get('value') is None:
+            return None
+        return str(param_info['value'])
+
+    def join_object(self, object_data: dict) -> bool:
+        """
+        Merges the type parameters into the data of one instance, in place.
+
+        Returns:
+            bool: Whether the type of the instance was found.
+        """
+        type_parameters = self.types.get(self.get_type_id(object_data))
+        if self.projection is not None and object_data.get('parameters'):
+            self.projection.drop_keys(object_data['parameters'])
+        if type_parameters is None:
+            return False
+        parameters = object_data.setdefault('parameters', {})
+        for key, param_info in type_parameters.items():
+            parameters.setdefault(key, param_info)
+        return True
+
+    def join(self, id_data_dictionary: Dict[str, dict]) -> int:
+        """
+        Merges the type parameters into the data of each instance, in place.
+
+        Args:
+            id_data_dictionary (Dict[str, dict]): The object data of the instances keyed by object id.
+
+        Returns:
+            int: The number of instances whose type was found.
+        """
+        return sum(self.join_object(object_data) for object_data in id_data_dictionary.values())
@@ -0,0 +1,151 @@
+"""Helper module for indexing Uniclass Ss codes by prefix and rolling the objects up to groups, subgroups and systems."""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from grouping import CLASSIFICATION_PARAMETER
+from projection import CLASSIFICATION_NUMBER_PARAMETER
+
+# The roll-up levels and the number of parts of their code, e.g. 'Ss_25', 'Ss_25_10' and 'Ss_25_10_30'.
+LEVELS = [('Group', 2), ('Subgroup', 3), ('System', 4)]
+SUMMARY_COLUMNS = ['Level', 'Code', 'Description', 'Elements']
+NUMERIC_DTYPES = frozenset(['integer', 'floating', 'mixed-integer-float', 'decimal'])
+
+
+def get_code_prefix(code: str, parts: int) -> Optional[str]:
+    """The prefix of a code at a level, e.g. 'Ss_25_10' for 'Ss_25_10_30' and 3 parts, or None when the code is shorter."""
+    code_parts = str(code).split('_')
+    return '_'.join(code_parts[:parts]) if len(code_parts) >= parts else None
+
+
+class UniclassIndex:
+    """
+    The Ss codes of one run, keyed by each of their prefixes, with the objects rolled up per code.
+
+    Objects are added one system block at a time. Each block is reduced right away to the
+    element count and the sums of its numeric parameters per Ss code, in one vectorized
+    group-by, so only those partial sums are kept. Objects without a
+    `Classification.Uniclass.Ss.Number` are not counted. A parameter is summed when all of
+    its values in a block are numbers; text, booleans and mixed columns are left out.
+
+    Because the roll-up is keyed by code, objects whose descriptions differ slightly still add
+    up to the same system, and the summary can be regrouped without running the export again.
+    """
+
+    def __init__(self) -> None:
+        self.partials: List[pd.DataFrame] = []
+        self.code_table: Optional[pd.DataFrame] = None
+        self.descriptions: Dict[str, str] = {}
+        self.prefixes: Dict[str, List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.get_code_table())
+
+    @classmethod
+    def from_blocks(cls, blocks: Iterable[Tuple[str, List[str], np.ndarray]]) -> "UniclassIndex":
+        """Builds the index from the object blocks yielded by `grouping.iter_system_blocks`."""
+        index = cls()
+        for classification_desc, columns, block in blocks:
+            index.add(classification_desc, columns, block)
+        return index
+
+    @classmethod
+    def from_dataframes(cls, dataframes_dict: Dict[str, pd.DataFrame]) -> "UniclassIndex":
+        """Builds the index from the DataFrame of each system."""
+        index = cls()
+        for classification_desc, df in dataframes_dict.items():
+            index.add(classification_desc, [str(column) for column in df.columns], df.to_numpy(dtype=object))
+        return index
+
+    def add(self, classification_desc: str, columns: List[str], block: np.ndarray) -> None:
+        """
+        Adds the objects of one system.
+
+        Args:
+            classification_desc (str): The description the objects were grouped under.
+            columns (List[str]): The column names of the block.
+            block (np.ndarray): The rows of the system as a 2D object array.
+        """
+        if CLASSIFICATION_NUMBER_PARAMETER not in columns or len(block) == 0:
+            return
+        codes = pd.Series(block[:, columns.index(CLASSIFICATION_NUMBER_PARAMETER)], dtype=object)
+        has_code = codes.notna().to_numpy() & (codes.astype(str).str.len() > 0).to_numpy()
+        if not has_code.any():
+            return
+
+        frame = {'Code': codes[has_code].astype(str).to_numpy(), 'Description': classification_desc, 'Elements': 1}
+        for i, column in enumerate(columns):
+            if column in (CLASSIFICATION_NUMBER_PARAMETER, CLASSIFICATION_PARAMETER) or column in frame:
+                continue
+            values = block[has_code, i]
+            if pd.api.types.infer_dtype(values, skipna=True) in NUMERIC_DTYPES:
+                frame[column] = pd.to_numeric(values)
+        partial = pd.DataFrame(frame).groupby(['Code', 'Description'], sort=False).sum(min_count=1)
+        self.partials.append(partial)
+        self.code_table = None
+
+    def get_code_table(self) -> pd.DataFrame:
+        """The element count and numeric sums of each Ss code, sorted by code."""
+        if self.code_table is not None:
+            return self.code_table
+        if not self.partials:
+            self.code_table = pd.DataFrame(columns=['Code', 'Description', 'Elements'])
+            self.descriptions, self.prefixes = {}, {}
+            return self.code_table
+
+        by_description = pd.concat(self.partials).groupby(level=['Code', 'Description'], sort=False).sum(min_count=1)
+        # The description most objects of a code were grouped under.
+        description_counts = by_description['Elements'].reset_index()
+        description_counts = description_counts.sort_values('Elements', ascending=False, kind='stable').drop_duplicates('Code')
+        self.descriptions = dict(zip(description_counts['Code'], description_counts['Description']))
+
+        code_table = by_description.groupby(level='Code').sum(min_count=1).reset_index()
+        code_table.insert(1, 'Description', code_table['Code'].map(self.descriptions))
+        self.code_table = code_table.sort_values('Code', kind='stable').reset_index(drop=True)
+
+        self.prefixes = {}
+        for code in self.code_table['Code']:
+            for _, parts in LEVELS:
+                prefix = get_code_prefix(code, parts)
+                if prefix is not None:
+                    self.prefixes.setdefault(prefix, []).append(code)
+        return self.code_table
+
+    def get_codes(self, prefix: str) -> List[str]:
+        """The codes under a group, subgroup or system prefix, e.g. every 'Ss_25_10_*' code for 'Ss_25_10'."""
+        self.get_code_table()
+        return list(self.prefixes.get(prefix, []))
+
+    def get_description(self, code: str) -> Optional[str]:
+        """The description most objects with this code were grouped under."""
+        self.get_code_table()
+        return self.descriptions.get(code)
+
+    def summarize(self) -> pd.DataFrame:
+        """
+        Rolls the codes up to each of the `LEVELS`.
+
+        Returns:
+            pd.DataFrame: One row per group, subgroup and system, in code order so each group
+                is followed by its subgroups and systems. The columns are 'Level', 'Code',
+                'Description', 'Elements' and the sum of each numeric parameter.
+        """
+        code_table = self.get_code_table()
+        value_columns = [column for column in code_table.columns if column not in ('Code', 'Description')]
+        levels = []
+        for level, parts in LEVELS:
+            prefixes = code_table['Code'].map(lambda code: get_code_prefix(code, parts))
+            rolled_up = code_table[value_columns].groupby(prefixes).sum(min_count=1)
+            rolled_up.index.name = 'Code'
+            rolled_up = rolled_up.reset_index()
+            rolled_up.insert(0, 'Level', level)
+            rolled_up.insert(2, 'Description', rolled_up['Code'].map(self.descriptions) if parts == LEVELS[-1][1] else None)
+            levels.append(rolled_up)
+
+        summary = pd.concat(levels, ignore_index=True) if levels else pd.DataFrame(columns=SUMMARY_COLUMNS)
+        level_order = summary['Level'].map({level: i for i, (level, _) in enumerate(LEVELS)})
+        summary = summary.assign(_order=level_order).sort_values(['Code', '_order'], kind='stable').drop(columns='_order')
+        summary['Elements'] = summary['Elements'].astype('int64')
+        return summary.reset_index(drop=True)
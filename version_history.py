@@ -0,0 +1,201 @@
+"""Helper module for extracting several versions of a model, each distinct object once, into tables keyed by version."""
+
+from typing import Dict, Hashable, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from specklepy.transports.abstract_transport import AbstractTransport
+
+from grouping import SystemBlockAccumulator, iter_system_blocks
+from pipeline import (DEFAULT_CHUNK_SIZE, SerializedTraversal, get_serialized_object_data, get_version_roots, is_base,
+                      iter_roots_objects, load_object)
+from projection import ParameterProjection
+from sharding import get_partitions
+from type_join import TypeParameterJoin
+
+VERSION_ID_COLUMN = 'Version ID'
+VERSION_OBJECT_ID_COLUMN = 'Version Object ID'
+OBJECT_ID_COLUMN = 'Object ID'
+
+
+class ModelVersion(NamedTuple):
+    """One version of a model: its id, the id of its root object, and when and why it was made."""
+
+    id: str
+    referenced_object: str
+    created_at: Optional[str] = None
+    message: Optional[str] = None
+
+
+class VersionHistory:
+    """
+    The objects of several versions of a model, extracted and grouped once however many versions share them.
+
+    Speckle objects are content-addressed: an id always stands for the same data and the same
+    children. So each object below the collections is walked the first time its id is met,
+    and later versions reuse the ids found below it. Each object is extracted and grouped into
+    the `ParameterStore` of its system once, and a version only keeps the rows of its objects.
+    Extraction and grouping therefore scale with the number of distinct objects, not with the
+    number of versions times the size of the model.
+
+    With a type join, an instance gets one row per type object it was joined with, so
+    instances keep their rows when their type changes in a later version.
+
+    The tables of `iter_blocks` and `to_dataframes` have the columns of a single version
+    export, with the 'Version ID' and 'Version Object ID' of each row after 'Model URL'. Each
+    table holds the rows of every version in the order the versions were added, each version
+    in walk order.
+    """
+
+    def __init__(self, transport: AbstractTransport, model_url: str, projection: Optional[ParameterProjection] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+        self.transport = transport
+        self.model_url = model_url
+        self.projection = projection
+        self.chunk_size = chunk_size
+        self.traversal = SerializedTraversal(transport, include_collections=False)
+        self.accumulator = SystemBlockAccumulator()
+        # The system and row of each extracted object, or None for unclassified objects.
+        self.rows_by_key: Dict[Hashable, Optional[Tuple[str, int]]] = {}
+        # The ids of the objects walked below each partition object, in walk order.
+        self.partition_object_ids: Dict[str, List[str]] = {}
+        self.type_ids: Dict[str, Optional[str]] = {}
+        self.versions: List[Tuple[ModelVersion, Dict[str, np.ndarray]]] = []
+        self.version_rows = 0
+        self.pending: List[Tuple[Hashable, dict]] = []
+
+    def __len__(self) -> int:
+        """The number of versions."""
+        return len(self.versions)
+
+    @property
+    def object_count(self) -> int:
+        """The number of distinct objects extracted."""
+        return self.accumulator.rows
+
+    def get_key(self, object_id: str, type_join: Optional[TypeParameterJoin]) -> Hashable:
+        """The key of the row of an object: its id, and with a type join also the object id of its type."""
+        if type_join is None:
+            return object_id
+        return object_id, type_join.type_object_ids.get(self.type_ids[object_id])
+
+    def get_known_key(self, object_id: str, type_join: Optional[TypeParameterJoin]) -> Optional[Hashable]:
+        """The key of an object when a row with that key is already kept or pending, or None when it must be extracted."""
+        if type_join is not None and object_id not in self.type_ids:
+            return None
+        key = self.get_key(object_id, type_join)
+        return key if key in self.rows_by_key else None
+
+    def extract(self, object_json: dict, type_join: Optional[TypeParameterJoin]) -> Hashable:
+        """Extracts one object, unless a row with its key is already kept or pending, and returns the key."""
+        object_id = object_json['id']
+        # With a type join, instances keep their type id until they are joined.
+        projection = type_join.projection if type_join is not None else self.projection
+        object_data = None
+        if type_join is not None and object_id not in self.type_ids:
+            object_data = get_serialized_object_data(object_json, self.transport, projection)
+            self.type_ids[object_id] = type_join.get_type_id(object_data)
+        key = self.get_key(object_id, type_join)
+        if key not in self.rows_by_key:
+            if object_data is None:
+                object_data = get_serialized_object_data(object_json, self.transport, projection)
+            if type_join is not None:
+                type_join.join_object(object_data)
+            # Reserved until the pending objects are grouped.
+            self.rows_by_key[key] = None
+            self.pending.append((key, object_data))
+            if len(self.pending) >= self.chunk_size:
+                self.group_pending()
+        return key
+
+    def group_pending(self) -> None:
+        """Groups the pending objects and records the system and row each of them got."""
+        if not self.pending:
+            return
+        keys_by_id = {object_data['id']: key for key, object_data in self.pending}
+        id_frame = pd.DataFrame({"Model URL": self.model_url, OBJECT_ID_COLUMN: list(keys_by_id)})
+        store = self.accumulator.store
+        for classification_desc, columns, block in iter_system_blocks(id_frame, [object_data for _, object_data in self.pending]):
+            system = store.systems.get(classification_desc)
+            start = system.rows if system is not None else 0
+            store.add_block(classification_desc, columns, block)
+            for row, object_id in enumerate(block[:, columns.index(OBJECT_ID_COLUMN)], start):
+                self.rows_by_key[keys_by_id[object_id]] = (classification_desc, row)
+        self.accumulator.rows += len(self.pending)
+        self.pending = []
+
+    def add_version(self, version: ModelVersion, root: dict, type_join: Optional[TypeParameterJoin] = None) -> int:
+        """
+        Adds the objects of one version, extracting only the ones no earlier version had.
+
+        Args:
+            version (ModelVersion): The version.
+            root (dict): The parsed root object of the version, with its objects in the transport.
+            type_join (Optional[TypeParameterJoin]): The type parameters of this version to join
+                onto its instances, made with the same projection. Type objects then get no rows
+                of their own.
+
+        Returns:
+            int: The number of objects in the version.
+        """
+        roots = get_version_roots(root, self.transport, include_types=type_join is None)
+        object_keys = {}
+        for partition in get_partitions(roots, self.traversal):
+            value = partition[0]
+            partition_id = (value.get('referencedId') or value.get('id')) if is_base(value) else None
+            object_ids = self.partition_object_ids.get(partition_id)
+            if object_ids is None:
+                object_ids = []
+                for _, object_json in iter_roots_objects([partition], self.transport, self.traversal):
+                    object_ids.append(object_json['id'])
+                    if object_json['id'] not in object_keys:
+                        object_keys[object_json['id']] = self.extract(object_json, type_join)
+                if partition_id is not None:
+                    self.partition_object_ids[partition_id] = object_ids
+                continue
+            for object_id in object_ids:
+                if object_id not in object_keys:
+                    key = self.get_known_key(object_id, type_join)
+                    # Only objects with no row for their key yet are loaded again.
+                    object_keys[object_id] = key if key is not None else self.extract(load_object(self.transport, object_id), type_join)
+        self.group_pending()
+
+        rows_by_system: Dict[str, List[int]] = {}
+        for key in object_keys.values():
+            location = self.rows_by_key[key]
+            if location is not None:
+                rows_by_system.setdefault(location[0], []).append(location[1])
+        self.versions.append((version, {desc: np.asarray(rows, dtype=np.intp) for desc, rows in rows_by_system.items()}))
+        self.version_rows += len(object_keys)
+        return len(object_keys)
+
+    def iter_blocks(self) -> Iterator[Tuple[str, List[str], np.ndarray]]:
+        """
+        Yields the description, columns and rows of each system, over all versions, one system at a time.
+
+        Systems are in order of first appearance. The distinct rows of a system are decoded
+        once and repeated for each version that has them.
+        """
+        store = self.accumulator.store
+        for classification_desc in list(store.systems):
+            columns, block = store.get_block(classification_desc)
+            object_columns = columns[1:]
+            long_columns = columns[:1] + [VERSION_ID_COLUMN, VERSION_OBJECT_ID_COLUMN] + object_columns
+            segments = [(version, rows_by_system[classification_desc]) for version, rows_by_system in self.versions
+                        if classification_desc in rows_by_system]
+            long_block = np.empty((sum(len(rows) for _, rows in segments), len(long_columns)), dtype=object)
+            start = 0
+            for version, rows in segments:
+                end = start + len(rows)
+                long_block[start:end, 0] = block[rows, 0]
+                long_block[start:end, 1] = version.id
+                long_block[start:end, 2] = version.referenced_object
+                long_block[start:end, 3:] = block[rows, 1:]
+                start = end
+            store.pop_system(classification_desc)
+            yield classification_desc, long_columns, long_block
+
+    def to_dataframes(self) -> Dict[str, pd.DataFrame]:
+        """The long table of each system, with the dtypes pandas infers from its rows."""
+        return {classification_desc: pd.DataFrame(block, columns=columns).infer_objects()
+                for classification_desc, columns, block in self.iter_blocks()}